@@ -11,7 +11,17 @@ def get_git_revision_hash() -> str:
 # For release/distribution, the __version__ variable below is modified
 # during CI by poetry dynamic versioning with the github tagged version.
 __version__ = "0.0.0"
-__sha__ = get_git_revision_hash()
 
 __version_tag__ = "v{}".format(__version__)
 __build_tag__ = epcpm._build.job_id
+
+
+def __getattr__(name):
+    # running git is deferred until the SHA is wanted, mostly by the GUI's
+    # about dialog, rather than paid by every command line invocation
+    if name == "__sha__":
+        global __sha__
+        __sha__ = get_git_revision_hash()
+        return __sha__
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
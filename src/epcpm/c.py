@@ -1,38 +1,112 @@
+import codecs
+import itertools
 import os
 
 import jinja2
 
+import epcpm.writer
 
-# TODO: CAMPid 073407143081341008467657184603164130
-def format_nested_lists(it, indent=""):
-    result = []
 
+def iter_nested_lists(it, indent=""):
+    """The lines of :func:`format_nested_lists` one at a time, without
+    building the lists of lines for each level of nesting.
+    """
     for item in it:
         if isinstance(item, list):
-            result.extend(format_nested_lists(item, indent=indent + "    "))
+            yield from iter_nested_lists(item, indent=indent + "    ")
         elif item.strip() == "":
-            result.append("")
+            yield ""
         else:
-            result.append(indent + item)
+            yield indent + item
+
+
+# TODO: CAMPid 073407143081341008467657184603164130
+def format_nested_lists(it, indent=""):
+    lines = iter_nested_lists(it, indent=indent)
 
     if indent == "":
-        result.append("")
-        return "\n".join(result)
+        return "\n".join(itertools.chain(lines, [""]))
     else:
-        return result
+        return list(lines)
+
+
+def strip_end(chunks, newline="\n"):
+    """The chunks of text with the trailing whitespace of their whole
+    replaced by a single newline, holding back only the whitespace.
+    """
+    pending = ""
+
+    for chunk in chunks:
+        stripped = chunk.rstrip()
+
+        if stripped == "":
+            pending += chunk
+            continue
+
+        # followed by more text so it isn't trailing after all
+        if pending != "":
+            yield pending
+
+        yield stripped
+        pending = chunk[len(stripped) :]
+
+    yield newline
+
+
+def encode(chunks, encoding):
+    encoder = codecs.getincrementalencoder(encoding)()
+
+    for chunk in chunks:
+        yield encoder.encode(chunk)
+
+    yield encoder.encode("", final=True)
+
+
+# directory to also keep compiled templates in between runs, if set
+bytecode_cache_variable = "EPCPM_TEMPLATE_CACHE"
+
+_environments = {}
+
+
+def environment(directory, newline="\n"):
+    """The environment rendering the templates in the directory, shared by
+    all renders with the same options.  Its templates are compiled once and
+    recompiled if their files change.
+    """
+    bytecode_directory = os.environ.get(bytecode_cache_variable) or None
+    key = (os.path.abspath(directory), newline, bytecode_directory)
+
+    environment = _environments.get(key)
+
+    if environment is None:
+        bytecode_cache = None
+        if bytecode_directory is not None:
+            os.makedirs(bytecode_directory, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_directory)
+
+        environment = jinja2.Environment(
+            undefined=jinja2.StrictUndefined,
+            loader=jinja2.FileSystemLoader(os.fspath(directory)),
+            newline_sequence=newline,
+            autoescape=False,
+            trim_blocks=True,
+            bytecode_cache=bytecode_cache,
+        )
+        _environments[key] = environment
+
+    return environment
 
 
 def render(source, destination, context={}, encoding="utf-8", newline="\n"):
-    environment = jinja2.Environment(
-        undefined=jinja2.StrictUndefined,
-        loader=jinja2.FileSystemLoader(os.fspath(source.parent)),
-        newline_sequence=newline,
-        autoescape=False,
-        trim_blocks=True,
-    )
-    template = environment.get_template(name=source.name)
+    template = environment(
+        directory=source.parent,
+        newline=newline,
+    ).get_template(name=source.name)
 
-    rendered = template.render(context)
-    rendered = rendered.rstrip() + newline
+    # streamed so the rendered file is never held in memory as a whole
+    chunks = strip_end(chunks=template.generate(context), newline=newline)
 
-    destination.write_bytes(rendered.encode(encoding))
+    epcpm.writer.write_chunks(
+        path=destination,
+        chunks=encode(chunks=chunks, encoding=encoding),
+    )
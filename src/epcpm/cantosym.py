@@ -10,7 +10,10 @@ import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
 import epcpm.canmodel
+import epcpm.exportcontext
+import epcpm.projectindex
 import epcpm.symtoproject
+import epcpm.writer
 
 builders = epyqlib.utils.general.TypeMap()
 
@@ -23,35 +26,48 @@ def dehumanize_name(name):
 #     return epyqlib.utils.general.spaced_to_upper_camel(name)
 
 
-def export(path, can_model, parameters_model):
+def export(path, can_model, parameters_model, export_context=None):
+    if export_context is None:
+        export_context = epcpm.exportcontext.ExportContext.from_models(
+            parameters=parameters_model,
+            can=can_model,
+        )
+
     finder = can_model.node_from_uuid
-    access_levels = parameters_model.list_selection_roots["access level"]
     builder = epcpm.cantosym.builders.wrap(
         wrapped=can_model.root,
-        access_levels=access_levels,
+        access_levels=export_context.access_levels(),
         parameter_uuid_finder=finder,
         parameter_model=parameters_model,
     )
 
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="\n") as f:
-        f.write(builder.gen())
+    with export_context.using_paths("can"):
+        text = builder.gen()
+
+    epcpm.writer.write_text(path=path, text=text)
 
 
 class SignalOutsideMessageError(Exception):
     @classmethod
     def build(cls, signal, message_length):
-        path = [signal]
+        paths = epcpm.projectindex.paths_for(signal)
+
+        if paths is None:
+            path = [signal]
+
+            while True:
+                parent = path[0].tree_parent
 
-        while True:
-            parent = path[0].tree_parent
+                if parent.tree_parent is None:
+                    break
 
-            if parent.tree_parent is None:
-                break
+                path.insert(0, parent)
 
-            path.insert(0, parent)
+            names = [element.name for element in path]
+        else:
+            names = paths.names(signal)
 
-        path_string = " : ".join(element.name for element in path)
+        path_string = " : ".join(names)
 
         message_range = [0, max(0, (message_length * 8) - 1)]
         signal_range = [signal.start_bit, signal.start_bit + signal.bits - 1]
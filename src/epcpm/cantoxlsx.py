@@ -10,7 +10,10 @@ import pathlib
 import typing
 import glob
 import uuid
+import epcpm.exportcontext
 import epcpm.pm_helper
+import epcpm.projectindex
+import epcpm.writer
 import epyqlib.treenode
 import epyqlib.utils.general
 from natsort import natsorted
@@ -122,6 +125,8 @@ def export(
     can_model: epyqlib.attrsmodel.Model,
     pmvs_path: pathlib.Path,
     column_filter: epcpm.pm_helper.FieldsInterface = None,
+    parameters_model: epyqlib.attrsmodel.Model = None,
+    export_context: epcpm.exportcontext.ExportContext = None,
 ) -> None:
     """
     Generate the CAN model parameter data in Excel format (.xlsx).
@@ -131,6 +136,8 @@ def export(
         can_model: CAN model
         pmvs_path: directory path to the pmvs files
         column_filter: columns to be output to .xls file
+        parameters_model: parameters model, to index its node paths as well
+        export_context: lookups shared with the other exporters
 
     Returns:
 
@@ -140,6 +147,16 @@ def export(
     if column_filter is None:
         column_filter = epcpm.pm_helper.attr_fill(Fields, True)
 
+    if export_context is None:
+        export_context = epcpm.exportcontext.ExportContext.from_models(
+            parameters=parameters_model,
+            can=can_model,
+        )
+
+    indexed = ["can"]
+    if parameters_model is not None:
+        indexed.append("parameters")
+
     builder = epcpm.cantoxlsx.builders.wrap(
         wrapped=can_model.root,
         parameter_uuid_finder=can_model.node_from_uuid,
@@ -147,10 +164,10 @@ def export(
         pmvs_uuid_to_value_list=pmvs_uuid_to_value_list,
     )
 
-    workbook = builder.gen()
+    with export_context.using_paths(*indexed):
+        workbook = builder.gen()
 
-    path.parent.mkdir(parents=True, exist_ok=True)
-    workbook.save(path)
+    epcpm.writer.save_workbook(workbook=workbook, path=path)
 
 
 @builders(epcpm.canmodel.Root)
@@ -273,6 +290,15 @@ class Signal:
         Returns:
             node's path list
         """
+        paths = epcpm.projectindex.paths_for(node)
+        if paths is not None:
+            ancestors = paths.ancestors(node)
+            if len(ancestors) > 1:
+                # The parent's path without the Parameters root element.
+                return list(paths.names(ancestors[0]))
+
+            return [ancestor.name for ancestor in ancestors]
+
         path_list = []
         node_parent = node
         while True:
@@ -370,7 +396,10 @@ def format_for_manual(
     builder = epcpm.cantoxlsx.builders.wrap(
         wrapped=parameters_model.root,
     )
-    group_manual_description_map = builder.gen()
+    with epcpm.projectindex.using_paths(
+        epcpm.projectindex.PathIndex.build(root=parameters_model.root),
+    ):
+        group_manual_description_map = builder.gen()
     parameter_uuid_finder = parameters_model.node_from_uuid
 
     input_workbook = openpyxl.load_workbook(filename=input_path)
@@ -722,7 +751,7 @@ def format_for_manual(
             current_row += rows_used
             progress_bar.update(1)
 
-    output_workbook.save(output_path)
+    epcpm.writer.save_workbook(workbook=output_workbook, path=output_path)
 
 
 @builders(epyqlib.pm.parametermodel.Root)
@@ -795,6 +824,11 @@ class Group:
         Returns:
             group node's path list
         """
+        paths = epcpm.projectindex.paths_for(node)
+        if paths is not None and paths.depth(node) > 0:
+            # Without the Parameters root element.
+            return list(paths.names(node))
+
         path_list = [node.name]
         node_parent = node
         while True:
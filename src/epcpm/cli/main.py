@@ -5,28 +5,28 @@ import sys
 import textwrap
 
 import click
-import epyqlib.pm.valueset
-import epyqlib.pm.valuesetmodel
-import lxml.etree
 
-import epcpm.__main__
-import epcpm.cli.exportdocx
-import epcpm.cli.sunspectostaticmodbus
 import epcpm.cli.utils
-import epcpm.importexport
-import epcpm.importexportdialog
-import epcpm.project
-import epcpm.smdx
+import epcpm.importexportpaths
+import epcpm.staleness
 
+# Only light modules are imported above so that commands such as
+# export build --if-stale can finish before the models, exporters and Qt
+# are imported.  Commands import what they need when they run.
 
-@click.group()
+
+@click.group(
+    cls=epcpm.cli.utils.LazyGroup,
+    lazy_subcommands={
+        "client": "epcpm.cli.serve.client",
+        "gui": "epcpm.__main__._entry_point",
+        "serve": "epcpm.cli.serve.serve",
+    },
+)
 def main():
     """Parameter manager"""
 
 
-main.add_command(epcpm.__main__._entry_point, name="gui")
-
-
 @main.group(name="import")
 def _import():
     """Import PM data from other formats"""
@@ -38,9 +38,11 @@ def _import():
 @epcpm.cli.utils.target_path_option(required=True)
 def full(project, target_path):
     """Import PM data from embedded project directory"""
+    import epcpm.importexport
+
     project = pathlib.Path(project)
 
-    paths = epcpm.importexportdialog.paths_from_directory(target_path)
+    paths = epcpm.importexportpaths.paths_from_directory(target_path)
 
     imported_project = epcpm.importexport.full_import(
         paths=paths,
@@ -51,15 +53,15 @@ def full(project, target_path):
     imported_project.save()
 
 
-@main.group()
+@main.group(
+    cls=epcpm.cli.utils.LazyGroup,
+    lazy_subcommands={"docx": "epcpm.cli.exportdocx.cli"},
+)
 def export():
     """Export PM data to other formats"""
     pass
 
 
-export.add_command(epcpm.cli.exportdocx.cli, name="docx")
-
-
 @export.command()
 @epcpm.cli.utils.project_option(required=True)
 @epcpm.cli.utils.target_path_option(required=True)
@@ -70,24 +72,107 @@ export.add_command(epcpm.cli.exportdocx.cli, name="docx")
     "include_uuid_in_item",
     default=False,
 )
+@click.option(
+    "--split-interface/--single-interface",
+    "split_interface",
+    default=False,
+    help=(
+        "Write the interface items of each top level parameter group to"
+        " their own C file"
+    ),
+)
+@click.option(
+    "--parallel-load/--serial-load",
+    "parallel_load",
+    default=False,
+    help="Deserialize the project model files in worker processes",
+)
+@epcpm.cli.utils.snapshot_option()
+@click.option(
+    "--incremental/--all-exporters",
+    "only_stale",
+    default=False,
+    help="Only rerun exporters whose models, inputs or outputs changed",
+)
+@click.option(
+    "--jobs",
+    "jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of processes to run exporters in",
+)
+@click.option(
+    "--interface-jobs",
+    "interface_jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of processes to build the interface items in",
+)
+@click.option(
+    "--profile",
+    "profile_path",
+    type=click.Path(dir_okay=False, writable=True),
+    help=(
+        "Write the time, memory and output size of the project load and"
+        " each exporter to this JSON file"
+    ),
+)
+@click.option(
+    "--profile-calls",
+    "profile_calls_directory",
+    type=click.Path(file_okay=False, writable=True),
+    help="Also dump cProfile statistics for each exporter into this directory",
+)
+@click.option(
+    "--dry-run",
+    "dry_run",
+    is_flag=True,
+    help=(
+        "Only report the generated files that would change, without writing"
+        " them or running the generation scripts"
+    ),
+)
+@click.option(
+    "--diff",
+    "diff",
+    is_flag=True,
+    help="With --dry-run, also show the changes to the text files",
+)
 def build(
     project,
     target_path,
     only_if_stale,
     skip_sunspec,
     include_uuid_in_item,
+    split_interface,
+    parallel_load,
+    snapshot,
+    only_stale,
+    jobs,
+    interface_jobs,
+    profile_path,
+    profile_calls_directory,
+    dry_run,
+    diff,
 ):
     """Export PM data to embedded project directory"""
+    if diff and not dry_run:
+        raise click.UsageError("--diff is only available with --dry-run")
+
     project = pathlib.Path(project)
     target_path = pathlib.Path(target_path)
 
-    paths = epcpm.importexportdialog.paths_from_directory(target_path)
+    paths = epcpm.importexportpaths.paths_from_directory(target_path)
 
     if only_if_stale:
-        if not epcpm.importexport.is_stale(
+        if not epcpm.staleness.is_stale(
             project=project,
-            paths=paths,
+            target_directory=target_path,
             skip_sunspec=skip_sunspec,
+            include_uuid_in_item=include_uuid_in_item,
+            split_interface=split_interface,
         ):
             click.echo(
                 "Generated files appear to be up to date, skipping export",
@@ -97,19 +182,186 @@ def build(
 
         click.echo("Generated files appear to be out of date, starting export")
 
-    loaded_project = epcpm.project.loadp(project)
+    if dry_run:
+        load_and_dry_run(
+            project=project,
+            target_path=target_path,
+            paths=paths,
+            skip_sunspec=skip_sunspec,
+            include_uuid_in_item=include_uuid_in_item,
+            split_interface=split_interface,
+            snapshot=snapshot,
+            diff=diff,
+        )
+
+        return
 
-    epcpm.importexport.full_export(
+    counts = load_and_export(
+        project=project,
+        target_path=target_path,
+        paths=paths,
+        skip_sunspec=skip_sunspec,
+        include_uuid_in_item=include_uuid_in_item,
+        split_interface=split_interface,
+        parallel_load=parallel_load,
+        snapshot=snapshot,
+        only_stale=only_stale,
+        jobs=jobs,
+        interface_jobs=interface_jobs,
+        profile_path=profile_path,
+        profile_calls_directory=profile_calls_directory,
+    )
+
+    click.echo()
+    click.echo(counts.summary())
+    click.echo("done")
+
+
+def load_and_export(
+    project,
+    target_path,
+    paths,
+    skip_sunspec,
+    include_uuid_in_item,
+    parallel_load,
+    snapshot,
+    only_stale,
+    jobs,
+    interface_jobs=1,
+    split_interface=False,
+    profile_path=None,
+    profile_calls_directory=None,
+):
+    # kept out of build() so the stale check runs before these are imported
+    import epcpm.importexport
+    import epcpm.profiling
+
+    profiler = None
+    if profile_path is not None or profile_calls_directory is not None:
+        profiler = epcpm.profiling.Profiler(directory=profile_calls_directory)
+
+    try:
+        with epcpm.profiling.measuring(profiler=profiler, name="project load"):
+            # loaded lazily when incremental so models only read by skipped
+            # exporters are never loaded, and when the exporters run in
+            # worker processes that load the project themselves
+            loaded_project = epcpm.cli.utils.load_project(
+                project,
+                lazy=only_stale or jobs > 1,
+                parallel=parallel_load,
+                snapshot=snapshot,
+            )
+
+        return epcpm.importexport.full_export(
+            project=loaded_project,
+            target_directory=target_path,
+            paths=paths,
+            first_time=False,
+            skip_output=skip_sunspec,
+            include_uuid_in_item=include_uuid_in_item,
+            only_stale=only_stale,
+            jobs=jobs,
+            snapshot=snapshot,
+            profiler=profiler,
+            interface_jobs=interface_jobs,
+            split_interface=split_interface,
+        )
+    finally:
+        # also written when the export fails, to see how far it got
+        if profile_path is not None:
+            profiler.write_report(profile_path)
+            click.echo(f"Profile written to {profile_path}")
+
+
+def load_and_dry_run(
+    project,
+    target_path,
+    paths,
+    skip_sunspec,
+    include_uuid_in_item,
+    snapshot,
+    diff,
+    split_interface=False,
+):
+    import epcpm.dryrun
+    import epcpm.importexport
+
+    loaded_project = epcpm.cli.utils.load_project(project, lazy=True, snapshot=snapshot)
+
+    changed, counts = epcpm.importexport.dry_run_export(
         project=loaded_project,
-        target_directory=target_path,
         paths=paths,
-        first_time=False,
+        target_directory=target_path,
         skip_output=skip_sunspec,
         include_uuid_in_item=include_uuid_in_item,
+        split_interface=split_interface,
     )
 
+    for change in epcpm.dryrun.changes(changed=changed, target_directory=target_path):
+        click.echo(change.summary())
+
+        if diff:
+            for line in change.diff:
+                click.echo(line.rstrip("\n"))
+
     click.echo()
-    click.echo("done")
+    click.echo(f"{counts.written} files would change, {counts.skipped} unchanged")
+
+
+@export.command()
+@epcpm.cli.utils.project_option(required=True)
+@epcpm.cli.utils.target_path_option(required=True)
+@click.option("--skip-sunspec/--generate-sunspec", "skip_sunspec")
+@click.option(
+    "--include-uuid-in-item/--exclude-uuid-from-item",
+    "include_uuid_in_item",
+    default=False,
+)
+@click.option(
+    "--split-interface/--single-interface",
+    "split_interface",
+    default=False,
+    help=(
+        "Write the interface items of each top level parameter group to"
+        " their own C file"
+    ),
+)
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0),
+    default=0.5,
+    show_default=True,
+    help="Seconds between checks of the project files for changes",
+)
+def watch(
+    project,
+    target_path,
+    skip_sunspec,
+    include_uuid_in_item,
+    split_interface,
+    interval,
+):
+    """Export PM data to embedded project directory on every project change"""
+    import epcpm.watch
+
+    target_path = pathlib.Path(target_path)
+
+    click.echo("Watching for changes, press Ctrl+C to stop")
+
+    try:
+        epcpm.watch.watch(
+            project_path=pathlib.Path(project),
+            target_directory=target_path,
+            paths=epcpm.importexportpaths.paths_from_directory(target_path),
+            skip_output=skip_sunspec,
+            include_uuid_in_item=include_uuid_in_item,
+            split_interface=split_interface,
+            interval=interval,
+            echo=click.echo,
+        )
+    except KeyboardInterrupt:
+        click.echo()
+        click.echo("done")
 
 
 @export.command()
@@ -121,12 +373,14 @@ def build(
     "--product-specific-defaults",
     help="Comma separated list of defaults to be included in the output",
 )
+@epcpm.cli.utils.snapshot_option()
 def docs(
     project: str,
     target_path: str,
     pmvs_overlay_recipes_path: str,
     generate_formatted_output: bool,
     product_specific_defaults: str,
+    snapshot: bool,
 ) -> None:
     """
     Export PM documentation to embedded project directory
@@ -137,9 +391,14 @@ def docs(
         pmvs_overlay_recipes_path: path to PMVS overlay recipes directory (contains base.json)
         generate_formatted_output: generate formatted output of the documentation (takes a long time)
         product_specific_defaults: optional argument to specify which defaults are included in the output
+        snapshot: load the project through the snapshot cache
     Returns:
 
     """
+    import epyqlib.pm.valueset
+
+    import epcpm.importexport
+
     project = pathlib.Path(project)
     target_path = pathlib.Path(target_path)
 
@@ -147,9 +406,9 @@ def docs(
     pmvs_configuration = epyqlib.pm.valueset.OverlayConfiguration.load(pmvs_base)
     pmvs_output_path = pmvs_configuration.reference_output_path()
 
-    paths = epcpm.importexportdialog.paths_from_directory(target_path)
+    paths = epcpm.importexportpaths.paths_from_directory(target_path)
 
-    loaded_project = epcpm.project.loadp(project)
+    loaded_project = epcpm.cli.utils.load_project(project, lazy=True, snapshot=snapshot)
     product_specific_defaults_list = []
     if product_specific_defaults:
         product_specific_defaults_list = product_specific_defaults.split(",")
@@ -190,6 +449,10 @@ def validate():
 )
 @click.option("--smdx-glob", default="smdx_*.xml")
 def batch(reference, schema, subject, smdx_glob):
+    import lxml.etree
+
+    import epcpm.smdx
+
     failed = False
 
     reference_directory_path = pathlib.Path(reference)
@@ -270,19 +533,23 @@ def batch(reference, schema, subject, smdx_glob):
     sys.exit(failed)
 
 
-@main.group()
+@main.group(
+    cls=epcpm.cli.utils.LazyGroup,
+    lazy_subcommands={
+        "sunspec-to-staticmodbus": "epcpm.cli.sunspectostaticmodbus.cli",
+    },
+)
 def utility():
     """Utilities for administrative purposes"""
     pass
 
 
-utility.add_command(epcpm.cli.sunspectostaticmodbus.cli, name="sunspec-to-staticmodbus")
-
-
 @utility.command()
 @epcpm.cli.utils.target_path_option(required=True)
 def transition(target_path):
     """Don't use this unless you know"""
+    import epcpm.importexport
+
     target_path = pathlib.Path(target_path)
 
     click.echo("Working in: {}".format(target_path))
@@ -381,7 +648,7 @@ def transition(target_path):
         cwd=library_path,
     )
 
-    paths = epcpm.importexportdialog.paths_from_directory(target_path)
+    paths = epcpm.importexportpaths.paths_from_directory(target_path)
     print(paths)
 
     project = epcpm.importexport.full_import(
@@ -418,10 +685,15 @@ def pmvs():
 @epcpm.cli.utils.project_option(required=True)
 @click.option("--input", type=click.File())
 @click.option("--output", type=click.Path(dir_okay=False))
-def filter(project, input, output):
+@epcpm.cli.utils.snapshot_option()
+def filter(project, input, output, snapshot):
     """Export PM data to embedded project directory"""
+    import epyqlib.pm.valuesetmodel
+
+    import epcpm.parameterstosil
+
     project = pathlib.Path(project)
-    project = epcpm.project.loadp(project)
+    project = epcpm.cli.utils.load_project(project, lazy=True, snapshot=snapshot)
 
     value_set = epyqlib.pm.valuesetmodel.load(input)
     items = epcpm.parameterstosil.collect_items(project.models.parameters.root)
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import click
+
+import epcpm.cli.main
+import epcpm.server
+
+
+address_option = click.option(
+    "--address",
+    help="Socket path, or pipe name on Windows, instead of the per user default",
+)
+
+
+@click.command()
+@address_option
+@click.option("--stop", "stop", is_flag=True, help="Stop the running server")
+def serve(address, stop):
+    """Keep projects loaded and run the commands sent by epcpm client"""
+    if stop:
+        if not epcpm.server.stop(address=address):
+            raise click.ClickException("No server is running")
+
+        return
+
+    try:
+        epcpm.server.serve(address=address, echo=click.echo)
+    except epcpm.server.ServerError as e:
+        raise click.ClickException(str(e)) from e
+
+
+@click.command(
+    # everything from the first argument on is the command to run
+    context_settings={
+        "ignore_unknown_options": True,
+        "allow_interspersed_args": False,
+    },
+)
+@address_option
+@click.argument("args", nargs=-1, type=click.UNPROCESSED)
+def client(address, args):
+    """Run an epcpm command through the server started by epcpm serve
+
+    For example: epcpm client export build --project ... --target-path ...
+
+    Commands the server doesn't run, or all of them when no server is
+    running, are run here instead.
+    """
+    response = None
+    if epcpm.server.is_served(args):
+        response = epcpm.server.request(args=args, cwd=os.getcwd(), address=address)
+
+    if response is None:
+        epcpm.cli.main.main(args=list(args), prog_name="epcpm")
+
+        return
+
+    stdout, stderr, exit_code = response
+    click.echo(stdout, nl=False)
+    click.echo(stderr, nl=False, err=True)
+    sys.exit(exit_code)
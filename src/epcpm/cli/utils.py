@@ -1,6 +1,60 @@
+import importlib
+
 import click
 
 
+# set by the export server to reuse projects loaded for earlier requests,
+# see epcpm.projectcache.ProjectCache
+project_cache = None
+
+
+def load_project(path, lazy=False, parallel=False, snapshot=False):
+    """Load a project for a command, headless, or take it from the project
+    cache when running in the export server.  The cached projects are always
+    lazily loaded.
+    """
+    if project_cache is not None:
+        return project_cache.load(path)
+
+    import epcpm.project
+
+    return epcpm.project.loadp(
+        path,
+        lazy=lazy,
+        parallel=parallel,
+        snapshot=snapshot,
+        headless=True,
+    )
+
+
+class LazyGroup(click.Group):
+    """A group whose ``lazy_subcommands``, a mapping of command name to
+    ``"module.attribute"``, are imported only when they are looked up so that
+    running one command doesn't import the dependencies of all the others.
+    """
+
+    def __init__(self, *args, lazy_subcommands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if lazy_subcommands is None:
+            lazy_subcommands = {}
+
+        self.lazy_subcommands = lazy_subcommands
+
+    def list_commands(self, ctx):
+        return sorted([*super().list_commands(ctx), *self.lazy_subcommands])
+
+    def get_command(self, ctx, cmd_name):
+        reference = self.lazy_subcommands.get(cmd_name)
+
+        if reference is None:
+            return super().get_command(ctx, cmd_name)
+
+        module_name, attribute = reference.rsplit(".", 1)
+
+        return getattr(importlib.import_module(module_name), attribute)
+
+
 def project_option(required=False):
     return click.option(
         "--project",
@@ -26,3 +80,11 @@ def pmvs_overlay_recipes_path_option(required):
         required=required,
         help="Path to the pmvs overlay recipes directory",
     )
+
+
+def snapshot_option():
+    return click.option(
+        "--snapshot/--no-snapshot",
+        default=False,
+        help="Load the project from, and refresh, a snapshot cached next to it",
+    )
@@ -0,0 +1,93 @@
+"""Summaries of the changes a dry run export would make to the generated
+files, see :func:`epcpm.importexport.dry_run_export`.
+"""
+
+import difflib
+import pathlib
+
+import attr
+
+import epcpm.staleness
+
+
+@attr.s(frozen=True)
+class Change:
+    # relative to the target directory
+    name = attr.ib()
+    # the file doesn't exist yet
+    new = attr.ib()
+    # either side isn't UTF-8 text, such as a spreadsheet, so isn't diffed
+    binary = attr.ib()
+    added = attr.ib(default=0)
+    removed = attr.ib(default=0)
+    # unified diff lines
+    diff = attr.ib(default=(), repr=False)
+
+    def summary(self):
+        details = []
+        if self.new:
+            details.append("new")
+
+        if self.binary:
+            details.append("binary")
+        else:
+            details.append(f"+{self.added} -{self.removed}")
+
+        return "{}: {}".format(self.name, ", ".join(details))
+
+
+def decode(data):
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def change(path, data, target_directory):
+    """Compare the data that would be written with the file at the path."""
+    path = pathlib.Path(path)
+    name = pathlib.PurePath(
+        epcpm.staleness.relative(path=path, target_directory=target_directory),
+    ).as_posix()
+
+    try:
+        existing = path.read_bytes()
+    except FileNotFoundError:
+        existing = None
+
+    new_text = decode(data)
+    old_text = "" if existing is None else decode(existing)
+
+    if new_text is None or old_text is None:
+        return Change(name=name, new=existing is None, binary=True)
+
+    diff = tuple(
+        difflib.unified_diff(
+            old_text.splitlines(keepends=True),
+            new_text.splitlines(keepends=True),
+            fromfile=f"a/{name}",
+            tofile=f"b/{name}",
+        )
+    )
+    # past the --- and +++ file headers
+    changed_lines = diff[2:]
+
+    return Change(
+        name=name,
+        new=existing is None,
+        binary=False,
+        added=sum(1 for line in changed_lines if line.startswith("+")),
+        removed=sum(1 for line in changed_lines if line.startswith("-")),
+        diff=diff,
+    )
+
+
+def changes(changed, target_directory):
+    """The changes for the captured writes of a dry run, ordered by name."""
+    return sorted(
+        (
+            change(path=path, data=data, target_directory=target_directory)
+            for path, data in changed.items()
+        ),
+        key=lambda change: change.name,
+    )
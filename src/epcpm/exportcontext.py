@@ -0,0 +1,131 @@
+import attr
+
+import epyqlib.pm.parametermodel
+
+import epcpm.pm_helper
+import epcpm.projectindex
+
+
+@attr.s
+class ExportContext:
+    """Lookups shared by the exporters of a single export.
+
+    Several exporters need the same maps, such as parameter UUIDs to the
+    SunSpec points referencing them or a block's scale factor points.  They
+    are built the first time they are requested and then reused by the
+    following exporters.  Unlike the :class:`epcpm.projectindex.ProjectIndex`
+    it is built on, none of this is updated as the models are edited so a
+    context must not outlive the export it was made for.
+
+    It also carries the worker processes an exporter may split its own work
+    across, such as :func:`epcpm.parameterstointerface.export`.  Those load
+    the saved project so without a project path the work stays in process.
+    """
+
+    index = attr.ib(type=epcpm.projectindex.ProjectIndex)
+    jobs = attr.ib(default=1)
+    project_path = attr.ib(default=None)
+    snapshot = attr.ib(default=False)
+    _parameter_uuid_to_node = attr.ib(default=attr.Factory(dict), repr=False)
+    _scale_factors = attr.ib(default=attr.Factory(dict), repr=False)
+    _enumerations = attr.ib(default=None, repr=False)
+
+    @classmethod
+    def from_project(cls, project, jobs=1, snapshot=False):
+        project_path = None
+        # the workers' project has to match the one being exported
+        if project.filename is not None and not project.has_unsaved_changes():
+            project_path = project.filename
+
+        return cls(
+            index=project.index,
+            jobs=jobs,
+            project_path=project_path,
+            snapshot=snapshot,
+        )
+
+    @classmethod
+    def from_models(cls, **models):
+        """For exporters called directly with models rather than by a full
+        export, models passed as None are left out.
+        """
+        return cls(
+            index=epcpm.projectindex.ProjectIndex.from_models(
+                **{name: model for name, model in models.items() if model is not None}
+            ),
+        )
+
+    @property
+    def models(self):
+        return self.index.models
+
+    def parameter_uuid_to_node(self, name, types):
+        """Map parameter UUIDs to the referencing nodes of the passed types in
+        the named model.
+        """
+        key = (name, types)
+        mapping = self._parameter_uuid_to_node.get(key)
+
+        if mapping is None:
+            mapping = self.index[name].parameter_uuid_to_node(types=types)
+            self._parameter_uuid_to_node[key] = mapping
+
+        return mapping
+
+    def paths(self, name):
+        """The :class:`epcpm.projectindex.PathIndex` of the named model."""
+        return self.index[name].paths()
+
+    def using_paths(self, *names):
+        """Have the generators look up the paths of the named models' nodes
+        in their indexes within the block, see
+        :func:`epcpm.projectindex.using_paths`.
+        """
+        return epcpm.projectindex.using_paths(*(self.paths(name) for name in names))
+
+    def scale_factors(self, block, parameter_uuid_finder):
+        """The scale factor points among the children of the block, by UUID.
+
+        See :func:`epcpm.pm_helper.build_uuid_scale_factor_dict`.
+        """
+        scale_factors = self._scale_factors.get(block.uuid)
+
+        if scale_factors is None:
+            scale_factors = epcpm.pm_helper.build_uuid_scale_factor_dict(
+                points=block.children,
+                parameter_uuid_finder=parameter_uuid_finder,
+            )
+            self._scale_factors[block.uuid] = scale_factors
+
+        return scale_factors
+
+    def access_levels(self):
+        return self.models["parameters"].list_selection_roots["access level"]
+
+    def sunspec_types(self):
+        return self.models["parameters"].list_selection_roots["sunspec types"]
+
+    def enumerations(self):
+        """The enumerations and access levels of the parameter model in tree
+        order.
+        """
+        if self._enumerations is None:
+            enumerations = []
+
+            def collect(node, payload):
+                if isinstance(
+                    node,
+                    (
+                        epyqlib.pm.parametermodel.Enumeration,
+                        epyqlib.pm.parametermodel.AccessLevels,
+                    ),
+                ):
+                    enumerations.append(node)
+
+            self.models["parameters"].root.traverse(
+                call_this=collect,
+                internal_nodes=True,
+            )
+            self._enumerations = enumerations
+
+        return list(self._enumerations)
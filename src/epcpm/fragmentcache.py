@@ -0,0 +1,171 @@
+"""Generated C fragments kept between exports, keyed by a structural hash of
+the model subtree they were generated from.
+
+Building the interface items of a parameter group, and especially expanding
+the combinations of a table, takes far longer than hashing the group.  Each
+top level child of the parameter model is hashed from its encoded subtree,
+see :func:`epcpm.snapshot.encode`, together with a key covering what all of
+them depend on, such as the CAN, SunSpec and static modbus models and the
+export options.  The parameter model nodes outside the subtree that were
+looked up while building it, such as access levels and types, are recorded
+with their own hashes and checked again before the fragment is reused.
+"""
+
+import hashlib
+import os
+import pathlib
+import pickle
+
+import attr
+
+import epyqlib.attrsmodel
+
+import epcpm.snapshot
+
+
+format_version = 1
+cache_name = ".pm-interface-cache.pickle"
+
+# fixed so the hashes don't change with the Python version
+pickle_protocol = 4
+
+
+def key(*parts):
+    hasher = hashlib.sha256()
+    hasher.update(str(format_version).encode("ascii"))
+
+    for part in parts:
+        hasher.update(pickle.dumps(part, protocol=pickle_protocol))
+
+    return hasher.hexdigest()
+
+
+def node_hash(node):
+    """Hash the node's fields and its subtree, or None for no node."""
+    if node is None:
+        return None
+
+    return hashlib.sha256(
+        pickle.dumps(epcpm.snapshot.encode(node), protocol=pickle_protocol),
+    ).hexdigest()
+
+
+def within(node, subtree):
+    return node is subtree or subtree in node.ancestors()
+
+
+@attr.s
+class TrackingFinder:
+    """Wraps a ``node_from_uuid`` lookup and remembers the nodes found, and
+    the UUIDs not found, to be recorded as the dependencies of a fragment.
+    """
+
+    finder = attr.ib()
+    found = attr.ib(default=attr.Factory(dict))
+
+    def __call__(self, uuid_):
+        try:
+            node = self.finder(uuid_)
+        except epyqlib.attrsmodel.NotFoundError:
+            self.found[uuid_] = None
+            raise
+
+        self.found[uuid_] = node
+
+        return node
+
+    def dependencies(self, subtree):
+        """The hashes of the found nodes outside the subtree by UUID, None
+        for those not found.  Nodes inside are covered by the subtree's hash.
+        """
+        return {
+            uuid_: node_hash(node)
+            for uuid_, node in self.found.items()
+            if node is None or not within(node=node, subtree=subtree)
+        }
+
+
+@attr.s
+class FragmentCache:
+    """The cached fragments read from, and to be written back to, a file.
+
+    Only the fragments reused or added since reading are written back so
+    those of removed or changed subtrees don't pile up.
+    """
+
+    path = attr.ib()
+    shared_key = attr.ib()
+    hits = attr.ib(default=0)
+    misses = attr.ib(default=0)
+    _fragments = attr.ib(default=attr.Factory(dict), repr=False)
+    _kept = attr.ib(default=attr.Factory(dict), repr=False)
+
+    @classmethod
+    def read(cls, path, shared_key):
+        """Read the cached fragments, none when the file is missing,
+        unreadable or was written with a different shared key.
+        """
+        try:
+            with open(path, "rb") as f:
+                cached = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            cached = None
+
+        fragments = {}
+        if (
+            isinstance(cached, dict)
+            and cached.get("format_version") == format_version
+            and cached.get("shared_key") == shared_key
+        ):
+            fragments = cached["fragments"]
+
+        return cls(path=path, shared_key=shared_key, fragments=fragments)
+
+    def get(self, subtree_key, finder):
+        """The fragment cached for the subtree's :func:`node_hash` or None
+        when there isn't one or one of its dependencies, looked up with the
+        finder, changed.
+        """
+        fragment = self._fragments.get(subtree_key)
+
+        if fragment is not None:
+            built, dependencies = fragment
+
+            for uuid_, expected in dependencies.items():
+                try:
+                    node = finder(uuid_)
+                except epyqlib.attrsmodel.NotFoundError:
+                    node = None
+
+                if node_hash(node) != expected:
+                    fragment = None
+                    break
+
+        if fragment is None:
+            self.misses += 1
+
+            return None
+
+        self.hits += 1
+        self._kept[subtree_key] = fragment
+
+        return built
+
+    def put(self, subtree_key, built, dependencies):
+        fragment = (built, dependencies)
+        self._fragments[subtree_key] = fragment
+        self._kept[subtree_key] = fragment
+
+    def write(self):
+        cached = {
+            "format_version": format_version,
+            "shared_key": self.shared_key,
+            "fragments": self._kept,
+        }
+
+        path = pathlib.Path(self.path)
+        temporary_path = path.with_name(path.name + ".tmp")
+        temporary_path.write_bytes(
+            pickle.dumps(cached, protocol=pickle.HIGHEST_PROTOCOL),
+        )
+        os.replace(temporary_path, path)
@@ -0,0 +1,235 @@
+"""The external tools run on the exported files, such as generatestripcollect
+on the sym and hierarchy files.
+
+The tools are run concurrently.  Each is skipped when its input files and
+the outputs it wrote hash the same as after its last successful run, as
+recorded in the target directory.
+"""
+
+import asyncio
+import functools
+import os
+import pathlib
+import subprocess
+import sys
+import time
+
+import attr
+
+import epcpm.pm_helper
+import epcpm.staleness
+
+
+record_name = ".pm-generation-scripts.json"
+
+
+@attr.s(frozen=True)
+class Script:
+    name = attr.ib()
+    arguments = attr.ib(converter=tuple)
+    inputs = attr.ib(converter=tuple)
+    # callable returning the paths written, they aren't known up front
+    outputs = attr.ib()
+
+
+@attr.s(frozen=True)
+class Result:
+    name = attr.ib()
+    skipped = attr.ib()
+    seconds = attr.ib()
+
+    def summary(self):
+        if self.skipped:
+            return f"{self.name}: skipped, unchanged since the last run"
+
+        return f"{self.name}: {self.seconds:.1f} s"
+
+
+def files(*patterns, directory):
+    return sorted(
+        path
+        for pattern in patterns
+        for path in directory.glob(pattern)
+        if path.is_file()
+    )
+
+
+def scripts(base_path):
+    executables = base_path / ".venv" / "Scripts"
+    interface = base_path / "interface"
+    emb_lib = base_path / "embedded-library"
+    sunspec = emb_lib / "system" / "sunspec"
+
+    generatestripcollect = Script(
+        name="generatestripcollect",
+        arguments=[
+            os.fspath(executables / "generatestripcollect"),
+            os.fspath(interface / "EPC_DG_ID247_FACTORY.sym"),
+            "-o",
+            os.fspath(interface / "EPC_DG_ID247.sym"),
+            "--hierarchy",
+            os.fspath(interface / "EPC_DG_ID247_FACTORY.parameters.json"),
+            "--hierarchy-out",
+            os.fspath(interface / "EPC_DG_ID247.parameters.json"),
+            "--device-file",
+            os.fspath(interface / "devices.json"),
+            "--output-directory",
+            os.fspath(interface / "devices"),
+        ],
+        inputs=[
+            interface / "EPC_DG_ID247_FACTORY.sym",
+            interface / "EPC_DG_ID247_FACTORY.parameters.json",
+            interface / "devices.json",
+        ],
+        outputs=functools.partial(
+            files,
+            "EPC_DG_ID247.sym",
+            "EPC_DG_ID247.parameters.json",
+            "devices/**/*",
+            directory=interface,
+        ),
+    )
+
+    sunspecparsers = [
+        Script(
+            name=f"sunspecparser {section.value}",
+            arguments=[
+                os.fspath(executables / "sunspecparser"),
+                os.fspath(emb_lib / f"MODBUS_SunSpec{section.value}-EPC.xlsx"),
+                str(section.value),
+            ],
+            inputs=[emb_lib / f"MODBUS_SunSpec{section.value}-EPC.xlsx"],
+            outputs=functools.partial(
+                files,
+                f"smdx{section.value}_*.xml",
+                directory=sunspec,
+            ),
+        )
+        for section in epcpm.pm_helper.SunSpecSection
+    ]
+
+    return (generatestripcollect, *sunspecparsers)
+
+
+def read_record(base_path):
+    record = epcpm.staleness.read_json(pathlib.Path(base_path) / record_name)
+
+    if not isinstance(record, dict):
+        return {}
+
+    return record
+
+
+def is_current(script, recorded, inputs, base_path):
+    if recorded["arguments"] != list(script.arguments):
+        return False
+
+    return epcpm.staleness.entry_is_current(
+        entry=recorded,
+        inputs=inputs,
+        target_directory=base_path,
+    )
+
+
+async def run_script(script):
+    start = time.monotonic()
+    process = await asyncio.create_subprocess_exec(*script.arguments)
+    returncode = await process.wait()
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(
+            returncode=returncode,
+            cmd=list(script.arguments),
+        )
+
+    return time.monotonic() - start
+
+
+async def run_scripts(scripts):
+    return await asyncio.gather(
+        *(run_script(script) for script in scripts),
+        return_exceptions=True,
+    )
+
+
+def run_until_complete(coroutine):
+    if sys.platform == "win32" and sys.version_info < (3, 8):
+        # subprocesses need the proactor loop which only became the
+        # default in 3.8
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+
+    return asyncio.run(coroutine)
+
+
+def run(base_path, force=False):
+    """Run the scripts whose inputs or outputs changed since their last
+    successful run, or all of them when forced, and print how long each
+    took.
+
+    Returns:
+        list of Result, one per script
+
+    Raises:
+        the first script's failure, after the others have finished and
+        their runs have been recorded
+    """
+    base_path = pathlib.Path(base_path)
+    record = read_record(base_path)
+
+    all_scripts = scripts(base_path)
+    results = {}
+    stale = []
+    for script in all_scripts:
+        inputs = epcpm.staleness.hashes(
+            paths=script.inputs,
+            target_directory=base_path,
+        )
+        recorded = record.get(script.name)
+
+        if (
+            not force
+            and recorded is not None
+            and is_current(
+                script=script,
+                recorded=recorded,
+                inputs=inputs,
+                base_path=base_path,
+            )
+        ):
+            results[script.name] = Result(name=script.name, skipped=True, seconds=0)
+        else:
+            stale.append((script, inputs))
+
+    start = time.monotonic()
+    outcomes = run_until_complete(run_scripts([script for script, _ in stale]))
+    elapsed = time.monotonic() - start
+
+    errors = []
+    for (script, inputs), outcome in zip(stale, outcomes):
+        if isinstance(outcome, Exception):
+            errors.append(outcome)
+            record.pop(script.name, None)
+            continue
+
+        record[script.name] = {
+            "arguments": list(script.arguments),
+            **epcpm.staleness.entry(
+                inputs=inputs,
+                outputs=script.outputs(),
+                target_directory=base_path,
+            ),
+        }
+        results[script.name] = Result(name=script.name, skipped=False, seconds=outcome)
+
+    epcpm.staleness.write_json(path=base_path / record_name, data=record)
+
+    results = [results[script.name] for script in all_scripts if script.name in results]
+
+    for result in results:
+        print(result.summary())
+    print(f"generation scripts: {elapsed:.1f} s")
+
+    if len(errors) > 0:
+        raise errors[0]
+
+    return results
@@ -0,0 +1,76 @@
+import attr
+
+import epyqlib.attrsmodel
+
+
+@attr.s(eq=False)
+class Model:
+    """Stand in for :class:`epyqlib.attrsmodel.Model` when nothing will view
+    or edit the tree, such as for command line exports.
+
+    The lookup surface used by the nodes and the exporters is provided but no
+    Qt item model is built and no node signals are connected.
+    """
+
+    root = attr.ib()
+    columns = attr.ib(default=())
+    droppable_from = attr.ib(default=attr.Factory(set))
+    list_selection_roots = attr.ib(default=attr.Factory(dict))
+    uuid_to_node = attr.ib(default=attr.Factory(dict), repr=False)
+
+    @classmethod
+    def build(cls, root, columns, drop_sources=()):
+        model = cls(root=root, columns=columns)
+        model.add_drop_sources(*drop_sources)
+        model.index_nodes()
+
+        return model
+
+    def __attrs_post_init__(self):
+        self.root.model = self
+
+    def add_drop_sources(self, *sources):
+        self.droppable_from.update(sources)
+        roots = [model.root for model in {self} | self.droppable_from]
+
+        epyqlib.attrsmodel.check_uuids(*roots)
+
+    def index_nodes(self):
+        def visit(node, uuid_to_node):
+            uuid_to_node[node.uuid] = node
+
+        self.uuid_to_node.clear()
+        self.root.traverse(
+            call_this=visit,
+            payload=self.uuid_to_node,
+            internal_nodes=True,
+        )
+
+    def node_from_uuid(self, u):
+        for model in {self} | self.droppable_from:
+            node = model.uuid_to_node.get(u)
+            if node is not None:
+                return node
+
+        raise epyqlib.attrsmodel.NotFoundError("""UUID '{}' not found""".format(u))
+
+    def nodes_from_uuid_list(self, u):
+        nodes = []
+        for i in u:
+            try:
+                target_node = self.node_from_uuid(i)
+            except epyqlib.attrsmodel.NotFoundError:
+                target_node = str(i)
+
+            nodes.append(target_node)
+
+        return nodes
+
+    def update_nodes(self):
+        def visit(node, _):
+            update = getattr(node, "update", None)
+
+            if update is not None:
+                update()
+
+        self.root.traverse(call_this=visit, internal_nodes=True)
@@ -1,22 +1,24 @@
-import itertools
-import math
-import os
+import concurrent.futures
+import functools
 import pathlib
-import subprocess
 import typing
 import attr
-import graham
 
 import epcpm.cantosym
 import epcpm.cantoxlsx
-import epcpm.importexportdialog
+import epcpm.exportcontext
+import epcpm.fragmentcache
+import epcpm.generationscripts
+import epcpm.importexportpaths
 import epcpm.parameterstobitfieldsc
 import epcpm.parameterstohierarchy
 import epcpm.parameterstointerface
 import epcpm.parameterstosil
 import epcpm.pm_helper
+import epcpm.profiling
 import epcpm.project
 import epcpm.smdxtosunspec
+import epcpm.staleness
 import epcpm.staticmodbustoc
 import epcpm.staticmodbustoxls
 import epcpm.sunspecmodel
@@ -27,9 +29,14 @@ import epcpm.sunspectomanualc
 import epcpm.sunspectomanualh
 import epcpm.sunspectoxlsx
 import epcpm.symtoproject
+import epcpm.writer
 import epyqlib.attrsmodel
 
 
+class ExportError(Exception):
+    pass
+
+
 def full_import(paths):
     with open(paths.can, "rb") as sym, open(paths.hierarchy) as hierarchy:
         parameters_root, can_root, sunspec_root = epcpm.symtoproject.load_can_file(
@@ -113,26 +120,24 @@ def full_import(paths):
     return project
 
 
-def full_export(
-    project,
-    paths,
-    target_directory,
-    first_time=False,
-    skip_output=False,
-    include_uuid_in_item=False,
-):
+def export_can(project, paths, target_directory, options, context):
     epcpm.cantosym.export(
         path=paths.can,
         can_model=project.models.can,
         parameters_model=project.models.parameters,
+        export_context=context,
     )
 
+
+def export_hierarchy(project, paths, target_directory, options, context):
     epcpm.parameterstohierarchy.export(
         path=paths.hierarchy,
         can_model=project.models.can,
         parameters_model=project.models.parameters,
     )
 
+
+def export_interface(project, paths, target_directory, options, context):
     epcpm.parameterstointerface.export(
         c_path=paths.interface_c,
         h_path=paths.interface_c.with_suffix(".h"),
@@ -142,165 +147,191 @@ def full_export(
         sunspec2_model=project.models.sunspec2,
         staticmodbus_model=project.models.staticmodbus,
         parameters_model=project.models.parameters,
-        skip_output=skip_output,
-        include_uuid_in_item=include_uuid_in_item,
-    )
-
+        skip_output=options.skip_output,
+        include_uuid_in_item=options.include_uuid_in_item,
+        export_context=context,
+        jobs=context.jobs,
+        project_path=context.project_path,
+        snapshot=context.snapshot,
+        cache_path=pathlib.Path(target_directory) / epcpm.fragmentcache.cache_name,
+        split=options.split_interface,
+    )
+
+
+def sunspec_csv_column_filter():
+    return attr.evolve(
+        epcpm.pm_helper.attr_fill(epcpm.sunspectocsv.Fields, False),
+        model_id=True,
+        size=True,
+        name=True,
+        label=True,
+        type=True,
+        units=True,
+        bit_offset=True,
+        bit_length=True,
+        modbus_address=True,
+        parameter_uuid=True,
+        parameter_uses_interface_item=True,
+        scale_factor_uuid=True,
+        enumeration_uuid=True,
+        type_uuid=True,
+        access_level=True,
+        not_implemented=True,
+        uuid=True,
+        class_name=True,
+    )
+
+
+def sunspec_user_column_filter():
+    return attr.evolve(
+        epcpm.pm_helper.attr_fill(epcpm.sunspectoxlsx.Fields, True),
+        get=False,
+        set=False,
+        item=False,
+    )
+
+
+def export_sunspec1_csv(project, paths, target_directory, options, context):
     epcpm.sunspectocsv.export(
         path=paths.sunspec1_spreadsheet,
         sunspec_model=project.models.sunspec1,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_ONE,
         parameters_model=project.models.parameters,
-        skip_output=skip_output,
-        column_filter=attr.evolve(
-            epcpm.pm_helper.attr_fill(epcpm.sunspectocsv.Fields, False),
-            model_id=True,
-            size=True,
-            name=True,
-            label=True,
-            type=True,
-            units=True,
-            bit_offset=True,
-            bit_length=True,
-            modbus_address=True,
-            parameter_uuid=True,
-            parameter_uses_interface_item=True,
-            scale_factor_uuid=True,
-            enumeration_uuid=True,
-            type_uuid=True,
-            access_level=True,
-            not_implemented=True,
-            uuid=True,
-            class_name=True,
-        ),
+        skip_output=options.skip_output,
+        column_filter=sunspec_csv_column_filter(),
+        export_context=context,
     )
 
+
+def export_sunspec2_csv(project, paths, target_directory, options, context):
     epcpm.sunspectocsv.export(
         path=paths.sunspec2_spreadsheet,
         sunspec_model=project.models.sunspec2,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_TWO,
         parameters_model=project.models.parameters,
-        skip_output=skip_output,
-        column_filter=attr.evolve(
-            epcpm.pm_helper.attr_fill(epcpm.sunspectocsv.Fields, False),
-            model_id=True,
-            size=True,
-            name=True,
-            label=True,
-            type=True,
-            units=True,
-            bit_offset=True,
-            bit_length=True,
-            modbus_address=True,
-            parameter_uuid=True,
-            parameter_uses_interface_item=True,
-            scale_factor_uuid=True,
-            enumeration_uuid=True,
-            type_uuid=True,
-            access_level=True,
-            not_implemented=True,
-            uuid=True,
-            class_name=True,
-        ),
+        skip_output=options.skip_output,
+        column_filter=sunspec_csv_column_filter(),
+        export_context=context,
     )
 
+
+def export_sunspec1_xlsx(project, paths, target_directory, options, context):
     epcpm.sunspectoxlsx.export(
         path=paths.sunspec1_spreadsheet,
         sunspec_model=project.models.sunspec1,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_ONE,
         parameters_model=project.models.parameters,
-        skip_sunspec=skip_output,
+        skip_sunspec=options.skip_output,
+        export_context=context,
     )
 
+
+def export_sunspec2_xlsx(project, paths, target_directory, options, context):
     epcpm.sunspectoxlsx.export(
         path=paths.sunspec2_spreadsheet,
         sunspec_model=project.models.sunspec2,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_TWO,
         parameters_model=project.models.parameters,
-        skip_sunspec=skip_output,
+        skip_sunspec=options.skip_output,
+        export_context=context,
     )
 
+
+def export_sunspec1_user_xlsx(project, paths, target_directory, options, context):
     epcpm.sunspectoxlsx.export(
         path=paths.sunspec1_spreadsheet_user,
         sunspec_model=project.models.sunspec1,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_ONE,
         parameters_model=project.models.parameters,
-        skip_sunspec=skip_output,
-        column_filter=attr.evolve(
-            epcpm.pm_helper.attr_fill(epcpm.sunspectoxlsx.Fields, True),
-            get=False,
-            set=False,
-            item=False,
-        ),
+        skip_sunspec=options.skip_output,
+        column_filter=sunspec_user_column_filter(),
         output_dummy_models=False,
+        export_context=context,
     )
 
+
+def export_sunspec2_user_xlsx(project, paths, target_directory, options, context):
     epcpm.sunspectoxlsx.export(
         path=paths.sunspec2_spreadsheet_user,
         sunspec_model=project.models.sunspec2,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_TWO,
         parameters_model=project.models.parameters,
-        skip_sunspec=skip_output,
-        column_filter=attr.evolve(
-            epcpm.pm_helper.attr_fill(epcpm.sunspectoxlsx.Fields, True),
-            get=False,
-            set=False,
-            item=False,
-        ),
+        skip_sunspec=options.skip_output,
+        column_filter=sunspec_user_column_filter(),
+        export_context=context,
     )
 
+
+def export_staticmodbus_xls(project, paths, target_directory, options, context):
     epcpm.staticmodbustoxls.export(
         path=paths.staticmodbus_spreadsheet,
         staticmodbus_model=project.models.staticmodbus,
         parameters_model=project.models.parameters,
-        skip_output=skip_output,
+        skip_output=options.skip_output,
+        export_context=context,
     )
 
+
+def export_sunspec1_interface(project, paths, target_directory, options, context):
     epcpm.sunspectointerface.export(
         c_path=paths.sunspec1_interface_gen_c,
         h_path=paths.sunspec1_interface_gen_c.with_suffix(".h"),
         sunspec_model=project.models.sunspec1,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_ONE,
-        skip_sunspec=skip_output,
+        skip_sunspec=options.skip_output,
+        export_context=context,
     )
 
+
+def export_sunspec2_interface(project, paths, target_directory, options, context):
     epcpm.sunspectointerface.export(
         c_path=paths.sunspec2_interface_gen_c,
         h_path=paths.sunspec2_interface_gen_c.with_suffix(".h"),
         sunspec_model=project.models.sunspec2,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_TWO,
-        skip_sunspec=skip_output,
+        skip_sunspec=options.skip_output,
+        export_context=context,
     )
 
+
+def export_sunspec1_tables(project, paths, target_directory, options, context):
     epcpm.sunspectotablesc.export(
         c_path=paths.sunspec1_tables_c,
         h_path=paths.sunspec1_tables_c.with_suffix(".h"),
         sunspec_model=project.models.sunspec1,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_ONE,
-        skip_sunspec=skip_output,
+        skip_sunspec=options.skip_output,
     )
 
+
+def export_sunspec2_tables(project, paths, target_directory, options, context):
     epcpm.sunspectotablesc.export(
         c_path=paths.sunspec2_tables_c,
         h_path=paths.sunspec2_tables_c.with_suffix(".h"),
         sunspec_model=project.models.sunspec2,
         sunspec_id=epcpm.pm_helper.SunSpecSection.SUNSPEC_TWO,
-        skip_sunspec=skip_output,
+        skip_sunspec=options.skip_output,
     )
 
+
+def export_sil(project, paths, target_directory, options, context):
     epcpm.parameterstosil.export(
         c_path=paths.sil_c,
         h_path=paths.sil_c.with_suffix(".h"),
         parameters_model=project.models.parameters,
     )
 
+
+def export_staticmodbus_c(project, paths, target_directory, options, context):
     epcpm.staticmodbustoc.export(
         c_path=paths.staticmodbus_c,
         h_path=paths.staticmodbus_c.with_suffix(".h"),
         staticmodbus_model=project.models.staticmodbus,
-        skip_output=skip_output,
+        skip_output=options.skip_output,
     )
 
+
+def export_bitfields(project, paths, target_directory, options, context):
     epcpm.parameterstobitfieldsc.export(
         c_path=paths.bitfields_c,
         h_path=paths.bitfields_c.with_suffix(".h"),
@@ -308,154 +339,622 @@ def full_export(
         staticmodbus_model=project.models.staticmodbus,
         sunspec1_model=project.models.sunspec1,
         sunspec2_model=project.models.sunspec2,
-        skip_output=skip_output,
+        skip_output=options.skip_output,
+        export_context=context,
     )
 
-    if first_time and not skip_output:
-        epcpm.sunspectomanualc.export(
-            path=paths.sunspec_c,
-            sunspec_model=project.models.sunspec,
-        )
-
-        epcpm.sunspectomanualh.export(
-            path=paths.sunspec_c,
-            sunspec_model=project.models.sunspec,
-        )
 
+def export_generation_scripts(project, paths, target_directory, options, context):
     run_generation_scripts(target_directory)
 
 
-def run_generation_scripts(base_path):
-    scripts = base_path / ".venv" / "Scripts"
-    interface = base_path / "interface"
-
-    subprocess.run(
-        [
-            os.fspath(scripts / "generatestripcollect"),
-            os.fspath(interface / "EPC_DG_ID247_FACTORY.sym"),
-            "-o",
-            os.fspath(interface / "EPC_DG_ID247.sym"),
-            "--hierarchy",
-            os.fspath(interface / "EPC_DG_ID247_FACTORY.parameters.json"),
-            "--hierarchy-out",
-            os.fspath(interface / "EPC_DG_ID247.parameters.json"),
-            "--device-file",
-            os.fspath(interface / "devices.json"),
-            "--output-directory",
-            os.fspath(interface / "devices"),
-        ],
-        check=True,
-    )
-
-    emb_lib = base_path / "embedded-library"
-    subprocess.run(
-        [
-            os.fspath(scripts / "sunspecparser"),
-            os.fspath(emb_lib / "MODBUS_SunSpec1-EPC.xlsx"),
-            str(epcpm.pm_helper.SunSpecSection.SUNSPEC_ONE.value),
-        ],
-        check=True,
-    )
-
-    emb_lib = base_path / "embedded-library"
-    subprocess.run(
-        [
-            os.fspath(scripts / "sunspecparser"),
-            os.fspath(emb_lib / "MODBUS_SunSpec2-EPC.xlsx"),
-            str(epcpm.pm_helper.SunSpecSection.SUNSPEC_TWO.value),
-        ],
-        check=True,
-    )
-
-
-def modification_time_or(path, alternative):
-    try:
-        return path.stat().st_mtime
-    except FileNotFoundError:
-        return alternative
+def c_and_h(path):
+    return (path, path.with_suffix(".h"))
+
 
+def sunspec_interface_paths(c_path):
+    # the per model files are named after the model ids
+    return sorted(
+        {
+            *c_and_h(c_path),
+            *c_path.parent.glob(f"{c_path.stem}[0-9]*.[ch]"),
+        }
+    )
 
-def get_sunspec_models(path):
-    root_schema = graham.schema(epcpm.sunspecmodel.Root)
-    raw = path.read_bytes()
-    root = root_schema.loads(raw).data
 
-    return tuple(
-        child.id
-        for child in root.children
-        if isinstance(child, epcpm.sunspecmodel.Model)
+def interface_paths(c_path):
+    # the group files, when split, are those in the list written with them
+    return sorted(
+        {
+            *c_and_h(c_path),
+            epcpm.parameterstointerface.group_list_path(c_path),
+            *epcpm.parameterstointerface.listed_paths(c_path),
+        }
     )
 
 
-def is_stale(project, paths, skip_sunspec=False):
-    loaded_project = epcpm.project.loadp(project, post_load=False)
+def generation_script_base_path(paths):
+    return paths.can.parent.parent
 
-    source_paths = (
-        project,
-        *(project.parent / path for path in attr.astuple(loaded_project.paths)),
+
+def generation_script_inputs(paths):
+    return sorted(
+        {
+            path
+            for script in epcpm.generationscripts.scripts(
+                generation_script_base_path(paths)
+            )
+            for path in script.inputs
+        }
+    )
+
+
+def generation_script_outputs(paths):
+    return sorted(
+        {
+            path
+            for script in epcpm.generationscripts.scripts(
+                generation_script_base_path(paths)
+            )
+            for path in script.outputs()
+        }
     )
 
-    source_modification_time = max(path.stat().st_mtime for path in source_paths)
 
-    if skip_sunspec:
-        sunspec1_models = []
-        sunspec2_models = []
-    else:
-        sunspec1_models = get_sunspec_models(
-            project.parent / loaded_project.paths.sunspec1,
+def no_paths(paths):
+    return ()
+
+
+@attr.s(frozen=True)
+class Exporter:
+    """One step of :func:`full_export` along with the models and other files
+    it reads and the files it writes.  A step is only rerun by an incremental
+    export when any of those have changed since it last ran.
+    """
+
+    name = attr.ib()
+    export = attr.ib()
+    # names of the project models read
+    models = attr.ib()
+    # callable taking the ImportPaths and returning the paths written
+    outputs = attr.ib()
+    # callable taking the ImportPaths and returning the other paths read
+    inputs = attr.ib(default=no_paths)
+    # names of the exporters whose outputs are read, they are run first
+    requires = attr.ib(default=())
+    # False for steps that need the other outputs on disk, such as running
+    # external tools on them, so can't be part of a dry run
+    dry_run = attr.ib(default=True)
+
+
+# in the order they are run when not run in parallel
+exporters = (
+    Exporter(
+        name="can",
+        export=export_can,
+        models=("parameters", "can"),
+        outputs=lambda paths: (paths.can,),
+    ),
+    Exporter(
+        name="hierarchy",
+        export=export_hierarchy,
+        models=("parameters", "can"),
+        outputs=lambda paths: (paths.hierarchy,),
+    ),
+    Exporter(
+        name="interface",
+        export=export_interface,
+        models=("parameters", "can", "sunspec1", "sunspec2", "staticmodbus"),
+        outputs=lambda paths: (
+            *interface_paths(paths.interface_c),
+            paths.rejected_callback_c,
+        ),
+        inputs=lambda paths: (
+            *(
+                epcpm.staleness.template_path(path)
+                for path in c_and_h(paths.interface_c)
+            ),
+            epcpm.parameterstointerface.group_template_path(paths.interface_c),
+            paths.rejected_callback_c.with_suffix(".c_pm"),
+        ),
+    ),
+    Exporter(
+        name="sunspec1 csv",
+        export=export_sunspec1_csv,
+        models=("parameters", "sunspec1"),
+        outputs=lambda paths: (paths.sunspec1_spreadsheet.with_suffix(".csv"),),
+    ),
+    Exporter(
+        name="sunspec2 csv",
+        export=export_sunspec2_csv,
+        models=("parameters", "sunspec2"),
+        outputs=lambda paths: (paths.sunspec2_spreadsheet.with_suffix(".csv"),),
+    ),
+    Exporter(
+        name="sunspec1 spreadsheet",
+        export=export_sunspec1_xlsx,
+        models=("parameters", "sunspec1"),
+        outputs=lambda paths: (paths.sunspec1_spreadsheet,),
+    ),
+    Exporter(
+        name="sunspec2 spreadsheet",
+        export=export_sunspec2_xlsx,
+        models=("parameters", "sunspec2"),
+        outputs=lambda paths: (paths.sunspec2_spreadsheet,),
+    ),
+    Exporter(
+        name="sunspec1 user spreadsheet",
+        export=export_sunspec1_user_xlsx,
+        models=("parameters", "sunspec1"),
+        outputs=lambda paths: (paths.sunspec1_spreadsheet_user,),
+    ),
+    Exporter(
+        name="sunspec2 user spreadsheet",
+        export=export_sunspec2_user_xlsx,
+        models=("parameters", "sunspec2"),
+        outputs=lambda paths: (paths.sunspec2_spreadsheet_user,),
+    ),
+    Exporter(
+        name="staticmodbus spreadsheet",
+        export=export_staticmodbus_xls,
+        models=("parameters", "staticmodbus"),
+        outputs=lambda paths: (paths.staticmodbus_spreadsheet,),
+    ),
+    Exporter(
+        name="sunspec1 interface",
+        export=export_sunspec1_interface,
+        models=("parameters", "sunspec1"),
+        outputs=lambda paths: sunspec_interface_paths(paths.sunspec1_interface_gen_c),
+    ),
+    Exporter(
+        name="sunspec2 interface",
+        export=export_sunspec2_interface,
+        models=("parameters", "sunspec2"),
+        outputs=lambda paths: sunspec_interface_paths(paths.sunspec2_interface_gen_c),
+    ),
+    Exporter(
+        name="sunspec1 tables",
+        export=export_sunspec1_tables,
+        models=("parameters", "sunspec1"),
+        outputs=lambda paths: c_and_h(paths.sunspec1_tables_c),
+    ),
+    Exporter(
+        name="sunspec2 tables",
+        export=export_sunspec2_tables,
+        models=("parameters", "sunspec2"),
+        outputs=lambda paths: c_and_h(paths.sunspec2_tables_c),
+    ),
+    Exporter(
+        name="sil",
+        export=export_sil,
+        models=("parameters",),
+        outputs=lambda paths: c_and_h(paths.sil_c),
+        inputs=lambda paths: tuple(
+            epcpm.staleness.template_path(path) for path in c_and_h(paths.sil_c)
+        ),
+    ),
+    Exporter(
+        name="staticmodbus",
+        export=export_staticmodbus_c,
+        models=("parameters", "staticmodbus"),
+        outputs=lambda paths: c_and_h(paths.staticmodbus_c),
+    ),
+    Exporter(
+        name="bitfields",
+        export=export_bitfields,
+        models=("parameters", "staticmodbus", "sunspec1", "sunspec2"),
+        outputs=lambda paths: c_and_h(paths.bitfields_c),
+    ),
+    Exporter(
+        name="generation scripts",
+        export=export_generation_scripts,
+        models=(),
+        outputs=generation_script_outputs,
+        inputs=generation_script_inputs,
+        requires=(
+            "can",
+            "hierarchy",
+            "sunspec1 spreadsheet",
+            "sunspec2 spreadsheet",
+        ),
+        dry_run=False,
+    ),
+)
+
+
+def full_export(
+    project,
+    paths,
+    target_directory,
+    first_time=False,
+    skip_output=False,
+    include_uuid_in_item=False,
+    only_stale=False,
+    jobs=1,
+    snapshot=False,
+    profiler=None,
+    interface_jobs=1,
+    split_interface=False,
+):
+    """Run every exporter and the generation scripts and record the results
+    in the target directory's manifest.
+
+    Args:
+        project: the project to export
+        paths: the files to export to
+        target_directory: root of the embedded project
+        first_time: also generate the manually maintained SunSpec files
+        skip_output: skip output of the SunSpec and static modbus files
+        include_uuid_in_item: include parameter UUIDs in the interface items
+        only_stale: skip exporters whose inputs and outputs are unchanged
+            since the run recorded in the manifest
+        jobs: number of worker processes to run exporters in, each loads
+            the saved project itself
+        snapshot: have the workers load the project through its snapshot
+        profiler: epcpm.profiling.Profiler to measure each exporter run
+            with, including those run in worker processes
+        interface_jobs: number of worker processes to build the interface
+            items in, see epcpm.parameterstointerface.export()
+        split_interface: write the interface items of each top level
+            parameter group to their own C file
+
+    Returns:
+        epcpm.writer.Counts of the files written and left unchanged, not
+        including those written by the generation scripts
+
+    Raises:
+        ExportError: naming the first failed exporter in registry order,
+            after all exporters that don't depend on it have run
+    """
+    options = epcpm.staleness.ExportOptions(
+        skip_output=skip_output,
+        include_uuid_in_item=include_uuid_in_item,
+        split_interface=split_interface,
+    )
+
+    # the manifest describes the files on disk so it is neither used nor
+    # written for unsaved or edited projects
+    recording = project.filename is not None and not project.has_unsaved_changes()
+
+    previous = None
+    model_hashes = {}
+    if recording:
+        if only_stale:
+            previous = epcpm.staleness.read_manifest(target_directory)
+
+        if previous is not None and not epcpm.staleness.manifest_matches(
+            manifest=previous,
+            project=project.filename,
+            target_directory=target_directory,
+            options=options,
+        ):
+            previous = None
+
+        # hashed before exporting so the manifest describes what the
+        # outputs were generated from
+        model_hashes = {
+            name: epcpm.staleness.hashes(
+                paths=[path],
+                target_directory=target_directory,
+            )
+            for name, path in epcpm.staleness.model_paths(project.filename).items()
+        }
+
+    # removed so an interrupted export is seen as stale
+    epcpm.staleness.remove_manifest(target_directory)
+
+    with epcpm.writer.counting() as counts:
+        # these are not tracked, they are only generated once and then edited
+        if first_time and not skip_output:
+            epcpm.sunspectomanualc.export(
+                path=paths.sunspec_c,
+                sunspec_model=project.models.sunspec,
+            )
+
+            epcpm.sunspectomanualh.export(
+                path=paths.sunspec_c,
+                sunspec_model=project.models.sunspec,
+            )
+
+        if jobs > 1 and not recording:
+            # workers load the project from disk
+            jobs = 1
+
+        entries = run_exporters(
+            project=project,
+            context=epcpm.exportcontext.ExportContext.from_project(
+                project,
+                jobs=interface_jobs,
+                snapshot=snapshot,
+            ),
+            paths=paths,
+            target_directory=target_directory,
+            options=options,
+            model_hashes=model_hashes,
+            previous=previous,
+            jobs=jobs,
+            snapshot=snapshot,
+            profiler=profiler,
         )
-        sunspec2_models = get_sunspec_models(
-            project.parent / loaded_project.paths.sunspec2,
+
+    if recording:
+        epcpm.staleness.write_manifest(
+            target_directory=target_directory,
+            manifest=epcpm.staleness.build_manifest(
+                project=project.filename,
+                target_directory=target_directory,
+                options=options,
+                entries=entries,
+            ),
         )
 
-    smdx1 = tuple(
-        paths.sunspec_c / f"smdx1_{model:05}.xml" for model in sunspec1_models
-    )
-    smdx2 = tuple(
-        paths.sunspec_c / f"smdx2_{model:05}.xml" for model in sunspec2_models
-    )
+    return counts
 
-    sunspec1_c_h = tuple(
-        paths.sunspec_c / f"sunspec1InterfaceGen{model}.{extension}"
-        for model, extension in itertools.product(sunspec1_models, ("c", "h"))
-    )
-    sunspec2_c_h = tuple(
-        paths.sunspec_c / f"sunspec2InterfaceGen{model}.{extension}"
-        for model, extension in itertools.product(sunspec2_models, ("c", "h"))
-    )
 
-    sil_c_h = (paths.sil_c, paths.sil_c.with_suffix(".h"))
+def dry_run_export(
+    project,
+    paths,
+    target_directory,
+    skip_output=False,
+    include_uuid_in_item=False,
+    split_interface=False,
+):
+    """Run the exporters, serially, without writing any files or touching
+    the manifest.  Exporters that can't be dry run, such as the generation
+    scripts, are left out.
+
+    Returns:
+        dict of path to the bytes that would be written, for the files whose
+        contents would change, and epcpm.writer.Counts tallying those as
+        written
+    """
+    options = epcpm.staleness.ExportOptions(
+        skip_output=skip_output,
+        include_uuid_in_item=include_uuid_in_item,
+        split_interface=split_interface,
+    )
+
+    with epcpm.writer.capturing() as changed:
+        with epcpm.writer.counting() as counts:
+            run_exporters(
+                project=project,
+                context=epcpm.exportcontext.ExportContext.from_project(project),
+                paths=paths,
+                target_directory=target_directory,
+                options=options,
+                model_hashes={},
+                previous=None,
+                selected=[exporter for exporter in exporters if exporter.dry_run],
+            )
 
-    destination_paths = [
-        paths.can,
-        paths.hierarchy,
-        *paths.smdx,
-        paths.sunspec1_spreadsheet,
-        paths.sunspec2_spreadsheet,
-        paths.sunspec1_spreadsheet_user,
-        paths.sunspec2_spreadsheet_user,
-        *smdx1,
-        *smdx2,
-        *sunspec1_c_h,
-        *sunspec2_c_h,
-        paths.sunspec1_tables_c,
-        paths.sunspec2_tables_c,
-        *sil_c_h,
-    ]
+    return changed, counts
 
-    destination_modification_time = min(
-        modification_time_or(path=path, alternative=-math.inf)
-        for path in destination_paths
-    )
 
-    destination_newer_by = destination_modification_time - source_modification_time
+def run_exporters(
+    project,
+    context,
+    paths,
+    target_directory,
+    options,
+    model_hashes,
+    previous,
+    jobs=1,
+    snapshot=False,
+    profiler=None,
+    selected=None,
+):
+    """Run the registered exporters, or those selected, each once those it
+    requires are done.  Requirements that aren't selected are ignored.
+
+    The exporters run here share the passed context, those run in worker
+    processes share one per worker.
 
-    return destination_newer_by < 1
+    Returns:
+        dict of exporter name to manifest entry
+    """
+    if selected is None:
+        selected = exporters
+
+    entries = {}
+    errors = {}
+    pending = list(selected)
+    running = {}
+
+    executor = None
+    if jobs > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=load_worker_project,
+            initargs=(project.filename, snapshot, context.jobs),
+        )
+
+    try:
+        while len(pending) > 0 or len(running) > 0:
+            blocked = [
+                exporter
+                for exporter in pending
+                if any(name in errors for name in exporter.requires)
+            ]
+            for exporter in blocked:
+                pending.remove(exporter)
+
+            unfinished = {
+                exporter.name
+                for exporter in [*pending, *(e for e, _ in running.values())]
+            }
+            ready = [
+                exporter
+                for exporter in pending
+                if unfinished.isdisjoint(exporter.requires)
+            ]
+
+            if len(ready) == 0 and len(running) == 0 and len(pending) > 0:
+                raise ExportError(
+                    "Circular requirements between exporters: {}".format(
+                        ", ".join(repr(exporter.name) for exporter in pending)
+                    )
+                )
+
+            for exporter in ready:
+                pending.remove(exporter)
+
+                inputs = {}
+                for name in exporter.models:
+                    inputs.update(model_hashes.get(name, {}))
+                inputs.update(
+                    epcpm.staleness.hashes(
+                        paths=exporter.inputs(paths),
+                        target_directory=target_directory,
+                    )
+                )
+
+                recorded = None
+                if previous is not None:
+                    recorded = previous["exporters"].get(exporter.name)
+
+                if recorded is not None and epcpm.staleness.entry_is_current(
+                    entry=recorded,
+                    inputs=inputs,
+                    target_directory=target_directory,
+                ):
+                    entries[exporter.name] = recorded
+                    continue
+
+                if executor is None:
+                    try:
+                        with epcpm.profiling.measuring(
+                            profiler=profiler,
+                            name=exporter.name,
+                            outputs=functools.partial(exporter.outputs, paths),
+                        ):
+                            exporter.export(
+                                project=project,
+                                paths=paths,
+                                target_directory=target_directory,
+                                options=options,
+                                context=context,
+                            )
+                    except Exception as e:
+                        errors[exporter.name] = e
+                    else:
+                        entries[exporter.name] = epcpm.staleness.entry(
+                            inputs=inputs,
+                            outputs=exporter.outputs(paths),
+                            target_directory=target_directory,
+                        )
+                else:
+                    future = executor.submit(
+                        run_worker_exporter,
+                        name=exporter.name,
+                        paths=paths,
+                        target_directory=target_directory,
+                        options=options,
+                        profile=profiler is not None,
+                        profile_directory=(
+                            None if profiler is None else profiler.directory
+                        ),
+                    )
+                    running[future] = (exporter, inputs)
+
+            if len(running) == 0:
+                continue
+
+            done, _ = concurrent.futures.wait(
+                running,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                exporter, inputs = running.pop(future)
+                try:
+                    worker_counts, measurements = future.result()
+                except Exception as e:
+                    errors[exporter.name] = e
+                else:
+                    epcpm.writer.add_counts(worker_counts)
+                    if profiler is not None:
+                        profiler.measurements.extend(measurements)
+                    entries[exporter.name] = epcpm.staleness.entry(
+                        inputs=inputs,
+                        outputs=exporter.outputs(paths),
+                        target_directory=target_directory,
+                    )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    failed = [exporter.name for exporter in exporters if exporter.name in errors]
+    if len(failed) > 0:
+        message = f"Exporter {failed[0]!r} failed"
+        if len(failed) > 1:
+            message += ", as did {}".format(", ".join(repr(n) for n in failed[1:]))
+
+        raise ExportError(message) from errors[failed[0]]
+
+    return entries
+
+
+_worker_project = None
+_worker_context = None
+
+
+def load_worker_project(project_path, snapshot, interface_jobs=1):
+    global _worker_project
+    global _worker_context
+
+    # lazy so each worker only loads the models its exporters read
+    _worker_project = epcpm.project.loadp(
+        project_path,
+        lazy=True,
+        snapshot=snapshot,
+        headless=True,
+    )
+    _worker_context = epcpm.exportcontext.ExportContext.from_project(
+        _worker_project,
+        jobs=interface_jobs,
+        snapshot=snapshot,
+    )
+
+
+def run_worker_exporter(
+    name,
+    paths,
+    target_directory,
+    options,
+    profile=False,
+    profile_directory=None,
+):
+    (exporter,) = (exporter for exporter in exporters if exporter.name == name)
+
+    profiler = None
+    if profile:
+        profiler = epcpm.profiling.Profiler(directory=profile_directory)
+
+    with epcpm.writer.counting() as counts:
+        with epcpm.profiling.measuring(
+            profiler=profiler,
+            name=exporter.name,
+            outputs=functools.partial(exporter.outputs, paths),
+        ):
+            exporter.export(
+                project=_worker_project,
+                paths=paths,
+                target_directory=target_directory,
+                options=options,
+                context=_worker_context,
+            )
+
+    # reported back to be tallied in the parent process
+    measurements = [] if profiler is None else profiler.measurements
+    return counts, measurements
+
+
+def run_generation_scripts(base_path):
+    return epcpm.generationscripts.run(base_path=base_path)
 
 
 def generate_docs(
     project: epcpm.project.Project,
-    paths: epcpm.importexportdialog.ImportPaths,
+    paths: epcpm.importexportpaths.ImportPaths,
     pmvs_path: pathlib.Path,
     generate_formatted_output: bool,
     product_specific_defaults: typing.List[str],
@@ -477,6 +976,8 @@ def generate_docs(
         path=paths.spreadsheet_can,
         can_model=project.models.can,
         pmvs_path=pmvs_path,
+        parameters_model=project.models.parameters,
+        export_context=epcpm.exportcontext.ExportContext.from_project(project),
     )
 
     if generate_formatted_output:
@@ -7,25 +7,12 @@ from PyQt5 import QtWidgets
 from functools import partial
 
 import epcpm.importexportdialog_ui
+from epcpm.importexportpaths import ImportPaths, paths_from_directory
 
 
 all_files_filter = ("All Files", ["*"])
 
 
-def path_or_none(s):
-    if isinstance(s, pathlib.Path):
-        return s
-
-    if s is None or len(s) == 0:
-        return None
-
-    return pathlib.Path(s)
-
-
-def paths_or_none(x):
-    return [pathlib.Path(path) for path in x if len(x) > 0]
-
-
 def import_dialog():
     dialog = Dialog()
 
@@ -88,61 +75,6 @@ def export_dialog():
     return dialog
 
 
-@attr.s
-class ImportPaths:
-    can = attr.ib(converter=path_or_none)
-    hierarchy = attr.ib(converter=path_or_none)
-    tables_c = attr.ib(converter=path_or_none)
-    bitfields_c = attr.ib(converter=path_or_none)
-    staticmodbus_c = attr.ib(converter=path_or_none)
-    sunspec1_interface_gen_c = attr.ib(converter=path_or_none)
-    sunspec2_interface_gen_c = attr.ib(converter=path_or_none)
-    sunspec1_tables_c = attr.ib(converter=path_or_none)
-    sunspec2_tables_c = attr.ib(converter=path_or_none)
-    sunspec1_spreadsheet = attr.ib(converter=path_or_none)
-    sunspec2_spreadsheet = attr.ib(converter=path_or_none)
-    sunspec1_spreadsheet_user = attr.ib(converter=path_or_none)
-    sunspec2_spreadsheet_user = attr.ib(converter=path_or_none)
-    staticmodbus_spreadsheet = attr.ib(converter=path_or_none)
-    smdx = attr.ib(converter=paths_or_none)
-    sunspec_c = attr.ib(converter=path_or_none)
-    sil_c = attr.ib(converter=path_or_none)
-    interface_c = attr.ib(converter=path_or_none)
-    rejected_callback_c = attr.ib(converter=path_or_none)
-    # No UI handling for spreadsheet_can since it is not part of normal import/export
-    spreadsheet_can = attr.ib(converter=path_or_none)
-
-
-def paths_from_directory(directory):
-    path = pathlib.Path(directory)
-    interface = path / "interface"
-    embedded = path / "embedded-library"
-    sunspec = embedded / "system" / "sunspec"
-
-    return ImportPaths(
-        can=interface / "EPC_DG_ID247_FACTORY.sym",
-        hierarchy=interface / "EPC_DG_ID247_FACTORY.parameters.json",
-        tables_c=interface / "canInterfaceGenTables.c",
-        bitfields_c=interface / "interfaceBitfieldsGen.c",
-        staticmodbus_c=interface / "staticmodbusInterfaceGen.c",
-        sunspec1_interface_gen_c=sunspec / "sunspec1InterfaceGen.c",
-        sunspec2_interface_gen_c=sunspec / "sunspec2InterfaceGen.c",
-        sunspec1_tables_c=sunspec / "sunspec1InterfaceGenTables.c",
-        sunspec2_tables_c=sunspec / "sunspec2InterfaceGenTables.c",
-        sunspec1_spreadsheet=embedded / "MODBUS_SunSpec1-EPC.xlsx",
-        sunspec2_spreadsheet=embedded / "MODBUS_SunSpec2-EPC.xlsx",
-        sunspec1_spreadsheet_user=embedded / "EPCSunspec1.xlsx",
-        sunspec2_spreadsheet_user=embedded / "EPCSunspec2.xlsx",
-        staticmodbus_spreadsheet=embedded / "MODBUS-EPC.xlsx",
-        smdx=sorted(sunspec.glob("smdx_*.xml")),
-        sunspec_c=sunspec,
-        sil_c=path / "sil" / "libEpcControlInterfaceGen.c",
-        interface_c=interface / "interfaceGen.c",
-        rejected_callback_c=interface / "rejectedCallbackHandler.c",
-        spreadsheet_can=embedded / "EPC-CAN.xlsx",
-    )
-
-
 @attr.s
 class Dialog(QtWidgets.QDialog):
     ui = attr.ib(factory=epcpm.importexportdialog_ui.Ui_Dialog)
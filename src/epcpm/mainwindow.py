@@ -327,7 +327,7 @@ class Window:
 
         paths = dialog.paths_result
 
-        epcpm.importexport.full_export(
+        counts = epcpm.importexport.full_export(
             project=self.project,
             paths=paths,
             target_directory=dialog.directory,
@@ -338,7 +338,7 @@ class Window:
         QtWidgets.QMessageBox.information(
             self.main_window,
             "Export Complete",
-            "Export complete.",
+            f"Export complete, {counts.summary()}.",
         )
 
     def open_project(self, filename=None, project=None):
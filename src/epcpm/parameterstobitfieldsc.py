@@ -3,10 +3,12 @@ import pathlib
 import typing
 
 import epcpm.c
+import epcpm.exportcontext
 import epcpm.parameterstointerface
 import epcpm.pm_helper
 import epcpm.staticmodbusmodel
 import epcpm.sunspecmodel
+import epcpm.writer
 import epyqlib.attrsmodel
 import epyqlib.utils.general
 
@@ -22,6 +24,7 @@ def export(
     sunspec2_model: epyqlib.attrsmodel.Model,
     staticmodbus_model: epyqlib.attrsmodel.Model,
     skip_output: bool = False,
+    export_context: typing.Optional[epcpm.exportcontext.ExportContext] = None,
 ):
     """
     Generate the SunSpec and static modbus bitfield interfaces (.c/.h).
@@ -33,10 +36,20 @@ def export(
         sunspec_model: SunSpec model
         staticmodbus_model: static modbus model
         skip_output: skip output of the interface in the generated files (files are still output)
+        export_context: lookups shared with the other exporters, built from the
+            passed models if not given
 
     Returns:
 
     """
+    if export_context is None:
+        export_context = epcpm.exportcontext.ExportContext.from_models(
+            parameters=parameters_model,
+            sunspec1=sunspec1_model,
+            sunspec2=sunspec2_model,
+            staticmodbus=staticmodbus_model,
+        )
+
     sunspec1_root = sunspec1_model.root
     sunspec2_root = sunspec2_model.root
 
@@ -53,6 +66,7 @@ def export(
         staticmodbus_root=staticmodbus_root,
         staticmodbus_model=staticmodbus_model,
         skip_output=skip_output,
+        export_context=export_context,
     )
 
     builder.gen()
@@ -71,6 +85,7 @@ class Root:
     staticmodbus_root = attr.ib(type=epyqlib.attrsmodel.Root)
     staticmodbus_model = attr.ib(type=epyqlib.attrsmodel.Model)
     skip_output = attr.ib(type=bool)
+    export_context = attr.ib(type=epcpm.exportcontext.ExportContext)
 
     def gen(self) -> None:
         """
@@ -79,65 +94,42 @@ class Root:
         Returns:
 
         """
-
-        def sunspec_node_wanted(node: typing.Any) -> bool:
-            # Filter for SunSpec DataPointBitfield types
-            if getattr(node, "parameter_uuid", None) is None:
-                return False
-
-            wanted_types = (epcpm.sunspecmodel.DataPointBitfield,)
-            if not isinstance(node, wanted_types):
-                return False
-
-            return True
+        # Filter for SunSpec DataPointBitfield types
+        sunspec_wanted_types = (epcpm.sunspecmodel.DataPointBitfield,)
 
         if self.sunspec1_root is None:
             parameter_uuid_to_sunspec1_node = {}
         else:
-            sunspec_nodes_with_parameter_uuid = self.sunspec1_root.nodes_by_filter(
-                filter=sunspec_node_wanted,
+            parameter_uuid_to_sunspec1_node = (
+                self.export_context.parameter_uuid_to_node(
+                    name="sunspec1",
+                    types=sunspec_wanted_types,
+                )
             )
 
-            parameter_uuid_to_sunspec1_node = {
-                node.parameter_uuid: node for node in sunspec_nodes_with_parameter_uuid
-            }
-
         if self.sunspec2_root is None:
             parameter_uuid_to_sunspec2_node = {}
         else:
-            sunspec_nodes_with_parameter_uuid = self.sunspec2_root.nodes_by_filter(
-                filter=sunspec_node_wanted,
+            parameter_uuid_to_sunspec2_node = (
+                self.export_context.parameter_uuid_to_node(
+                    name="sunspec2",
+                    types=sunspec_wanted_types,
+                )
             )
 
-            parameter_uuid_to_sunspec2_node = {
-                node.parameter_uuid: node for node in sunspec_nodes_with_parameter_uuid
-            }
-
-        def staticmodbus_node_wanted(node: typing.Any) -> bool:
-            # Filter for static modbus FunctionDataBitfield types
-            if getattr(node, "parameter_uuid", None) is None:
-                return False
-
-            wanted_types = (epcpm.staticmodbusmodel.FunctionDataBitfield,)
-            if not isinstance(node, wanted_types):
-                return False
-
-            return True
+        # Filter for static modbus FunctionDataBitfield types
+        staticmodbus_wanted_types = (epcpm.staticmodbusmodel.FunctionDataBitfield,)
 
         if self.staticmodbus_root is None:
             parameter_uuid_to_staticmodbus_node = {}
         else:
-            staticmodbus_nodes_with_parameter_uuid = (
-                self.staticmodbus_root.nodes_by_filter(
-                    filter=staticmodbus_node_wanted,
+            parameter_uuid_to_staticmodbus_node = (
+                self.export_context.parameter_uuid_to_node(
+                    name="staticmodbus",
+                    types=staticmodbus_wanted_types,
                 )
             )
 
-            parameter_uuid_to_staticmodbus_node = {
-                node.parameter_uuid: node
-                for node in staticmodbus_nodes_with_parameter_uuid
-            }
-
         # Combine the SunSpec and static modbus nodes
         parameter_uuid_to_modbus_node = {}
         for key, value in parameter_uuid_to_sunspec1_node.items():
@@ -330,11 +322,14 @@ class Root:
         h_lines.append("#endif")
 
         # Output the .c & .h files
-        with self.c_path.open("w", newline="\n") as f:
-            f.write(epcpm.c.format_nested_lists(c_lines).strip() + "\n")
-
-        with self.h_path.open("w", newline="\n") as f:
-            f.write(epcpm.c.format_nested_lists(h_lines).strip() + "\n")
+        epcpm.writer.write_text(
+            path=self.c_path,
+            text=epcpm.c.format_nested_lists(c_lines).strip() + "\n",
+        )
+        epcpm.writer.write_text(
+            path=self.h_path,
+            text=epcpm.c.format_nested_lists(h_lines).strip() + "\n",
+        )
 
 
 @builders(epcpm.staticmodbusmodel.FunctionDataBitfield)
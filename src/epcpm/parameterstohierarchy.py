@@ -6,6 +6,7 @@ import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
 import epcpm.cantosym
+import epcpm.writer
 
 builders = epyqlib.utils.general.TypeMap()
 
@@ -19,9 +20,7 @@ def export(path, can_model, parameters_model):
         can_root=can_model.root,
     )
 
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", newline="\n") as f:
-        f.write(builder.gen(indent=4))
+    epcpm.writer.write_text(path=path, text=builder.gen(indent=4))
 
 
 @builders(epyqlib.pm.parametermodel.Root)
@@ -1,3 +1,4 @@
+import concurrent.futures
 import decimal
 import itertools
 import os
@@ -9,14 +10,22 @@ import uuid
 import attr
 import toolz
 
+import epyqlib
 import epyqlib.attrsmodel
 import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
+import epcpm.c
 import epcpm.cantosym
+import epcpm.exportcontext
+import epcpm.fragmentcache
 import epcpm.pm_helper
+import epcpm.projectindex
+import epcpm.staleness
+import epcpm.sunspectointerface
 import epcpm.sunspecmodel
 import epcpm.staticmodbusmodel
+import epcpm.writer
 
 builders = epyqlib.utils.general.TypeMap()
 
@@ -50,8 +59,13 @@ staticmodbus_types = {
 
 
 def node_path_string(node):
-    nodes = [node, *node.ancestors()][:-1]
-    names = [node.name for node in reversed(nodes)]
+    paths = epcpm.projectindex.paths_for(node)
+
+    if paths is None:
+        nodes = [node, *node.ancestors()][:-1]
+        names = [node.name for node in reversed(nodes)]
+    else:
+        names = paths.names(node)
 
     return " > ".join(names)
 
@@ -71,6 +85,10 @@ def find_model_from_point(
     Returns:
         model: parent model of the given child point
     """
+    paths = epcpm.projectindex.paths_for(point)
+    if paths is not None:
+        return paths.nearest(point, epcpm.sunspecmodel.Model)
+
     found_model = None
     for ancestor in point.ancestors():
         if isinstance(ancestor, epcpm.sunspecmodel.Model):
@@ -90,6 +108,17 @@ class InvalidAccessLevelError(Exception):
         return cls(message)
 
 
+class MissingGroupTemplateError(Exception):
+    @classmethod
+    def build(cls, path):
+        message = (
+            f"Splitting the interface items needs the group template {path},"
+            " the C template can't be used as it may define more than the items"
+        )
+
+        return cls(message)
+
+
 def export(
     c_path,
     h_path,
@@ -101,45 +130,117 @@ def export(
     staticmodbus_model,
     skip_output=False,
     include_uuid_in_item=False,
+    export_context=None,
+    jobs=1,
+    project_path=None,
+    snapshot=False,
+    cache_path=None,
+    split=False,
 ):
-    if skip_output:
-        sunspec1_root = None
-        sunspec2_root = None
-        staticmodbus_root = None
-    else:
-        sunspec1_root = sunspec1_model.root
-        sunspec2_root = sunspec2_model.root
-        staticmodbus_root = staticmodbus_model.root
+    """Generate the interface item C and header files and the rejected
+    callback handler.
+
+    When split, the items of each top level group are written to a C file of
+    their own, see :func:`group_paths`, rendered from the group template, see
+    :func:`group_template_path`, which must exist.  The header still declares
+    every item and the C file only holds the items outside the top level
+    groups.  The C files are listed in a file next to them, see
+    :func:`group_list_path`, and those listed by an earlier export but no
+    longer generated are removed.
+
+    With jobs greater than one the top level groups, parameters and tables
+    are built in that many worker processes.  Model nodes can't be sent to
+    another process so each worker loads the project from project_path,
+    which must be saved and match the passed models, the generated files
+    are the same either way.
 
-    builder = builders.wrap(
-        wrapped=parameters_model.root,
-        can_root=can_model.root,
-        sunspec1_root=sunspec1_root,
-        sunspec2_root=sunspec2_root,
-        staticmodbus_root=staticmodbus_root,
+    Args:
+        jobs: number of worker processes to build the items in
+        project_path: the saved project for the workers to load, without
+            one the items are built in this process
+        snapshot: have the workers load the project through its snapshot
+        cache_path: file to keep the items built for each top level child
+            in and reuse them from while that child is unchanged, see
+            :mod:`epcpm.fragmentcache`
+        split: write the items of each top level group to their own file
+
+    Raises:
+        MissingGroupTemplateError: if split and there is no group template
+    """
+    # checked first so nothing is written
+    if split and not group_template_path(c_path).exists():
+        raise MissingGroupTemplateError.build(path=group_template_path(c_path))
+
+    if export_context is None:
+        export_context = epcpm.exportcontext.ExportContext.from_models(
+            parameters=parameters_model,
+            can=can_model,
+            sunspec1=sunspec1_model,
+            sunspec2=sunspec2_model,
+            staticmodbus=staticmodbus_model,
+        )
+
+    builder = root_builder(
+        parameters_model=parameters_model,
+        can_model=can_model,
+        sunspec1_model=sunspec1_model,
+        sunspec2_model=sunspec2_model,
+        staticmodbus_model=staticmodbus_model,
+        skip_output=skip_output,
         include_uuid_in_item=include_uuid_in_item,
+        export_context=export_context,
     )
 
-    c_path.parent.mkdir(parents=True, exist_ok=True)
+    cache = None
+    if cache_path is not None:
+        cache = epcpm.fragmentcache.FragmentCache.read(
+            path=cache_path,
+            shared_key=builder.cache_key(),
+        )
+
+    if jobs > 1 and project_path is not None:
+        children_built = builder.gen_parallel(
+            jobs=jobs,
+            project_path=project_path,
+            snapshot=snapshot,
+            cache=cache,
+            merged=False,
+        )
+    else:
+        children_built = builder.gen(cache=cache, merged=False)
+
+    # a dry run leaves every file as it is
+    if cache is not None and not epcpm.writer.is_capturing():
+        try:
+            cache.write()
+        except OSError:
+            # the cache only saves time, the next export rebuilds it
+            pass
 
-    built_c, built_h, model1_ids, model2_ids, rejected_callback_dict = builder.gen()
+    built_c, built_h, model1_ids, model2_ids, rejected_callback_dict = merge_built(
+        built for _, built in children_built
+    )
 
     model1_ids = sorted(model1_ids)
     model2_ids = sorted(model2_ids)
 
+    groups = []
+    if split:
+        groups = [
+            (child, built)
+            for child, built in children_built
+            if isinstance(child, epyqlib.pm.parametermodel.Group)
+        ]
+        built_c = list(
+            itertools.chain.from_iterable(
+                built[0]
+                for child, built in children_built
+                if not isinstance(child, epyqlib.pm.parametermodel.Group)
+            )
+        )
+
     template_context = {
-        "sunspec1_interface_gen_headers": (
-            f"sunspec1InterfaceGen{id}.h" for id in model1_ids
-        ),
-        "sunspec2_interface_gen_headers": (
-            f"sunspec2InterfaceGen{id}.h" for id in model2_ids
-        ),
-        "sunspec1_interface_headers": (
-            f"sunspec1Interface{id:05}.h" for id in model1_ids
-        ),
-        "sunspec2_interface_headers": (
-            f"sunspec2Interface{id:05}.h" for id in model2_ids
-        ),
+        **header_context(model1_ids=model1_ids, model2_ids=model2_ids),
         "interface_items": epcpm.c.format_nested_lists(
             built_c,
         ).strip(),
@@ -158,26 +259,198 @@ def export(
         context=template_context,
     )
 
-    # Render the rejected callback handler .c file.
-    uuid_list = []
-    intf_func_list = []
-    for uuid_rejected_callback in rejected_callback_dict:
-        uuid_text = epcpm.pm_helper.convert_uuid_to_variable_name(
-            uuid_rejected_callback
+    paths = group_paths(c_path=c_path, groups=[group for group, _ in groups])
+    for path, (group, built) in zip(paths, groups):
+        group_c, group_h, *_ = built
+
+        epcpm.c.render(
+            source=group_template_path(c_path),
+            destination=path,
+            context={
+                **header_context(model1_ids=model1_ids, model2_ids=model2_ids),
+                "group_name": group.name,
+                "interface_items": epcpm.c.format_nested_lists(group_c).strip(),
+                "declarations": epcpm.c.format_nested_lists(group_h).strip(),
+            },
         )
-        uuid_list.append(uuid_text)
-        intf_func_list.append(rejected_callback_dict[uuid_rejected_callback])
 
-    rejected_callback_context = {
-        "num_rejected_callbacks": (len(rejected_callback_dict)),
-        "uuid_list": uuid_list,
-        "intf_func_list": intf_func_list,
-    }
+    update_group_list(c_path=c_path, paths=paths if split else None)
 
+    # Render the rejected callback handler .c file.
     epcpm.c.render(
         source=c_path_rejected_callback.with_suffix(f"{c_path.suffix}_pm"),
         destination=c_path_rejected_callback,
-        context=rejected_callback_context,
+        context=rejected_callback_context(rejected_callback_dict),
+    )
+
+
+def rejected_callback_context(rejected_callback_dict):
+    """The template context of the rejected callback handler.
+
+    The parameters are ordered by their UUIDs' words, see
+    :func:`uuid_initializer`, compared first to last as unsigned values, so
+    the handler can find a rejected parameter with a binary search such as
+    ``bsearch()`` rather than a scan.  ``uuid_keys`` holds the UUIDs in that
+    order, ``rejected_callback_function_indexes`` the index of each one's
+    function in ``rejected_callback_functions`` and
+    ``rejected_callback_table`` both as C arrays.  ``uuid_list`` and
+    ``intf_func_list`` are in the same order.
+    """
+    uuids = sorted(rejected_callback_dict, key=uuid_key)
+    functions = sorted(set(rejected_callback_dict.values()))
+    function_index = {function: index for index, function in enumerate(functions)}
+    function_indexes = [
+        function_index[rejected_callback_dict[uuid_]] for uuid_ in uuids
+    ]
+    uuid_keys = [uuid_initializer(uuid_) for uuid_ in uuids]
+
+    table = []
+    if len(uuids) > 0:
+        table = [
+            "static uint16_t const rejectedCallbackUuids"
+            f"[{len(uuids)}][{uuid_key_words}] = {{",
+            [f"{key}, // {uuid_}" for key, uuid_ in zip(uuid_keys, uuids)],
+            "};",
+            "",
+            "static uint16_t const rejectedCallbackFunctionIndexes"
+            f"[{len(uuids)}] = {{",
+            [
+                f"{index}, // {rejected_callback_dict[uuid_]}"
+                for index, uuid_ in zip(function_indexes, uuids)
+            ],
+            "};",
+        ]
+
+    return {
+        "num_rejected_callbacks": len(uuids),
+        "uuid_list": [
+            epcpm.pm_helper.convert_uuid_to_variable_name(uuid_) for uuid_ in uuids
+        ],
+        "intf_func_list": [rejected_callback_dict[uuid_] for uuid_ in uuids],
+        "uuid_key_words": uuid_key_words,
+        "uuid_keys": uuid_keys,
+        "rejected_callback_functions": functions,
+        "rejected_callback_function_indexes": function_indexes,
+        "rejected_callback_table": epcpm.c.format_nested_lists(table).strip(),
+        "rejected_callback_lookup_declaration": (
+            "int rejectedCallbackUuidCompare(void const * key, void const * element);"
+        ),
+    }
+
+
+def header_context(model1_ids, model2_ids):
+    return {
+        "sunspec1_interface_gen_headers": (
+            f"sunspec1InterfaceGen{id}.h" for id in model1_ids
+        ),
+        "sunspec2_interface_gen_headers": (
+            f"sunspec2InterfaceGen{id}.h" for id in model2_ids
+        ),
+        "sunspec1_interface_headers": (
+            f"sunspec1Interface{id:05}.h" for id in model1_ids
+        ),
+        "sunspec2_interface_headers": (
+            f"sunspec2Interface{id:05}.h" for id in model2_ids
+        ),
+    }
+
+
+def group_template_path(c_path):
+    return c_path.with_name(f"{c_path.stem}Group{c_path.suffix}_pm")
+
+
+def group_list_path(c_path):
+    return c_path.with_name(f"{c_path.stem}Files.txt")
+
+
+def group_paths(c_path, groups):
+    """The C file of each top level group when split, named after the group
+    so that its file only changes with the group.  Names that would collide,
+    also on case insensitive file systems, get part of the group's UUID.
+    """
+    paths = []
+    taken = set()
+
+    for group in groups:
+        name = re.sub(r"[^0-9A-Za-z]+", "_", group.name).strip("_")
+        if name == "" or name.casefold() in taken:
+            name = "_".join(part for part in (name, group.uuid.hex[:8]) if part)
+
+        taken.add(name.casefold())
+        paths.append(c_path.with_name(f"{c_path.stem}_{name}{c_path.suffix}"))
+
+    return paths
+
+
+def listed_paths(c_path):
+    """The C files named in the group list, none when there isn't one.
+    Only the names of group files next to the C file are taken so a damaged
+    list can't point elsewhere.
+    """
+    try:
+        lines = group_list_path(c_path).read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+
+    return [
+        c_path.with_name(line)
+        for line in lines
+        if line == c_path.name
+        or (
+            os.path.basename(line) == line
+            and line.startswith(f"{c_path.stem}_")
+            and line.endswith(c_path.suffix)
+        )
+    ]
+
+
+def update_group_list(c_path, paths):
+    """List the C file and the passed group files, or remove the list when
+    not split, and remove the group files listed before but not now.
+    """
+    previous = listed_paths(c_path)
+
+    if paths is None:
+        paths = []
+        epcpm.writer.remove(group_list_path(c_path))
+    else:
+        epcpm.writer.write_text(
+            path=group_list_path(c_path),
+            text="".join(f"{path.name}\n" for path in [c_path, *paths]),
+        )
+
+    for path in previous:
+        if path != c_path and path not in paths:
+            epcpm.writer.remove(path)
+
+
+def root_builder(
+    parameters_model,
+    can_model,
+    sunspec1_model,
+    sunspec2_model,
+    staticmodbus_model,
+    skip_output,
+    include_uuid_in_item,
+    export_context,
+):
+    if skip_output:
+        sunspec1_root = None
+        sunspec2_root = None
+        staticmodbus_root = None
+    else:
+        sunspec1_root = sunspec1_model.root
+        sunspec2_root = sunspec2_model.root
+        staticmodbus_root = staticmodbus_model.root
+
+    return builders.wrap(
+        wrapped=parameters_model.root,
+        can_root=can_model.root,
+        sunspec1_root=sunspec1_root,
+        sunspec2_root=sunspec2_root,
+        staticmodbus_root=staticmodbus_root,
+        include_uuid_in_item=include_uuid_in_item,
+        export_context=export_context,
     )
 
 
@@ -190,90 +463,91 @@ class Root:
     sunspec2_root = attr.ib()
     staticmodbus_root = attr.ib()
     include_uuid_in_item = attr.ib()
+    export_context = attr.ib()
 
-    def gen(self):
-        def can_node_wanted(node):
-            if getattr(node, "parameter_uuid", None) is None:
-                return False
+    def children(self):
+        return [
+            child
+            for child in self.wrapped.children
+            if isinstance(
+                child,
+                (
+                    epyqlib.pm.parametermodel.Group,
+                    epyqlib.pm.parametermodel.Parameter,
+                    epyqlib.pm.parametermodel.Table,
+                    # epcpm.parametermodel.EnumeratedParameter,
+                ),
+            )
+        ]
+
+    def lookups(self):
+        """The maps from parameter UUIDs to the nodes referencing them that
+        are passed to the builders of the children.
+        """
 
+        can_paths = self.export_context.paths("can")
+
+        def can_node_wanted(node):
             uuids = [
                 # CCP Response
                 uuid.UUID("39315d58-1ddb-48b9-960c-96e724c89da1"),
                 # CCP
                 uuid.UUID("983bdc5d-8d4e-4107-a0a0-983f0ab101ce"),
             ]
-            return not any(ancestor.uuid in uuids for ancestor in node.ancestors())
+            return not any(
+                ancestor.uuid in uuids for ancestor in can_paths.ancestors(node)
+            )
 
-        can_nodes_with_parameter_uuid = self.can_root.nodes_by_filter(
-            filter=can_node_wanted,
-        )
+        can_nodes_with_parameter_uuid = [
+            node
+            for node in self.export_context.index["can"].referencing_nodes()
+            if can_node_wanted(node)
+        ]
 
         parameter_uuid_to_can_node = {
             node.parameter_uuid: node for node in can_nodes_with_parameter_uuid
         }
 
-        def sunspec_node_wanted(node):
-            if getattr(node, "parameter_uuid", None) is None:
-                return False
-
-            wanted_types = (
-                epcpm.sunspecmodel.DataPoint,
-                epcpm.sunspecmodel.DataPointBitfieldMember,
-            )
-            if not isinstance(node, wanted_types):
-                return False
-
-            return True
+        sunspec_wanted_types = (
+            epcpm.sunspecmodel.DataPoint,
+            epcpm.sunspecmodel.DataPointBitfieldMember,
+        )
 
         if self.sunspec1_root is None:
             parameter_uuid_to_sunspec1_node = {}
         else:
-            sunspec_nodes_with_parameter_uuid = self.sunspec1_root.nodes_by_filter(
-                filter=sunspec_node_wanted,
+            parameter_uuid_to_sunspec1_node = (
+                self.export_context.parameter_uuid_to_node(
+                    name="sunspec1",
+                    types=sunspec_wanted_types,
+                )
             )
 
-            parameter_uuid_to_sunspec1_node = {
-                node.parameter_uuid: node for node in sunspec_nodes_with_parameter_uuid
-            }
-
         if self.sunspec2_root is None:
             parameter_uuid_to_sunspec2_node = {}
         else:
-            sunspec_nodes_with_parameter_uuid = self.sunspec2_root.nodes_by_filter(
-                filter=sunspec_node_wanted,
-            )
-
-            parameter_uuid_to_sunspec2_node = {
-                node.parameter_uuid: node for node in sunspec_nodes_with_parameter_uuid
-            }
-
-        def staticmodbus_node_wanted(node):
-            if getattr(node, "parameter_uuid", None) is None:
-                return False
-
-            wanted_types = (
-                epcpm.staticmodbusmodel.FunctionData,
-                epcpm.staticmodbusmodel.FunctionDataBitfieldMember,
+            parameter_uuid_to_sunspec2_node = (
+                self.export_context.parameter_uuid_to_node(
+                    name="sunspec2",
+                    types=sunspec_wanted_types,
+                )
             )
-            if not isinstance(node, wanted_types):
-                return False
 
-            return True
+        staticmodbus_wanted_types = (
+            epcpm.staticmodbusmodel.FunctionData,
+            epcpm.staticmodbusmodel.FunctionDataBitfieldMember,
+        )
 
         if self.staticmodbus_root is None:
             parameter_uuid_to_staticmodbus_node = {}
         else:
-            staticmodbus_nodes_with_parameter_uuid = (
-                self.staticmodbus_root.nodes_by_filter(
-                    filter=staticmodbus_node_wanted,
+            parameter_uuid_to_staticmodbus_node = (
+                self.export_context.parameter_uuid_to_node(
+                    name="staticmodbus",
+                    types=staticmodbus_wanted_types,
                 )
             )
 
-            parameter_uuid_to_staticmodbus_node = {
-                node.parameter_uuid: node
-                for node in staticmodbus_nodes_with_parameter_uuid
-            }
-
         lengths_equal = len(can_nodes_with_parameter_uuid) == len(
             parameter_uuid_to_can_node
         )
@@ -282,75 +556,231 @@ class Root:
             print("\n".join(set(str(u) for u in uuids if uuids.count(u) > 1)))
             raise Exception()
 
-        c = []
-        h = []
-        sunspec1_models = set()
-        sunspec2_models = set()
-        rejected_callback_dict = dict()
+        return {
+            "parameter_uuid_to_can_node": parameter_uuid_to_can_node,
+            "parameter_uuid_to_sunspec1_node": parameter_uuid_to_sunspec1_node,
+            "parameter_uuid_to_sunspec2_node": parameter_uuid_to_sunspec2_node,
+            "parameter_uuid_to_staticmodbus_node": (
+                parameter_uuid_to_staticmodbus_node
+            ),
+        }
 
-        for child in self.wrapped.children:
-            if not isinstance(
-                child,
-                (
-                    epyqlib.pm.parametermodel.Group,
-                    epyqlib.pm.parametermodel.Parameter,
-                    epyqlib.pm.parametermodel.Table,
-                    # epcpm.parametermodel.EnumeratedParameter,
-                ),
-            ):
-                continue
+    def cache_key(self):
+        """Identify what the items built for every child depend on, apart
+        from the child itself and the parameter model nodes its builders look
+        up, see :class:`epcpm.fragmentcache.FragmentCache`.
+        """
+        return epcpm.fragmentcache.key(
+            epcpm.__version__,
+            # so changes to the builders, and the helpers and model classes
+            # they use, are picked up during development
+            epcpm.staleness.code_hash(),
+            epyqlib.__version__,
+            self.include_uuid_in_item,
+            *(
+                epcpm.fragmentcache.node_hash(root)
+                for root in (
+                    self.can_root,
+                    self.sunspec1_root,
+                    self.sunspec2_root,
+                    self.staticmodbus_root,
+                )
+            ),
+        )
 
-            (
-                c_built,
-                h_built,
-                sunspec1_models_built,
-                sunspec2_models_built,
-                rejected_callback_built,
-            ) = builders.wrap(
+    def using_paths(self):
+        """Look up the node paths and SunSpec models in the export context's
+        path indexes while building.
+        """
+        names = ["parameters"]
+        if self.sunspec1_root is not None:
+            names.append("sunspec1")
+        if self.sunspec2_root is not None:
+            names.append("sunspec2")
+
+        return self.export_context.using_paths(*names)
+
+    def gen_child(self, child, lookups, track=False):
+        """Build the items of one child.
+
+        Returns:
+            the built items and, when tracking, the dependencies to cache
+            them with, see :class:`epcpm.fragmentcache.TrackingFinder`
+        """
+        finder = self.wrapped.model.node_from_uuid
+        if track:
+            finder = epcpm.fragmentcache.TrackingFinder(finder=finder)
+
+        with self.using_paths():
+            built = builders.wrap(
                 wrapped=child,
                 can_root=self.can_root,
                 sunspec1_root=self.sunspec1_root,
                 sunspec2_root=self.sunspec2_root,
                 staticmodbus_root=self.staticmodbus_root,
                 include_uuid_in_item=self.include_uuid_in_item,
-                parameter_uuid_to_can_node=parameter_uuid_to_can_node,
-                parameter_uuid_to_sunspec1_node=(parameter_uuid_to_sunspec1_node),
-                parameter_uuid_to_sunspec2_node=(parameter_uuid_to_sunspec2_node),
-                parameter_uuid_to_staticmodbus_node=(
-                    parameter_uuid_to_staticmodbus_node
-                ),
-                parameter_uuid_finder=self.wrapped.model.node_from_uuid,
+                parameter_uuid_finder=finder,
+                **lookups,
             ).gen()
 
-            c.extend(c_built)
-            h.extend(h_built)
-            sunspec1_models |= sunspec1_models_built
-            sunspec2_models |= sunspec2_models_built
-            rejected_callback_dict.update(rejected_callback_built)
+        dependencies = None
+        if track:
+            dependencies = finder.dependencies(subtree=child)
 
-        return c, h, sunspec1_models, sunspec2_models, rejected_callback_dict
+        return built, dependencies
+
+    def gen(self, cache=None, merged=True):
+        lookups = []
+
+        def build(children):
+            # not needed when everything is cached
+            if len(children) > 0 and len(lookups) == 0:
+                lookups.append(self.lookups())
+
+            return [
+                self.gen_child(
+                    child=child,
+                    lookups=lookups[0],
+                    track=cache is not None,
+                )
+                for child in children
+            ]
+
+        return self.gen_cached(build=build, cache=cache, merged=merged)
+
+    def gen_parallel(
+        self,
+        jobs,
+        project_path,
+        snapshot=False,
+        cache=None,
+        merged=True,
+    ):
+        """Like :meth:`gen` but with the children built in worker processes
+        that each load the saved project, see :func:`load_worker_root`.
+        """
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=load_worker_root,
+            initargs=(
+                project_path,
+                snapshot,
+                self.sunspec1_root is None,
+                self.include_uuid_in_item,
+            ),
+        ) as executor:
+
+            def build(children):
+                # in order so the merged results match those of gen()
+                return list(
+                    executor.map(
+                        gen_worker_child,
+                        [child.uuid for child in children],
+                        itertools.repeat(cache is not None),
+                    )
+                )
+
+            return self.gen_cached(build=build, cache=cache, merged=merged)
+
+    def gen_cached(self, build, cache, merged=True):
+        """Merge the items of the children, those not in the cache are built
+        by passing them to build and then added to it.  When not merged the
+        children are returned paired with their items instead.
+        """
+        children = self.children()
+
+        if cache is None:
+            results = [built for built, _ in build(children)]
+        else:
+            results = self.from_cache(children=children, build=build, cache=cache)
+
+        if not merged:
+            return list(zip(children, results))
+
+        return merge_built(results)
+
+    def from_cache(self, children, build, cache):
+        """The items of each child, taken from the cache or built and then
+        added to it.
+        """
+        finder = self.wrapped.model.node_from_uuid
+        keys = [epcpm.fragmentcache.node_hash(child) for child in children]
+        results = [cache.get(subtree_key=key, finder=finder) for key in keys]
+
+        missing = [index for index, built in enumerate(results) if built is None]
+        rebuilt = build([children[index] for index in missing])
+
+        for index, (built, dependencies) in zip(missing, rebuilt):
+            cache.put(subtree_key=keys[index], built=built, dependencies=dependencies)
+            results[index] = built
+
+        return results
+
+
+def merge_built(results):
+    """Combine the results of the children's builders, in order."""
+    c = []
+    h = []
+    sunspec1_models = set()
+    sunspec2_models = set()
+    rejected_callback_dict = dict()
+
+    for (
+        c_built,
+        h_built,
+        sunspec1_models_built,
+        sunspec2_models_built,
+        rejected_callback_built,
+    ) in results:
+        c.extend(c_built)
+        h.extend(h_built)
+        sunspec1_models |= sunspec1_models_built
+        sunspec2_models |= sunspec2_models_built
+        rejected_callback_dict.update(rejected_callback_built)
+
+    return c, h, sunspec1_models, sunspec2_models, rejected_callback_dict
+
+
+_worker_root = None
+_worker_lookups = None
 
-        # return itertools.chain.from_iterable(
-        #     builders.wrap(
-        #         wrapped=child,
-        #         can_root=self.can_root,
-        #         sunspec_root=self.sunspec_root,
-        #         parameter_uuid_to_can_node=parameter_uuid_to_can_node,
-        #         parameter_uuid_to_sunspec_node=(
-        #             parameter_uuid_to_sunspec_node
-        #         ),
-        #         parameter_uuid_finder=self.wrapped.model.node_from_uuid,
-        #     ).gen()
-        #     for child in parameters.children
-        #     if isinstance(
-        #         child,
-        #         (
-        #             epyqlib.pm.parametermodel.Group,
-        #             epyqlib.pm.parametermodel.Parameter,
-        #             # epcpm.parametermodel.EnumeratedParameter,
-        #         ),
-        #     )
-        # )
+
+def load_worker_root(project_path, snapshot, skip_output, include_uuid_in_item):
+    global _worker_root
+    global _worker_lookups
+
+    import epcpm.project
+
+    project = epcpm.project.loadp(
+        project_path,
+        lazy=True,
+        snapshot=snapshot,
+        headless=True,
+    )
+    _worker_root = root_builder(
+        parameters_model=project.models.parameters,
+        can_model=project.models.can,
+        sunspec1_model=project.models.sunspec1,
+        sunspec2_model=project.models.sunspec2,
+        staticmodbus_model=project.models.staticmodbus,
+        skip_output=skip_output,
+        include_uuid_in_item=include_uuid_in_item,
+        export_context=epcpm.exportcontext.ExportContext.from_project(project),
+    )
+    _worker_lookups = None
+
+
+def gen_worker_child(uuid, track=False):
+    global _worker_lookups
+
+    # built once per worker rather than for each child, and not in the
+    # initializer so a failure is reported like any other builder error
+    if _worker_lookups is None:
+        _worker_lookups = _worker_root.lookups()
+
+    child = _worker_root.wrapped.model.node_from_uuid(uuid)
+
+    return _worker_root.gen_child(child=child, lookups=_worker_lookups, track=track)
 
 
 @builders(epyqlib.pm.parametermodel.Group)
@@ -2076,12 +2506,18 @@ def create_item(
     ]
 
 
+# the words of a UUID as in uuid_initializer()
+uuid_key_words = 8
+
+
+def uuid_key(uuid_):
+    """The words of the UUID, each from a pair of its bytes low byte first."""
+    return tuple(high << 8 | low for low, high in toolz.partition_all(2, uuid_.bytes))
+
+
 def uuid_initializer(uuid_):
     return "{{{}}}".format(
-        ", ".join(
-            "0x{:02x}{:02x}".format(high, low)
-            for low, high in toolz.partition_all(2, uuid_.bytes)
-        ),
+        ", ".join("0x{:04x}".format(word) for word in uuid_key(uuid_)),
     )
 
 
@@ -42,8 +42,6 @@ def export(c_path, h_path, parameters_model):
         wrapped=parameters_model.root,
     )
 
-    c_path.parent.mkdir(parents=True, exist_ok=True)
-
     built, items = builder.gen()
 
     template_context = {
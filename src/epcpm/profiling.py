@@ -0,0 +1,131 @@
+"""Measurement of where an export spends its time and memory.
+
+A :class:`Profiler` records a :class:`Measurement` for each block run under
+:meth:`Profiler.measure`, such as loading the project or running one
+exporter, and writes them out as a JSON report.  Memory is traced with
+:mod:`tracemalloc` while measuring, which slows the measured code
+noticeably, so compare reports with each other rather than with unprofiled
+runs.
+"""
+
+import contextlib
+import cProfile
+import os
+import pathlib
+import re
+import time
+import tracemalloc
+
+import attr
+
+import epcpm.staleness
+
+
+@attr.s
+class Measurement:
+    name = attr.ib()
+    wall_seconds = attr.ib(default=None)
+    # of this process only, not including any subprocesses it ran
+    cpu_seconds = attr.ib(default=None)
+    # allocated by Python beyond what was already allocated at the start
+    peak_memory_bytes = attr.ib(default=None)
+    output_bytes = attr.ib(default=None)
+    profile_path = attr.ib(default=None)
+    failed = attr.ib(default=False)
+
+
+def file_name(name):
+    return re.sub(r"\W+", "_", name).strip("_") + ".prof"
+
+
+def output_bytes(paths):
+    """The total size of the files among the paths, missing ones count as
+    empty.
+    """
+    return sum(
+        pathlib.Path(path).stat().st_size
+        for path in paths
+        if pathlib.Path(path).is_file()
+    )
+
+
+@attr.s
+class Profiler:
+    # cProfile statistics are dumped here for each measurement if set
+    directory = attr.ib(default=None)
+    measurements = attr.ib(default=attr.Factory(list))
+
+    @contextlib.contextmanager
+    def measure(self, name, outputs=None):
+        """Measure the block and record it under the name, also when it
+        raises.
+
+        Args:
+            name: identifies the measurement in the report
+            outputs: callable returning the paths written by the block,
+                their total size is recorded once it finishes
+        """
+        measurement = Measurement(name=name)
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):
+            # only available from 3.9
+            tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+        profile = None
+        if self.directory is not None:
+            profile = cProfile.Profile()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profile is not None:
+            profile.enable()
+
+        try:
+            yield measurement
+        except BaseException:
+            measurement.failed = True
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+            measurement.wall_seconds = time.perf_counter() - wall_start
+            measurement.cpu_seconds = time.process_time() - cpu_start
+
+            _, peak = tracemalloc.get_traced_memory()
+            measurement.peak_memory_bytes = max(0, peak - baseline)
+            if not tracing:
+                tracemalloc.stop()
+
+            if profile is not None:
+                directory = pathlib.Path(self.directory)
+                directory.mkdir(parents=True, exist_ok=True)
+                path = directory / file_name(name)
+                profile.dump_stats(os.fspath(path))
+                measurement.profile_path = os.fspath(path)
+
+            if outputs is not None and not measurement.failed:
+                measurement.output_bytes = output_bytes(outputs())
+
+            self.measurements.append(measurement)
+
+    def report(self):
+        return {
+            "measurements": [
+                attr.asdict(measurement) for measurement in self.measurements
+            ],
+        }
+
+    def write_report(self, path):
+        epcpm.staleness.write_json(path=pathlib.Path(path), data=self.report())
+
+
+def measuring(profiler, name, outputs=None):
+    """Measure with the profiler unless it is None."""
+    if profiler is None:
+        return contextlib.nullcontext()
+
+    return profiler.measure(name=name, outputs=outputs)
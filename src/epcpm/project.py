@@ -1,3 +1,5 @@
+import concurrent.futures
+import os
 import pathlib
 
 import attr
@@ -8,6 +10,9 @@ import epyqlib.pm.parametermodel
 import epyqlib.utils.qt
 
 import epcpm.canmodel
+import epcpm.headlessmodel
+import epcpm.projectindex
+import epcpm.snapshot
 import epcpm.sunspecmodel
 import epcpm.staticmodbusmodel
 
@@ -27,118 +32,271 @@ def create_blank():
     return project
 
 
-def loads(s, project_path=None, post_load=True):
+def loads(
+    s,
+    project_path=None,
+    post_load=True,
+    lazy=False,
+    parallel=False,
+    snapshot=False,
+    headless=False,
+):
     project = graham.schema(Project).loads(s).data
+    project.headless = headless
 
     if project_path is not None:
         project.filename = pathlib.Path(project_path).absolute()
 
     if post_load:
-        _post_load(project)
+        if snapshot and project.filename is not None:
+            _post_load_from_snapshot(project, lazy=lazy, parallel=parallel)
+        else:
+            _post_load(project, lazy=lazy, parallel=parallel)
 
     return project
 
 
-def load(f, post_load=True):
-    project = loads(f.read(), project_path=f.name, post_load=post_load)
+def load(
+    f,
+    post_load=True,
+    lazy=False,
+    parallel=False,
+    snapshot=False,
+    headless=False,
+):
+    project = loads(
+        f.read(),
+        project_path=f.name,
+        post_load=post_load,
+        lazy=lazy,
+        parallel=parallel,
+        snapshot=snapshot,
+        headless=headless,
+    )
 
     return project
 
 
-def loadp(path, post_load=True):
+def loadp(
+    path,
+    post_load=True,
+    lazy=False,
+    parallel=False,
+    snapshot=False,
+    headless=False,
+):
     with open(path) as f:
-        return load(f, post_load=post_load)
+        return load(
+            f,
+            post_load=post_load,
+            lazy=lazy,
+            parallel=parallel,
+            snapshot=snapshot,
+            headless=headless,
+        )
+
+
+model_types = {
+    "parameters": (epyqlib.pm.parametermodel.Root, epyqlib.pm.parametermodel.columns),
+    "can": (epcpm.canmodel.Root, epcpm.canmodel.columns),
+    "sunspec1": (epcpm.sunspecmodel.Root, epcpm.sunspecmodel.columns),
+    "sunspec2": (epcpm.sunspecmodel.Root, epcpm.sunspecmodel.columns),
+    "staticmodbus": (epcpm.staticmodbusmodel.Root, epcpm.staticmodbusmodel.columns),
+}
+
+# models whose drops are accepted by each model
+droppable_from = {
+    "parameters": ("parameters",),
+    "can": ("parameters", "can"),
+    "sunspec1": ("parameters", "sunspec1"),
+    "sunspec2": ("parameters", "sunspec2"),
+    "staticmodbus": (),
+}
+
+# enumeration subtrees of the parameters model offered by each model
+list_selection_roots = {
+    "parameters": ("enumerations", "access level", "visibility", "sunspec types"),
+    "can": ("enumerations",),
+    "sunspec1": ("sunspec types", "enumerations"),
+    "sunspec2": ("sunspec types", "enumerations"),
+    "staticmodbus": ("staticmodbus types", "enumerations"),
+}
+
+
+@attr.s(frozen=True)
+class PendingModel:
+    """Placeholder held by :class:`Models` until the named model is first
+    accessed, at which point it is deserialized and wired to the others.
+    """
+
+    project = attr.ib(repr=False, eq=False)
+    name = attr.ib()
+    # resolved when the placeholder is created so later changes to the
+    # project's paths, such as by save as, don't redirect the load
+    path = attr.ib()
+    # encoded root when loading from a snapshot, or a future for the one
+    # deserialized in a worker process when loading in parallel
+    encoded = attr.ib(default=None, repr=False, eq=False)
+
+    def load(self):
+        models = self.project.models
+        encoded = self.encoded
+        if isinstance(encoded, concurrent.futures.Future):
+            encoded = encoded.result()
+
+        model = _create_model(
+            project=self.project,
+            name=self.name,
+            path=self.path,
+            encoded=encoded,
+        )
+        setattr(models, self.name, model)
+        _connect_model(models=models, name=self.name)
+        _track_model(project=self.project, name=self.name)
+
+        return model
+
+
+def _create_model(project, name, path, encoded=None):
+    root_type, columns = model_types[name]
+
+    if name in ("parameters", "can"):
+        drop_sources = ()
+    else:
+        # accessing the parameters model here will load it first if needed
+        drop_sources = (project.models.parameters,)
+
+    if not path:
+        return build_model(
+            root=root_type(),
+            columns=columns,
+            drop_sources=drop_sources,
+            headless=project.headless,
+        )
+
+    return load_model(
+        project=project,
+        path=path,
+        root_type=root_type,
+        columns=columns,
+        drop_sources=drop_sources,
+        encoded=encoded,
+        headless=project.headless,
+    )
+
+
+def _connect_model(models, name):
+    model = models[name]
+
+    for source in droppable_from[name]:
+        model.droppable_from.add(models[source])
 
+    models.update_enumeration_roots(names=(name,))
+
+
+def _track_model(project, name):
+    model = project.models[name]
+
+    if getattr(model, "model", None) is None:
+        # headless models have no item model reporting edits so they are
+        # always saved
+        tracker = None
+    else:
+        tracker = ChangeTracker.connected(model)
+
+    project.trackers[name] = tracker
+
+
+def _post_load(project, lazy=False, parallel=False, encoded_roots=None):
+    if encoded_roots is None:
+        encoded_roots = {}
 
-def _post_load(project):
     models = project.models
 
-    if models.parameters is None:
-        if project.paths.parameters is None:
-            models.parameters = epyqlib.attrsmodel.Model(
-                root=epyqlib.pm.parametermodel.Root(),
-                columns=epyqlib.pm.parametermodel.columns,
-            )
-        else:
-            models.parameters = load_model(
+    paths = {}
+    for name in models:
+        if models[name] is None:
+            path = project.paths[name]
+            if path:
+                path = resolve_path(project=project, path=path)
+
+            paths[name] = path
+
+    read = [name for name, path in paths.items() if path and name not in encoded_roots]
+
+    # with one file or one processor the workers would only add overhead
+    workers = min(len(read), os.cpu_count() or 1)
+
+    executor = None
+    if parallel and workers > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        encoded_roots = {
+            **encoded_roots,
+            **{
+                name: executor.submit(deserialize_model_file, name, paths[name])
+                for name in read
+            },
+        }
+
+    already_loaded = []
+    for name in models:
+        if name in paths:
+            models[name] = PendingModel(
                 project=project,
-                path=project.paths.parameters,
-                root_type=epyqlib.pm.parametermodel.Root,
-                columns=epyqlib.pm.parametermodel.columns,
-            )
-
-    if models.can is None:
-        if project.paths.can is None:
-            models.can = epyqlib.attrsmodel.Model(
-                root=epcpm.canmodel.Root(),
-                columns=epcpm.canmodel.columns,
+                name=name,
+                path=paths[name],
+                encoded=encoded_roots.get(name),
             )
         else:
-            models.can = load_model(
-                project=project,
-                path=project.paths.can,
-                root_type=epcpm.canmodel.Root,
-                columns=epcpm.canmodel.columns,
-            )
+            already_loaded.append(name)
 
-    if models.sunspec1 is None:
-        if project.paths.sunspec1 is None:
-            models.sunspec1 = epyqlib.attrsmodel.Model(
-                root=epcpm.sunspecmodel.Root(),
-                columns=epcpm.sunspecmodel.columns,
-            )
-        else:
-            models.sunspec1 = load_model(
-                project=project,
-                path=project.paths.sunspec1,
-                root_type=epcpm.sunspecmodel.Root,
-                columns=epcpm.sunspecmodel.columns,
-                drop_sources=(models.parameters,),
-            )
+    if executor is not None:
+        # outstanding reads still complete, pending models wait on them
+        executor.shutdown(wait=False)
 
-    if models.sunspec2 is None:
-        if project.paths.sunspec2 is None:
-            models.sunspec2 = epyqlib.attrsmodel.Model(
-                root=epcpm.sunspecmodel.Root(),
-                columns=epcpm.sunspecmodel.columns,
-            )
-        else:
-            models.sunspec2 = load_model(
-                project=project,
-                path=project.paths.sunspec2,
-                root_type=epcpm.sunspecmodel.Root,
-                columns=epcpm.sunspecmodel.columns,
-                drop_sources=(models.parameters,),
-            )
+    for name in already_loaded:
+        _connect_model(models=models, name=name)
+        _track_model(project=project, name=name)
 
-    if models.staticmodbus is None:
-        if project.paths.staticmodbus is None or len(project.paths.staticmodbus) == 0:
-            models.staticmodbus = epyqlib.attrsmodel.Model(
-                root=epcpm.staticmodbusmodel.Root(),
-                columns=epcpm.staticmodbusmodel.columns,
-                drop_sources=(models.parameters,),
-            )
-        else:
-            models.staticmodbus = load_model(
-                project=project,
-                path=project.paths.staticmodbus,
-                root_type=epcpm.staticmodbusmodel.Root,
-                columns=epcpm.staticmodbusmodel.columns,
-                drop_sources=(models.parameters,),
-            )
+    if not lazy:
+        # resolve everything that is still pending
+        for name in models:
+            models[name]
+
+
+def reload_models(project, names):
+    """Read the named models from their files again, such as after they were
+    changed by another program.  Those that weren't loaded yet are left to
+    be read when first accessed.  The other loaded models are reconnected to
+    the reloaded ones.
+    """
+    models = project.models
+    previous = {name: models[name] for name in names if models.loaded(name)}
 
-    models.parameters.droppable_from.add(models.parameters)
+    for name in names:
+        path = project.paths[name]
+        if path:
+            path = resolve_path(project=project, path=path)
 
-    models.can.droppable_from.add(models.parameters)
-    models.can.droppable_from.add(models.can)
+        # fresh placeholders, any snapshot or parallel read is out of date
+        models[name] = PendingModel(project=project, name=name, path=path)
 
-    models.sunspec1.droppable_from.add(models.parameters)
-    models.sunspec1.droppable_from.add(models.sunspec1)
+    for name in previous:
+        models[name]
 
-    models.sunspec2.droppable_from.add(models.parameters)
-    models.sunspec2.droppable_from.add(models.sunspec2)
+    for name in models:
+        if name in names or not models.loaded(name):
+            continue
 
-    models.update_enumeration_roots()
+        # the enumeration roots all come from the parameters model
+        if "parameters" not in previous and previous.keys().isdisjoint(
+            droppable_from[name]
+        ):
+            continue
+
+        model = models[name]
+        model.droppable_from.difference_update(previous.values())
+        _connect_model(models=models, name=name)
 
 
 @graham.schemify(tag="models")
@@ -182,11 +340,19 @@ class Models:
     def values(self):
         return attr.asdict(self, recurse=False).values()
 
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+
+        if isinstance(value, PendingModel):
+            value = value.load()
+
+        return value
+
     def __getitem__(self, item):
         if isinstance(item, str):
-            return attr.asdict(self, recurse=False)[item]
+            return getattr(self, item)
 
-        return attr.astuple(self, recurse=False)[item]
+        return getattr(self, attr.fields(type(self))[item].name)
 
     def __setitem__(self, item, value):
         if isinstance(item, str):
@@ -195,7 +361,16 @@ class Models:
 
         setattr(self, attr.fields(type(self))[item].name, value)
 
-    def update_enumeration_roots(self):
+    def loaded(self, name):
+        """Whether the named entry has been resolved, without resolving it."""
+        return not isinstance(object.__getattribute__(self, name), PendingModel)
+
+    def update_enumeration_roots(self, names=None):
+        if names is None:
+            names = tuple(self)
+
+        roots = {}
+
         enumerations_root = [
             child
             for child in self.parameters.root.children
@@ -205,7 +380,7 @@ class Models:
             enumerations_root = None
         else:
             (enumerations_root,) = enumerations_root
-        self.parameters.list_selection_roots["enumerations"] = enumerations_root
+        roots["enumerations"] = enumerations_root
 
         if enumerations_root is None:
             access_level_root = None
@@ -215,7 +390,7 @@ class Models:
                 for child in enumerations_root.children
                 if child.name == "AccessLevel"
             )
-        self.parameters.list_selection_roots["access level"] = access_level_root
+        roots["access level"] = access_level_root
 
         if enumerations_root is None:
             visibility_root = None
@@ -225,7 +400,7 @@ class Models:
                 for child in enumerations_root.children
                 if child.name == "CmmControlsVariant"
             )
-        self.parameters.list_selection_roots["visibility"] = visibility_root
+        roots["visibility"] = visibility_root
 
         if enumerations_root is None:
             sunspec_types_root = None
@@ -251,23 +426,90 @@ class Models:
             else:
                 staticmodbus_types_root = None
 
-        self.parameters.list_selection_roots["sunspec types"] = sunspec_types_root
-        self.sunspec1.list_selection_roots["sunspec types"] = sunspec_types_root
-        self.sunspec1.list_selection_roots["enumerations"] = enumerations_root
-        self.sunspec2.list_selection_roots["sunspec types"] = sunspec_types_root
-        self.sunspec2.list_selection_roots["enumerations"] = enumerations_root
+        roots["sunspec types"] = sunspec_types_root
+        roots["staticmodbus types"] = staticmodbus_types_root
+
+        for name in names:
+            model = self[name]
+            for key in list_selection_roots[name]:
+                model.list_selection_roots[key] = roots[key]
+
+        for name in names:
+            self[name].update_nodes()
+
+
+@attr.s
+class ChangeTracker:
+    """Marks a model dirty when any of its serialized data changes.
 
-        self.staticmodbus.list_selection_roots[
-            "staticmodbus types"
-        ] = staticmodbus_types_root
-        self.staticmodbus.list_selection_roots["enumerations"] = enumerations_root
+    Edits to fields shown in the model's columns and structural changes are
+    both reported by the Qt item model.  The few serialized fields that aren't
+    in any column are watched on the nodes themselves.
+    """
 
-        self.can.list_selection_roots["enumerations"] = enumerations_root
-        self.parameters.update_nodes()
-        self.can.update_nodes()
-        self.sunspec1.update_nodes()
-        self.sunspec2.update_nodes()
-        self.staticmodbus.update_nodes()
+    model = attr.ib()
+    dirty = attr.ib(default=False)
+    _uncolumned_fields = attr.ib(default=attr.Factory(dict), repr=False)
+
+    @classmethod
+    def connected(cls, model):
+        tracker = cls(model=model)
+        tracker.connect()
+
+        return tracker
+
+    def connect(self):
+        item_model = self.model.model
+
+        for signal in (
+            item_model.dataChanged,
+            item_model.rowsInserted,
+            item_model.rowsRemoved,
+            item_model.rowsMoved,
+            item_model.modelReset,
+        ):
+            signal.connect(self.changed)
+
+        item_model.rowsInserted.connect(self.rows_inserted)
+
+        self.connect_nodes(self.model.root)
+
+    def changed(self, *args):
+        self.dirty = True
+
+    def rows_inserted(self, parent, first, last):
+        parent_node = self.model.node_from_index(parent)
+
+        for child in parent_node.children[first : last + 1]:
+            self.connect_nodes(child)
+
+    def connect_nodes(self, node):
+        def visit(node, payload):
+            names = self.uncolumned_fields(type(node))
+            if len(names) == 0:
+                return
+
+            signals = epyqlib.utils.qt.pyqtify_signals(node)
+            for name in names:
+                signals[name].connect(self.changed)
+
+        node.traverse(call_this=visit, internal_nodes=True)
+
+    def uncolumned_fields(self, cls):
+        names = self._uncolumned_fields.get(cls)
+
+        if names is None:
+            columned = {column.fields.get(cls) for column in self.model.columns}
+            names = tuple(
+                field.name
+                for field in attr.fields(cls)
+                if field.metadata.get(graham.core.metadata_key) is not None
+                and field.name not in columned
+                and field.name not in ("children", "uuid")
+            )
+            self._uncolumned_fields[cls] = names
+
+        return names
 
 
 @graham.schemify(tag="project")
@@ -280,10 +522,29 @@ class Project:
         ),
     )
     filename = attr.ib(default=None)
+    # build models without Qt item models, for batch use
+    headless = attr.ib(default=False, repr=False)
     models = attr.ib(default=attr.Factory(Models))
+    trackers = attr.ib(default=attr.Factory(Models), repr=False)
+    index = attr.ib(
+        default=attr.Factory(
+            lambda self: epcpm.projectindex.ProjectIndex(models=self.models),
+            takes_self=True,
+        ),
+        repr=False,
+        eq=False,
+    )
     filters = attr.ib(default=(("Parameter Project", ["pmp"]), ("All Files", ["*"])))
     data_filters = attr.ib(default=(("Dataset", ["json"]), ("All Files", ["*"])))
 
+    def has_unsaved_changes(self):
+        """Whether any loaded model was edited since it was loaded or saved.
+        Models without a change tracker are treated as unedited.
+        """
+        return any(
+            tracker is not None and tracker.dirty for tracker in self.trackers.values()
+        )
+
     def save(self, parent=None):
         if self.filename is None:
             project_path = epyqlib.utils.qt.file_dialog(
@@ -300,6 +561,7 @@ class Project:
 
         project_directory = self.filename.parents[0]
 
+        previous_paths = self.paths
         paths = Models()
 
         for name, path in self.paths.items():
@@ -320,57 +582,205 @@ class Project:
 
         self.paths = paths
 
-        with open(self.filename, "w", newline="\n") as f:
-            s = graham.dumps(self, indent=4).data
-            f.write(s)
+        write_if_changed(self.filename, graham.dumps(self, indent=4).data)
+
+        for name, path in paths.items():
+            moved = (
+                path != previous_paths[name] or not (project_directory / path).exists()
+            )
+
+            if not moved:
+                if not self.models.loaded(name):
+                    # never loaded so the file is still what it was
+                    continue
+
+                tracker = self.trackers[name]
+                if tracker is not None and not tracker.dirty:
+                    continue
+
+            model = self.models[name]
+            write_if_changed(
+                project_directory / path,
+                graham.dumps(model.root, indent=4).data,
+            )
+
+            tracker = self.trackers[name]
+            if tracker is not None:
+                tracker.dirty = False
+
+
+def write_if_changed(path, s):
+    """Write the text to the path through a temporary file and a rename
+    unless the file already holds exactly that text.
+    """
+    if not s.endswith("\n"):
+        s += "\n"
+
+    encoded = s.encode("utf-8")
+
+    path = pathlib.Path(path)
+    try:
+        if path.read_bytes() == encoded:
+            return False
+    except FileNotFoundError:
+        pass
 
-            if not s.endswith("\n"):
-                f.write("\n")
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_bytes(encoded)
+    os.replace(temporary_path, path)
 
-        for path, model in zip(paths.values(), self.models.values()):
-            s = graham.dumps(model.root, indent=4).data
+    return True
 
-            with open(project_directory / path, "w", newline="\n") as f:
-                f.write(s)
 
-                if not s.endswith("\n"):
-                    f.write("\n")
+def _post_load_from_snapshot(project, lazy=False, parallel=False):
+    snapshot_path = epcpm.snapshot.path_for(project.filename)
+    key = epcpm.snapshot.key(project_path=project.filename, paths=project.paths)
 
+    encoded_roots = epcpm.snapshot.read(path=snapshot_path, expected_key=key)
+    if encoded_roots is not None:
+        _post_load(project, lazy=lazy, encoded_roots=encoded_roots)
+        return
 
-def load_model(project, path, root_type, columns, drop_sources=()):
-    resolved_path = path
-    if project.filename is not None:
-        resolved_path = project.filename.parents[0] / resolved_path
+    # everything has to be loaded to write a fresh snapshot
+    _post_load(project, parallel=parallel)
 
-    with open(resolved_path) as f:
-        raw = f.read()
+    roots = {
+        name: project.models[name].root for name, path in project.paths.items() if path
+    }
 
+    try:
+        epcpm.snapshot.write(path=snapshot_path, key=key, roots=roots)
+    except (epcpm.snapshot.SnapshotError, OSError):
+        # the snapshot is only a cache, the next load will retry
+        pass
+
+
+def resolve_path(project, path):
+    if project.filename is None:
+        return path
+
+    return project.filename.parents[0] / path
+
+
+def deserialize_model_file(name, path):
+    """Deserialize a model file, the slow part of loading a model, for a
+    parallel load.  The tree can't be sent back from the worker process so
+    it is encoded, see :func:`epcpm.snapshot.encode`, leaving only the nodes
+    to be rebuilt.
+    """
+    root_type, _ = model_types[name]
+
+    with open(path) as f:
+        root = graham.schema(root_type).loads(f.read()).data
+
+    return epcpm.snapshot.encode(root)
+
+
+def load_model(
+    project,
+    path,
+    root_type,
+    columns,
+    drop_sources=(),
+    encoded=None,
+    headless=False,
+):
     root_schema = graham.schema(root_type)
-    root = root_schema.loads(raw).data
 
-    def collect(node, payload):
-        payload[node.uuid] = node
+    root = None
+    if encoded is not None:
+        try:
+            root = epcpm.snapshot.decode(encoded, root_type=root_type)
+        except (TypeError, AttributeError, ImportError):
+            # the node classes changed since the snapshot was written
+            root = None
 
-    uuid_to_node = {}
-    root.traverse(call_this=collect, payload=uuid_to_node, internal_nodes=True)
+    if root is None:
+        with open(resolve_path(project=project, path=path)) as f:
+            raw = f.read()
 
-    def update(node, payload):
-        for field in attr.fields(type(node)):
-            if field.metadata.get(graham.core.metadata_key) is None or not isinstance(
-                field.metadata.get(graham.core.metadata_key).field,
-                epyqlib.attrsmodel.Reference,
-            ):
-                continue
+        root = root_schema.loads(raw).data
 
-            value = getattr(node, field.name)
-            original = payload.get(value)
-            if original is not None:
-                setattr(node, field.name, original)
+    resolve_references(root)
+
+    return build_model(
+        root=root,
+        columns=columns,
+        drop_sources=drop_sources,
+        headless=headless,
+    )
 
-    root.traverse(call_this=update, payload=uuid_to_node, internal_nodes=True)
+
+def build_model(root, columns, drop_sources=(), headless=False):
+    if headless:
+        return epcpm.headlessmodel.Model.build(
+            root=root,
+            columns=columns,
+            drop_sources=drop_sources,
+        )
 
     return epyqlib.attrsmodel.Model(
         root=root,
         columns=columns,
         drop_sources=drop_sources,
     )
+
+
+_reference_fields = {}
+
+
+def reference_fields(cls):
+    """Names of the fields of the passed node type that hold
+    :class:`epyqlib.attrsmodel.Reference` values.  Computed once per type.
+    """
+    names = _reference_fields.get(cls)
+
+    if names is None:
+        names = []
+        for field in attr.fields(cls):
+            metadata = field.metadata.get(graham.core.metadata_key)
+            if metadata is not None and isinstance(
+                metadata.field,
+                epyqlib.attrsmodel.Reference,
+            ):
+                names.append(field.name)
+
+        names = tuple(names)
+        _reference_fields[cls] = names
+
+    return names
+
+
+def resolve_references(root):
+    """Replace the UUIDs stored in reference fields with the nodes they
+    identify.  References to nodes not yet visited are patched after the
+    single traversal completes.
+
+    Returns:
+        dict of UUID to node for the whole tree
+    """
+    uuid_to_node = {}
+    unresolved = []
+
+    def visit(node, payload):
+        payload[node.uuid] = node
+
+        for name in reference_fields(type(node)):
+            value = getattr(node, name)
+            if value is None:
+                continue
+
+            original = payload.get(value)
+            if original is None:
+                unresolved.append((node, name, value))
+            else:
+                setattr(node, name, original)
+
+    root.traverse(call_this=visit, payload=uuid_to_node, internal_nodes=True)
+
+    for node, name, value in unresolved:
+        original = uuid_to_node.get(value)
+        if original is not None:
+            setattr(node, name, original)
+
+    return uuid_to_node
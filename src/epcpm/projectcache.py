@@ -0,0 +1,45 @@
+import pathlib
+
+import attr
+
+import epcpm.project
+import epcpm.watch
+
+
+@attr.s
+class ProjectCache:
+    """Projects kept loaded between the requests to the export server, by
+    path.
+
+    Before a cached project is returned its files are checked, see
+    :class:`epcpm.watch.Watcher`.  Changed models are read again and a
+    changed project file has the whole project loaded again.
+    """
+
+    _entries = attr.ib(default=attr.Factory(dict), repr=False)
+
+    def load(self, path):
+        path = pathlib.Path(path).resolve()
+        entry = self._entries.pop(path, None)
+
+        if entry is None:
+            watcher = epcpm.watch.Watcher(project_path=path)
+            # before loading so a change made while loading is seen later
+            watcher.poll()
+            project = epcpm.watch.load(path)
+        else:
+            watcher, project = entry
+            changed = watcher.poll()
+
+            if epcpm.watch.project_file in changed:
+                project = epcpm.watch.load(path)
+            elif len(changed) > 0:
+                epcpm.project.reload_models(project=project, names=sorted(changed))
+
+        # only put back once loaded so a failed load is retried from scratch
+        self._entries[path] = (watcher, project)
+
+        return project
+
+    def __len__(self):
+        return len(self._entries)
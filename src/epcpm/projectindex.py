@@ -0,0 +1,267 @@
+import contextlib
+
+import attr
+
+
+@attr.s
+class PathIndex:
+    """The ancestors and name path of every node in a tree, collected in a
+    single traversal so the generators don't walk up the tree for each node
+    they describe.
+
+    The index is not updated as the tree is edited, see
+    :meth:`ModelIndex.paths` for one that is replaced instead.
+    """
+
+    root = attr.ib()
+    _ancestors = attr.ib(default=attr.Factory(dict), repr=False)
+    _names = attr.ib(default=attr.Factory(dict), repr=False)
+    _nearest = attr.ib(default=attr.Factory(dict), repr=False)
+
+    @classmethod
+    def build(cls, root):
+        index = cls(root=root)
+        index._ancestors[root] = ()
+        index._names[root] = ()
+
+        # parents are always recorded before their children, nearest() and
+        # the name paths rely on it
+        stack = [root]
+        while len(stack) > 0:
+            parent = stack.pop()
+            ancestors = (parent, *index._ancestors[parent])
+            names = index._names[parent]
+
+            for child in reversed(getattr(parent, "children", None) or ()):
+                index._ancestors[child] = ancestors
+                # not every node is named, such as SunSpec points
+                index._names[child] = (*names, getattr(child, "name", None))
+                stack.append(child)
+
+        return index
+
+    def __contains__(self, node):
+        return node in self._ancestors
+
+    def ancestors(self, node):
+        """Nearest first, as ``node.ancestors()``."""
+        return self._ancestors[node]
+
+    def depth(self, node):
+        return len(self._ancestors[node])
+
+    def names(self, node):
+        """The names from below the root down to and including the node."""
+        return self._names[node]
+
+    def nearest(self, node, types):
+        """The closest ancestor of the passed types or None."""
+        nearest = self._nearest.get(types)
+
+        if nearest is None:
+            nearest = {}
+            for child, ancestors in self._ancestors.items():
+                if len(ancestors) == 0:
+                    nearest[child] = None
+                elif isinstance(ancestors[0], types):
+                    nearest[child] = ancestors[0]
+                else:
+                    nearest[child] = nearest[ancestors[0]]
+
+            self._nearest[types] = nearest
+
+        return nearest[node]
+
+
+_paths = ()
+
+
+@contextlib.contextmanager
+def using_paths(*indexes):
+    """Have :func:`paths_for` find the nodes of the passed
+    :class:`PathIndex` instances within the block.
+    """
+    global _paths
+
+    outer = _paths
+    _paths = (*indexes, *outer)
+    try:
+        yield
+    finally:
+        _paths = outer
+
+
+def paths_for(node):
+    """The :class:`PathIndex` in use holding the node or None, in which case
+    the tree has to be walked.
+    """
+    for index in _paths:
+        if node in index:
+            return index
+
+    return None
+
+
+@attr.s
+class ModelIndex:
+    """UUID lookups for a single model, kept current as the model is edited.
+
+    Nodes are indexed by their own UUID and, for nodes that reference a
+    parameter, by their ``parameter_uuid``.
+    """
+
+    model = attr.ib()
+    uuid_to_node = attr.ib(default=attr.Factory(dict))
+    parameter_uuid_to_nodes = attr.ib(default=attr.Factory(dict))
+    node_to_parameter_uuid = attr.ib(default=attr.Factory(dict))
+    _paths = attr.ib(default=None, repr=False)
+
+    @classmethod
+    def build(cls, model):
+        index = cls(model=model)
+        index.add_subtree(model.root)
+
+        item_model = getattr(model, "model", None)
+        if item_model is not None:
+            item_model.rowsInserted.connect(index.rows_inserted)
+            item_model.rowsAboutToBeRemoved.connect(index.rows_about_to_be_removed)
+            item_model.dataChanged.connect(index.data_changed)
+
+        return index
+
+    def add(self, node):
+        self.uuid_to_node[node.uuid] = node
+
+        parameter_uuid = getattr(node, "parameter_uuid", None)
+        if parameter_uuid is not None and node not in self.node_to_parameter_uuid:
+            self.parameter_uuid_to_nodes.setdefault(parameter_uuid, []).append(node)
+            self.node_to_parameter_uuid[node] = parameter_uuid
+
+    def remove(self, node):
+        if self.uuid_to_node.get(node.uuid) is node:
+            del self.uuid_to_node[node.uuid]
+
+        parameter_uuid = self.node_to_parameter_uuid.pop(node, None)
+        if parameter_uuid is not None:
+            nodes = self.parameter_uuid_to_nodes[parameter_uuid]
+            nodes.remove(node)
+            if len(nodes) == 0:
+                del self.parameter_uuid_to_nodes[parameter_uuid]
+
+    def update(self, node):
+        if self.node_to_parameter_uuid.get(node) != getattr(
+            node, "parameter_uuid", None
+        ):
+            self.remove(node)
+            self.add(node)
+
+    def add_subtree(self, node):
+        node.traverse(call_this=lambda node, _: self.add(node), internal_nodes=True)
+
+    def remove_subtree(self, node):
+        node.traverse(
+            call_this=lambda node, _: self.remove(node),
+            internal_nodes=True,
+        )
+
+    def paths(self):
+        """A :class:`PathIndex` of the model, built again after any edit."""
+        if self._paths is None:
+            self._paths = PathIndex.build(root=self.model.root)
+
+        return self._paths
+
+    def rows_inserted(self, parent, first, last):
+        self._paths = None
+
+        # the item model inserts a row for every node of a new subtree so
+        # only the nodes of the reported rows need to be added
+        parent_node = self.model.node_from_index(parent)
+
+        for child in parent_node.children[first : last + 1]:
+            self.add(child)
+
+    def rows_about_to_be_removed(self, parent, first, last):
+        self._paths = None
+        item_model = self.model.model
+
+        for row in range(first, last + 1):
+            index = item_model.index(row, 0, parent)
+            self.remove_subtree(self.model.node_from_index(index))
+
+    def data_changed(self, top_left, bottom_right, roles=()):
+        # names are part of the paths
+        self._paths = None
+        item_model = self.model.model
+
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            index = item_model.index(row, 0, top_left.parent())
+            self.update(self.model.node_from_index(index))
+
+    def node_from_uuid(self, u):
+        return self.uuid_to_node.get(u)
+
+    def nodes_referencing(self, parameter_uuid):
+        return tuple(self.parameter_uuid_to_nodes.get(parameter_uuid, ()))
+
+    def referencing_nodes(self, types=None):
+        """All nodes with a parameter UUID, grouped by that UUID and
+        optionally limited to the passed types.
+        """
+        for nodes in self.parameter_uuid_to_nodes.values():
+            for node in nodes:
+                if types is None or isinstance(node, types):
+                    yield node
+
+    def parameter_uuid_to_node(self, types=None, filter=None):
+        """Map parameter UUIDs to the referencing node of the passed types.
+
+        This is the index backed equivalent of building the dictionary from a
+        ``nodes_by_filter()`` search of the model.
+        """
+        return {
+            node.parameter_uuid: node
+            for node in self.referencing_nodes(types=types)
+            if filter is None or filter(node)
+        }
+
+
+@attr.s
+class ProjectIndex:
+    """Per model :class:`ModelIndex` instances for a whole project.
+
+    The index for a model is built the first time it is requested and then
+    maintained from the model's change signals.  It is rebuilt if the model
+    is replaced, such as by :func:`epcpm.project.reload_models`.
+    """
+
+    models = attr.ib()
+    _indexes = attr.ib(default=attr.Factory(dict), repr=False)
+
+    @classmethod
+    def from_models(cls, **models):
+        return cls(models=models)
+
+    def __getitem__(self, name):
+        index = self._indexes.get(name)
+        model = self.models[name]
+
+        if index is None or index.model is not model:
+            index = ModelIndex.build(model=model)
+            self._indexes[name] = index
+
+        return index
+
+    def node_from_uuid(self, u, names=None):
+        if names is None:
+            names = tuple(self.models)
+
+        for name in names:
+            node = self[name].node_from_uuid(u)
+            if node is not None:
+                return node
+
+        return None
+
+    def nodes_referencing(self, parameter_uuid, name):
+        return self[name].nodes_referencing(parameter_uuid)
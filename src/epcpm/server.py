@@ -0,0 +1,245 @@
+"""A resident process running export commands for build systems.
+
+Each ``epcpm`` invocation otherwise starts a fresh interpreter, imports the
+exporters and loads the project.  ``epcpm serve`` does that once and then
+runs the command lines sent by ``epcpm client``, keeping the projects
+loaded between them, see :class:`epcpm.projectcache.ProjectCache`.
+
+The server listens on a Unix socket, or a named pipe on Windows, and only
+accepts clients holding the key it wrote to the user's runtime directory.
+Requests are handled one at a time since a command runs in the server's
+working directory and with its output captured.
+
+This module only imports the standard library so the client starts quickly.
+"""
+
+import contextlib
+import getpass
+import io
+import multiprocessing
+import multiprocessing.connection
+import os
+import pathlib
+import secrets
+import sys
+import tempfile
+import traceback
+
+
+class ServerError(Exception):
+    pass
+
+
+# the command lines, by their leading words, that the server runs
+served_commands = (
+    ("export", "build"),
+    ("export", "docs"),
+    ("pmvs", "filter"),
+)
+
+
+def is_served(args):
+    return tuple(args[:2]) in served_commands
+
+
+def runtime_directory():
+    return pathlib.Path(tempfile.gettempdir()) / f"epcpm-{getpass.getuser()}"
+
+
+def default_address():
+    if sys.platform == "win32":
+        return r"\\.\pipe\epcpm-" + getpass.getuser()
+
+    return os.fspath(runtime_directory() / "server.sock")
+
+
+def key_path():
+    return runtime_directory() / "server.key"
+
+
+def write_key():
+    directory = runtime_directory()
+    directory.mkdir(mode=0o700, exist_ok=True)
+    if sys.platform != "win32":
+        # also refuses a directory made by another user as only the owner
+        # can change its mode
+        os.chmod(directory, 0o700)
+
+    key = secrets.token_bytes(32)
+    descriptor = os.open(
+        key_path(),
+        os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+        0o600,
+    )
+    with os.fdopen(descriptor, "wb") as f:
+        f.write(key)
+
+    return key
+
+
+def connect(address=None):
+    """A connection to the running server or None if there isn't one."""
+    if address is None:
+        address = default_address()
+
+    try:
+        key = key_path().read_bytes()
+        return multiprocessing.connection.Client(address, authkey=key)
+    except (OSError, multiprocessing.AuthenticationError):
+        return None
+
+
+def request(args, cwd, address=None):
+    """Have the server run the command line as if run from cwd.
+
+    Returns:
+        (stdout, stderr, exit code), or None if no server is running
+    """
+    connection = connect(address=address)
+    if connection is None:
+        return None
+
+    with connection:
+        connection.send({"args": list(args), "cwd": os.fspath(cwd)})
+        response = connection.recv()
+
+    return response["stdout"], response["stderr"], response["exit_code"]
+
+
+def stop(address=None):
+    """Stop the running server.
+
+    Returns:
+        False if no server is running
+    """
+    connection = connect(address=address)
+    if connection is None:
+        return False
+
+    with connection:
+        connection.send({"stop": True})
+        connection.recv()
+
+    return True
+
+
+def invoke(args):
+    import click
+
+    import epcpm.cli.main
+
+    try:
+        epcpm.cli.main.main(args=list(args), prog_name="epcpm", standalone_mode=False)
+    except click.exceptions.Exit as e:
+        return e.exit_code
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        click.echo("Aborted!", err=True)
+        return 1
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+
+def run_command(args, cwd):
+    """Run the command line in this process as if run from cwd.
+
+    Returns:
+        (stdout, stderr, exit code)
+    """
+    if not is_served(args):
+        return "", "Not run by the server: {}\n".format(" ".join(args)), 2
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+
+    previous = os.getcwd()
+    os.chdir(cwd)
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exit_code = invoke(args)
+    finally:
+        os.chdir(previous)
+
+    return stdout.getvalue(), stderr.getvalue(), exit_code
+
+
+def serve(address=None, echo=print):
+    """Run the requested commands until stopped, see :func:`stop`.
+
+    Raises:
+        ServerError: if a server is already running on the address
+    """
+    import epcpm.cli.utils
+    import epcpm.projectcache
+
+    # imported up front so the first request doesn't pay for it
+    import epcpm.cli.main
+    import epcpm.importexport
+
+    if address is None:
+        address = default_address()
+
+    existing = connect(address=address)
+    if existing is not None:
+        existing.close()
+        raise ServerError(f"A server is already running on {address}")
+
+    if sys.platform != "win32" and os.path.exists(address):
+        # left behind by a server that didn't shut down
+        os.unlink(address)
+
+    key = write_key()
+
+    epcpm.cli.utils.project_cache = epcpm.projectcache.ProjectCache()
+    try:
+        with multiprocessing.connection.Listener(address, authkey=key) as listener:
+            echo(f"Serving on {address}")
+            handle_requests(listener=listener, echo=echo)
+    finally:
+        epcpm.cli.utils.project_cache = None
+
+    echo("Stopped")
+
+
+def handle_requests(listener, echo):
+    while True:
+        try:
+            connection = listener.accept()
+        except (EOFError, OSError, multiprocessing.AuthenticationError):
+            # the client went away or didn't have the key
+            continue
+
+        with connection:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                continue
+
+            if message.get("stop", False):
+                try:
+                    connection.send({})
+                except (EOFError, OSError):
+                    pass
+
+                break
+
+            echo("Running: {}".format(" ".join(message["args"])))
+            stdout, stderr, exit_code = run_command(
+                args=message["args"],
+                cwd=message["cwd"],
+            )
+            try:
+                connection.send(
+                    {"stdout": stdout, "stderr": stderr, "exit_code": exit_code},
+                )
+            except (EOFError, OSError):
+                # the client went away while the command ran, such as when
+                # interrupted, the next one is still served
+                echo("Client disconnected before the result was sent")
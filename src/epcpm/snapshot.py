@@ -0,0 +1,191 @@
+"""Binary snapshots of deserialized project models.
+
+The snapshot holds the same information as the model JSON files but with
+every field already deserialized so loading it only needs to construct the
+nodes, skipping the marshmallow pass.  Nodes can't be pickled directly (they
+carry PyQt signal containers and the root classes are local to
+``epyqlib.attrsmodel.Root()``) so each node is stored as its class reference
+and graham field values and rebuilt the same way graham does, ``cls(**data)``.
+"""
+
+import hashlib
+import importlib
+import os
+import pathlib
+import pickle
+
+import attr
+import graham
+
+import epyqlib
+import epyqlib.attrsmodel
+
+import epcpm.staleness
+
+
+format_version = 1
+
+
+class SnapshotError(Exception):
+    pass
+
+
+@attr.s(frozen=True)
+class EncodedNode:
+    # (module, qualname) or None for the model's root type
+    cls = attr.ib()
+    fields = attr.ib()
+
+
+def path_for(project_path):
+    project_path = pathlib.Path(project_path)
+
+    return project_path.with_name(project_path.name + ".snapshot")
+
+
+def key(project_path, paths):
+    """Hash the project file and every model file it lists, along with the
+    epcpm code and epyqlib version as a snapshot skips the defaults and
+    migrations of the node classes they define.
+
+    Args:
+        project_path: path to the .pmp file
+        paths: the project's ``paths`` entry
+
+    Returns:
+        hex digest identifying the sources of a snapshot
+    """
+    project_path = pathlib.Path(project_path)
+    hasher = hashlib.sha256()
+    hasher.update(str(format_version).encode("ascii"))
+    hasher.update(epcpm.staleness.code_hash().encode("ascii"))
+    hasher.update(epyqlib.__version__.encode("utf-8"))
+    hasher.update(project_path.read_bytes())
+
+    for name, path in paths.items():
+        hasher.update(name.encode("utf-8"))
+        if not path:
+            hasher.update(b"\0")
+            continue
+
+        hasher.update(os.fspath(path).encode("utf-8"))
+        hasher.update(
+            hashlib.sha256((project_path.parent / path).read_bytes()).digest()
+        )
+
+    return hasher.hexdigest()
+
+
+def read(path, expected_key):
+    """Read the encoded model roots from a snapshot.
+
+    Returns:
+        dict of model name to encoded root or None if the snapshot is missing,
+        unreadable or was created from different sources
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+    if not isinstance(snapshot, dict):
+        return None
+
+    if snapshot.get("format_version") != format_version:
+        return None
+
+    if snapshot.get("key") != expected_key:
+        return None
+
+    return snapshot["models"]
+
+
+def write(path, key, roots):
+    """Write a snapshot of the passed model roots.
+
+    The snapshot is written to a temporary file and then moved into place so
+    readers never see a partial file.  Roots with fields that can't be
+    pickled raise :class:`SnapshotError` and leave no snapshot behind.
+    """
+    path = pathlib.Path(path)
+    snapshot = {
+        "format_version": format_version,
+        "key": key,
+        "models": {name: encode(root) for name, root in roots.items()},
+    }
+
+    try:
+        serialized = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        raise SnapshotError("Unable to snapshot project models") from e
+
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_bytes(serialized)
+    os.replace(temporary_path, path)
+
+
+def class_reference(cls):
+    if "<locals>" in cls.__qualname__:
+        return None
+
+    return (cls.__module__, cls.__qualname__)
+
+
+def encode(node):
+    fields = []
+
+    for field in attr.fields(type(node)):
+        metadata = field.metadata.get(graham.core.metadata_key)
+        if metadata is None:
+            continue
+
+        value = getattr(node, field.name)
+        if isinstance(metadata.field, epyqlib.attrsmodel.Reference):
+            # store references the way the JSON does, they are resolved after
+            # the tree is rebuilt
+            value = getattr(value, "uuid", value)
+        else:
+            value = encode_value(value)
+
+        fields.append((field.name, value))
+
+    return EncodedNode(cls=class_reference(type(node)), fields=tuple(fields))
+
+
+def encode_value(value):
+    if hasattr(value, "__graham_graham__"):
+        return encode(value)
+
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+
+    return value
+
+
+def decode(encoded, root_type):
+    classes = {None: root_type}
+
+    def decode_value(value):
+        if isinstance(value, EncodedNode):
+            return decode_node(value)
+
+        if isinstance(value, list):
+            return [decode_value(item) for item in value]
+
+        return value
+
+    def decode_node(encoded):
+        cls = classes.get(encoded.cls)
+        if cls is None:
+            module, qualname = encoded.cls
+            cls = importlib.import_module(module)
+            for name in qualname.split("."):
+                cls = getattr(cls, name)
+            classes[encoded.cls] = cls
+
+        return cls(
+            **{name: decode_value(value) for name, value in encoded.fields},
+        )
+
+    return decode_node(encoded)
@@ -0,0 +1,237 @@
+"""Checks of whether an export is out of date.
+
+Each full export records a manifest holding, for every exporter, the content
+hashes of the files it read, such as the model files and the templates the
+generated C is rendered from, and of the files it wrote.  An exporter is out
+of date when any of those hashes differ from the files on disk.  Everything is
+out of date when the manifest is missing, or the project file, the epcpm
+version, the source of the epcpm modules or the export options differ from
+those it was written with.
+
+This is on the ``export build --if-stale`` fast path so it only hashes bytes
+and reads the project file as plain JSON rather than importing the model
+classes, and through them Qt, the exporters and their dependencies.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import pathlib
+
+import attr
+
+import epcpm
+
+
+manifest_format_version = 3
+manifest_name = ".pm-export-manifest.json"
+
+
+@attr.s(frozen=True)
+class ExportOptions:
+    """The export settings that change what is generated."""
+
+    skip_output = attr.ib(default=False)
+    include_uuid_in_item = attr.ib(default=False)
+    split_interface = attr.ib(default=False)
+
+
+def manifest_path(target_directory):
+    return pathlib.Path(target_directory) / manifest_name
+
+
+def project_paths(project):
+    """The model file paths listed in a project file, relative to it."""
+    raw = json.loads(pathlib.Path(project).read_text())
+
+    return {
+        name: path
+        for name, path in raw["paths"].items()
+        if name != "_type" and path is not None
+    }
+
+
+def model_paths(project):
+    """The model file paths listed in a project file, by model name."""
+    project = pathlib.Path(project)
+
+    return {
+        name: project.parent / path for name, path in project_paths(project).items()
+    }
+
+
+def hash_file(path):
+    """The SHA-256 hex digest of a file or None if it doesn't exist."""
+    try:
+        return hashlib.sha256(pathlib.Path(path).read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def template_path(path):
+    return path.with_suffix(f"{path.suffix}_pm")
+
+
+def relative(path, target_directory):
+    return os.path.relpath(path, target_directory)
+
+
+def hashes(paths, target_directory):
+    return {relative(path, target_directory): hash_file(path) for path in paths}
+
+
+def hashes_match(recorded, target_directory):
+    target_directory = pathlib.Path(target_directory)
+
+    return all(
+        hash_file(target_directory / path) == digest
+        for path, digest in recorded.items()
+    )
+
+
+def entry(inputs, outputs, target_directory):
+    """The manifest record of one exporter run.
+
+    Args:
+        inputs: relative path to hash of the files read, hashed before the
+            exporter ran
+        outputs: paths of the files written
+        target_directory: the export's target directory
+    """
+    return {
+        "inputs": inputs,
+        "outputs": hashes(paths=outputs, target_directory=target_directory),
+    }
+
+
+def entry_is_current(entry, inputs, target_directory):
+    """Whether an exporter's recorded run still matches the files on disk.
+
+    Args:
+        entry: the exporter's manifest record
+        inputs: relative path to hash of the files the exporter would read now
+        target_directory: the export's target directory
+    """
+    return entry["inputs"] == inputs and hashes_match(
+        recorded=entry["outputs"],
+        target_directory=target_directory,
+    )
+
+
+def source_hash(directory):
+    """The SHA-256 hex digest of the names and contents of the Python files
+    directly in the directory.
+    """
+    hasher = hashlib.sha256()
+
+    for path in sorted(pathlib.Path(directory).glob("*.py")):
+        hasher.update(path.name.encode("utf-8"))
+        hasher.update(hashlib.sha256(path.read_bytes()).digest())
+
+    return hasher.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def code_hash():
+    """The hash of the epcpm modules, the exporters and the renderers among
+    them, as the version stays the same while they are being developed.
+    """
+    return source_hash(pathlib.Path(epcpm.__file__).parent)
+
+
+def build_manifest(project, target_directory, options, entries):
+    return {
+        "format_version": manifest_format_version,
+        "epcpm_version": epcpm.__version__,
+        "code": code_hash(),
+        "options": attr.asdict(options),
+        "project": hashes(paths=[project], target_directory=target_directory),
+        "exporters": entries,
+    }
+
+
+def manifest_matches(manifest, project, target_directory, options):
+    """Whether the manifest was written for this project file, version, code
+    and set of options, and so whether its exporter records can be relied on.
+    """
+    return (
+        manifest["epcpm_version"] == epcpm.__version__
+        and manifest["code"] == code_hash()
+        and manifest["options"] == attr.asdict(options)
+        and manifest["project"]
+        == hashes(paths=[project], target_directory=target_directory)
+    )
+
+
+def write_json(path, data):
+    # replaced in one step so an interrupted write doesn't leave a
+    # truncated file behind
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_text(json.dumps(data, indent=4, sort_keys=True) + "\n")
+    os.replace(temporary_path, path)
+
+
+def read_json(path):
+    """The JSON in the file or None if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(target_directory, manifest):
+    write_json(path=manifest_path(target_directory), data=manifest)
+
+
+def remove_manifest(target_directory):
+    try:
+        manifest_path(target_directory).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def read_manifest(target_directory):
+    manifest = read_json(manifest_path(target_directory))
+
+    if not isinstance(manifest, dict):
+        return None
+
+    if manifest.get("format_version") != manifest_format_version:
+        return None
+
+    return manifest
+
+
+def is_stale(
+    project,
+    target_directory,
+    skip_sunspec=False,
+    include_uuid_in_item=False,
+    split_interface=False,
+):
+    manifest = read_manifest(target_directory)
+
+    if manifest is None:
+        return True
+
+    options = ExportOptions(
+        skip_output=skip_sunspec,
+        include_uuid_in_item=include_uuid_in_item,
+        split_interface=split_interface,
+    )
+    if not manifest_matches(
+        manifest=manifest,
+        project=project,
+        target_directory=target_directory,
+        options=options,
+    ):
+        return True
+
+    for entry in manifest["exporters"].values():
+        for recorded in (entry["inputs"], entry["outputs"]):
+            if not hashes_match(recorded=recorded, target_directory=target_directory):
+                return True
+
+    return False
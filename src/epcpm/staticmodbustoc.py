@@ -3,6 +3,7 @@ import pathlib
 import typing
 import epcpm.pm_helper
 import epcpm.staticmodbusmodel
+import epcpm.writer
 import epyqlib.attrsmodel
 import epyqlib.utils.general
 
@@ -36,7 +37,6 @@ def export(
         skip_output=skip_output,
     )
 
-    c_path.parent.mkdir(parents=True, exist_ok=True)
     builder.gen()
 
 
@@ -89,9 +89,10 @@ class Root:
             "};",
         ]
 
-        with self.c_path.open("w", newline="\n") as c_file:
-            c_file.write(epcpm.c.format_nested_lists(c_lines).strip())
-            c_file.write("\n")
+        epcpm.writer.write_text(
+            path=self.c_path,
+            text=epcpm.c.format_nested_lists(c_lines).strip() + "\n",
+        )
 
         h_lines = [
             "#ifndef __STATICMODBUS_INTERFACE_GEN_H__",
@@ -125,9 +126,10 @@ class Root:
             "#endif //__STATICMODBUS_INTERFACE_GEN_H__",
         ]
 
-        with self.h_path.open("w", newline="\n") as h_file:
-            h_file.write(epcpm.c.format_nested_lists(h_lines).strip())
-            h_file.write("\n")
+        epcpm.writer.write_text(
+            path=self.h_path,
+            text=epcpm.c.format_nested_lists(h_lines).strip() + "\n",
+        )
 
 
 @builders(epcpm.staticmodbusmodel.FunctionData)
@@ -7,8 +7,10 @@ import pathlib
 import typing
 
 import epcpm
+import epcpm.exportcontext
 import epcpm.pm_helper
 import epcpm.staticmodbusmodel
+import epcpm.writer
 import epyqlib.attrsmodel
 import epyqlib.pm.parametermodel
 import epyqlib.utils.general
@@ -63,6 +65,7 @@ def export(
     parameters_model: epyqlib.attrsmodel.Model,
     column_filter: epcpm.pm_helper.FieldsInterface = None,
     skip_output: bool = False,
+    export_context: epcpm.exportcontext.ExportContext = None,
 ) -> None:
     """
     Generate the static modbus model data Excel .xls file.
@@ -72,6 +75,8 @@ def export(
         parameters_model: parameters model
         column_filter: columns to be output to .xls file
         skip_output: skip output of the generated files
+        export_context: lookups shared with the other exporters, built from the
+            passed models if not given
     Returns:
     """
     if skip_output:
@@ -80,17 +85,22 @@ def export(
     if column_filter is None:
         column_filter = epcpm.pm_helper.attr_fill(Fields, True)
 
+    if export_context is None:
+        export_context = epcpm.exportcontext.ExportContext.from_models(
+            parameters=parameters_model,
+        )
+
     builder = epcpm.staticmodbustoxls.builders.wrap(
         wrapped=staticmodbus_model.root,
         parameter_uuid_finder=staticmodbus_model.node_from_uuid,
         parameter_model=parameters_model,
         column_filter=column_filter,
+        export_context=export_context,
     )
 
     workbook = builder.gen()
 
-    path.parent.mkdir(parents=True, exist_ok=True)
-    workbook.save(path)
+    epcpm.writer.save_workbook(workbook=workbook, path=path)
 
 
 @builders(epcpm.staticmodbusmodel.Root)
@@ -102,6 +112,15 @@ class Root:
     column_filter = attr.ib(type=Fields)
     parameter_uuid_finder = attr.ib(default=None, type=typing.Callable)
     parameter_model = attr.ib(default=None, type=epyqlib.attrsmodel.Model)
+    export_context = attr.ib(
+        default=attr.Factory(
+            lambda self: epcpm.exportcontext.ExportContext.from_models(
+                parameters=self.parameter_model,
+            ),
+            takes_self=True,
+        ),
+        type=epcpm.exportcontext.ExportContext,
+    )
 
     def gen(self) -> openpyxl.workbook.workbook.Workbook:
         """
@@ -116,8 +135,8 @@ class Root:
         modbus_worksheet.append(field_names.as_filtered_tuple(self.column_filter))
         enumeration_worksheet.append(["Enumerator", "Name", "Value"])
 
-        scale_factor_from_uuid = epcpm.pm_helper.build_uuid_scale_factor_dict(
-            points=self.wrapped.children,
+        scale_factor_from_uuid = self.export_context.scale_factors(
+            block=self.wrapped,
             parameter_uuid_finder=self.parameter_uuid_finder,
         )
         enumerations = self.collect_enumerations()
@@ -165,37 +184,16 @@ class Root:
 
     def collect_enumerations(self) -> list:
         """
-        A function that traverses the parameter model from the root and creates
-        a list of enumerations
+        The enumerations and access levels of the parameter model, collected
+        once per export by the export context
 
         Returns:
             list: a list of enumerations
         """
-        collected = []
-
         if self.parameter_model is None:
-            return collected
-
-        def collect(
-            node: epyqlib.attrsmodel.Model, collected: list
-        ) -> typing.Union[typing.List[epyqlib.attrsmodel.Model], None]:
-            is_enumeration = isinstance(
-                node,
-                (
-                    epyqlib.pm.parametermodel.Enumeration,
-                    epyqlib.pm.parametermodel.AccessLevels,
-                ),
-            )
-            if is_enumeration:
-                collected.append(node)
-
-        self.parameter_model.root.traverse(
-            call_this=collect,
-            payload=collected,
-            internal_nodes=True,
-        )
+            return []
 
-        return collected
+        return self.export_context.enumerations()
 
 
 @builders(epcpm.staticmodbusmodel.FunctionData)
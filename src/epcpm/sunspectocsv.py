@@ -3,14 +3,17 @@ from __future__ import (
 )  # See PEP 563, check to remove in future Python version higher than 3.7
 import attr
 import csv
+import io
 import math
 import pathlib
 import typing
 import uuid
 import epcpm.c
+import epcpm.exportcontext
 import epyqlib.attrsmodel
 import epcpm.pm_helper
 import epcpm.sunspecmodel
+import epcpm.writer
 import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
@@ -81,6 +84,7 @@ def export(
     parameters_model: epyqlib.attrsmodel.Model,
     column_filter: epcpm.pm_helper.FieldsInterface = None,
     skip_output: bool = False,
+    export_context: epcpm.exportcontext.ExportContext = None,
 ) -> None:
     """
     Generate the SunSpec model data .csv file.
@@ -92,6 +96,8 @@ def export(
         parameters_model: parameters model
         column_filter: columns to be output to .csv file
         skip_output: skip output of the generated files, previously used for skip_sunspec
+        export_context: lookups shared with the other exporters, built from the
+            passed models if not given
 
     Returns:
 
@@ -102,20 +108,28 @@ def export(
     if column_filter is None:
         column_filter = epcpm.pm_helper.attr_fill(Fields, True)
 
+    if export_context is None:
+        export_context = epcpm.exportcontext.ExportContext.from_models(
+            parameters=parameters_model,
+        )
+
     builder = epcpm.sunspectocsv.builders.wrap(
         wrapped=sunspec_model.root,
         parameter_uuid_finder=sunspec_model.node_from_uuid,
         parameter_model=parameters_model,
         column_filter=column_filter,
         sunspec_id=sunspec_id,
+        export_context=export_context,
     )
 
     csv_data = builder.gen()
 
-    with open(path.with_suffix(".csv"), "w", newline="") as csv_file:
-        csv_writer = csv.writer(csv_file, quoting=csv.QUOTE_ALL)
-        for data_row in csv_data:
-            csv_writer.writerow(data_row)
+    csv_file = io.StringIO(newline="")
+    csv_writer = csv.writer(csv_file, quoting=csv.QUOTE_ALL)
+    for data_row in csv_data:
+        csv_writer.writerow(data_row)
+
+    epcpm.writer.write_text(path=path.with_suffix(".csv"), text=csv_file.getvalue())
 
 
 @builders(epcpm.sunspecmodel.Root)
@@ -129,6 +143,10 @@ class Root:
     parameter_uuid_finder = attr.ib(default=None, type=typing.Callable)
     parameter_model = attr.ib(default=None, type=epyqlib.attrsmodel.Model)
     sort_models = attr.ib(default=False, type=bool)
+    export_context = attr.ib(
+        default=attr.Factory(epcpm.exportcontext.ExportContext.from_models),
+        type=epcpm.exportcontext.ExportContext,
+    )
 
     def gen(self) -> typing.List[str]:
         """
@@ -168,6 +186,7 @@ class Root:
                 ].child_by_name("pad"),
                 parameter_uuid_finder=self.parameter_uuid_finder,
                 model_offset=model_offset,
+                export_context=self.export_context,
             ).gen()
 
         return csv_data
@@ -185,6 +204,7 @@ class Model:
     padding_type = attr.ib(type=epyqlib.pm.parametermodel.Enumerator)
     model_offset = attr.ib(type=int)  # starting Modbus address for the model
     parameter_uuid_finder = attr.ib(default=None, type=typing.Callable)
+    export_context = attr.ib(default=None, type=epcpm.exportcontext.ExportContext)
 
     def gen(self) -> int:
         """
@@ -224,6 +244,7 @@ class Model:
                 parameter_uuid_finder=self.parameter_uuid_finder,
                 address_offset=accumulated_length,
                 fixed_block_reference=fixed_block_reference,
+                export_context=self.export_context,
             )
 
             built_rows, block_length = builder.gen()
@@ -285,6 +306,7 @@ class Block:
     parameter_uuid_finder = attr.ib(default=None, type=typing.Callable)
     is_table = attr.ib(default=False, type=bool)
     fixed_block_reference = attr.ib(default=None, type=epcpm.sunspecmodel.FixedBlock)
+    export_context = attr.ib(default=None, type=epcpm.exportcontext.ExportContext)
 
     def gen(self) -> typing.Tuple[list, int]:
         """
@@ -295,8 +317,8 @@ class Block:
         """
         # TODO: CAMPid 07548795421667967542697543743987
 
-        scale_factor_from_uuid = epcpm.pm_helper.build_uuid_scale_factor_dict(
-            points=self.wrapped.children,
+        scale_factor_from_uuid = self.export_context.scale_factors(
+            block=self.wrapped,
             parameter_uuid_finder=self.parameter_uuid_finder,
         )
 
@@ -504,6 +526,7 @@ class TableRepeatingBlockReference:
     address_offset = attr.ib(type=int)
     parameter_uuid_finder = attr.ib(default=None, type=typing.Callable)
     fixed_block_reference = attr.ib(default=None, type=epcpm.sunspecmodel.FixedBlock)
+    export_context = attr.ib(default=None, type=epcpm.exportcontext.ExportContext)
 
     def gen(self) -> typing.Tuple[typing.List[Fields], int]:
         """
@@ -613,6 +636,7 @@ class TableRepeatingBlock:
     )
     parameter_uuid_finder = attr.ib(default=None, type=typing.Callable)
     is_table = attr.ib(default=False, type=bool)
+    export_context = attr.ib(default=None, type=epcpm.exportcontext.ExportContext)
 
     def gen(self) -> typing.Tuple[typing.List[Fields], int]:
         """
@@ -642,6 +666,7 @@ class TableBlock:
     )
     is_table = attr.ib(default=False, type=bool)
     fixed_block_reference = attr.ib(default=None, type=epcpm.sunspecmodel.FixedBlock)
+    export_context = attr.ib(default=None, type=epcpm.exportcontext.ExportContext)
 
     def gen(self) -> typing.Tuple[typing.List[Fields], int]:
         """
@@ -655,8 +680,8 @@ class TableBlock:
         rows = []
         summed_increments = 0
 
-        scale_factor_from_uuid = epcpm.pm_helper.build_uuid_scale_factor_dict(
-            points=self.fixed_block_reference.children,
+        scale_factor_from_uuid = self.export_context.scale_factors(
+            block=self.fixed_block_reference,
             parameter_uuid_finder=self.parameter_uuid_finder,
         )
 
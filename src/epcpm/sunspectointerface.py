@@ -5,8 +5,10 @@ import re
 import typing
 from collections.abc import Iterable
 
+import epcpm.exportcontext
 import epcpm.pm_helper
 import epcpm.sunspecmodel
+import epcpm.writer
 import epyqlib.utils.general
 
 builders = epyqlib.utils.general.TypeMap()
@@ -125,6 +127,7 @@ def export(
     sunspec_model: epyqlib.attrsmodel.Model,
     sunspec_id: epcpm.pm_helper.SunSpecSection,
     skip_sunspec: bool = False,
+    export_context: epcpm.exportcontext.ExportContext = None,
 ) -> None:
     """
     Generate the SunSpec model data interface .c and .h files.
@@ -135,10 +138,15 @@ def export(
         sunspec_model: SunSpec model
         sunspec_id: SunSpec section internal identifier
         skip_sunspec: skip output of the generated files
+        export_context: lookups shared with the other exporters, built if not
+            given
 
     Returns:
 
     """
+    if export_context is None:
+        export_context = epcpm.exportcontext.ExportContext.from_models()
+
     builder = builders.wrap(
         wrapped=sunspec_model.root,
         parameter_uuid_finder=sunspec_model.node_from_uuid,
@@ -147,7 +155,6 @@ def export(
         c_path=c_path,
         h_path=h_path,
     )
-    c_path.parent.mkdir(parents=True, exist_ok=True)
     builder.gen()
 
     builder = specific_builders.wrap(
@@ -157,8 +164,8 @@ def export(
         sunspec_id=sunspec_id,
         c_path=c_path,
         h_path=h_path,
+        export_context=export_context,
     )
-    c_path.parent.mkdir(parents=True, exist_ok=True)
     builder.gen()
 
 
@@ -219,14 +226,10 @@ class Root:
         )
 
         # Output the overall .c file.
-        with self.c_path.open("w", newline="\n") as f:
-            for c_line in c_lines:
-                f.write(c_line)
+        epcpm.writer.write_text(path=self.c_path, text="".join(c_lines))
 
         # Output the overall .h file.
-        with self.h_path.open("w", newline="\n") as f:
-            for h_line in h_lines:
-                f.write(h_line)
+        epcpm.writer.write_text(path=self.h_path, text="".join(h_lines))
 
     def _pre_calculate_model_values(
         self, model_points: typing.List[typing.List[OutputPoint]]
@@ -1066,6 +1069,9 @@ class SpecificRoot:
     sunspec_id = attr.ib(default=None)
     c_path = attr.ib(default=None)
     h_path = attr.ib(default=None)
+    export_context = attr.ib(
+        default=attr.Factory(epcpm.exportcontext.ExportContext.from_models),
+    )
 
     def gen(self) -> None:
         """
@@ -1085,6 +1091,7 @@ class SpecificRoot:
                 c_path=self.c_path,
                 h_path=self.h_path,
                 skip_sunspec=self.skip_sunspec,
+                export_context=self.export_context,
             )
             builder.gen()
 
@@ -1100,6 +1107,7 @@ class SpecificModel:
     skip_sunspec = attr.ib()
     c_path = attr.ib(default=None)
     h_path = attr.ib(default=None)
+    export_context = attr.ib(default=None)
 
     def gen(self) -> None:
         """
@@ -1161,7 +1169,9 @@ class SpecificModel:
                     parameter_uuid_finder=self.parameter_uuid_finder,
                     sunspec_id=self.sunspec_id,
                 )
-                scale_factor_from_uuid_built = builder.gen_scale_factor()
+                scale_factor_from_uuid_built = builder.gen_scale_factor(
+                    export_context=self.export_context,
+                )
                 scale_factor_from_uuid.update(scale_factor_from_uuid_built)
 
             for child in self.wrapped.children:
@@ -1218,13 +1228,8 @@ class SpecificModel:
 
         h_lines.extend([f"\n#endif //{include_guard}\n"])
 
-        with c_file_path.open("w", newline="\n") as f:
-            for c_line in c_lines:
-                f.write(c_line)
-
-        with h_file_path.open("w", newline="\n") as f:
-            for h_line in h_lines:
-                f.write(h_line)
+        epcpm.writer.write_text(path=c_file_path, text="".join(c_lines))
+        epcpm.writer.write_text(path=h_file_path, text="".join(h_lines))
 
 
 @specific_builders(epcpm.sunspecmodel.TableRepeatingBlock)
@@ -1331,12 +1336,11 @@ class SpecificFixedBlock:
 
         return get_out, set_out, base_decl
 
-    def gen_scale_factor(self):
-        scale_factor_from_uuid = epcpm.pm_helper.build_uuid_scale_factor_dict(
-            points=self.wrapped.children,
+    def gen_scale_factor(self, export_context):
+        return export_context.scale_factors(
+            block=self.wrapped,
             parameter_uuid_finder=self.parameter_uuid_finder,
         )
-        return scale_factor_from_uuid
 
 
 @specific_builders(epcpm.sunspecmodel.TableBlock)
@@ -1414,7 +1418,7 @@ class SpecificTableBlock:
 
         return get_out, set_out, base_decl
 
-    def gen_scale_factor(self):
+    def gen_scale_factor(self, export_context):
         return {}
 
     @staticmethod
@@ -1498,7 +1502,7 @@ class SpecificHeaderBlock:
         """
         return [], [], []
 
-    def gen_scale_factor(self):
+    def gen_scale_factor(self, export_context):
         return {}
 
 
@@ -1533,7 +1537,7 @@ class SpecificTableRepeatingBlockReference:
 
         return builder.gen()
 
-    def gen_scale_factor(self):
+    def gen_scale_factor(self, export_context):
         return {}
 
 
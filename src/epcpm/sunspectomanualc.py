@@ -3,6 +3,7 @@ import attr
 import epcpm.c
 import epcpm.sunspecmodel
 import epcpm.sunspectoxlsx
+import epcpm.writer
 import epyqlib.utils.general
 
 
@@ -64,8 +65,10 @@ class Root:
                 "",
             ]
             lines.extend(builder.gen())
-            with path.open("w", newline="\n") as f:
-                f.write(epcpm.c.format_nested_lists(lines).strip() + "\n")
+            epcpm.writer.write_text(
+                path=path,
+                text=epcpm.c.format_nested_lists(lines).strip() + "\n",
+            )
 
 
 @builders(epcpm.sunspecmodel.Model)
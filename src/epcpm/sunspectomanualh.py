@@ -4,6 +4,7 @@ import epcpm.c
 import epcpm.pm_helper
 import epcpm.sunspecmodel
 import epcpm.sunspectoxlsx
+import epcpm.writer
 import epyqlib.utils.general
 
 
@@ -59,8 +60,10 @@ class Root:
                 f"#endif //{inc_guard}",
             ]
 
-            with path.open("w", newline="\n") as f:
-                f.write(epcpm.c.format_nested_lists(lines).strip() + "\n")
+            epcpm.writer.write_text(
+                path=path,
+                text=epcpm.c.format_nested_lists(lines).strip() + "\n",
+            )
 
 
 @builders(epcpm.sunspecmodel.Model)
@@ -5,6 +5,7 @@ import epyqlib.pm.parametermodel
 
 import epcpm.pm_helper
 import epcpm.sunspecmodel
+import epcpm.writer
 
 
 builders = epyqlib.utils.general.TypeMap()
@@ -18,7 +19,6 @@ def export(c_path, h_path, sunspec_model, sunspec_id, skip_sunspec=False):
         skip_sunspec=skip_sunspec,
     )
 
-    c_path.parent.mkdir(parents=True, exist_ok=True)
     c_content, h_content = builder.gen()
 
     auto_gen_line = '/* Generated by "sunspectotablesc.py" */\n\n'
@@ -40,13 +40,8 @@ def export(c_path, h_path, sunspec_model, sunspec_id, skip_sunspec=False):
     h_lines = [auto_gen_line]
     h_lines.extend(h_content)
 
-    with c_path.open("w", newline="\n") as f:
-        for c_line in c_lines:
-            f.write(c_line)
-
-    with h_path.open("w", newline="\n") as f:
-        for h_line in h_lines:
-            f.write(h_line)
+    epcpm.writer.write_text(path=c_path, text="".join(c_lines))
+    epcpm.writer.write_text(path=h_path, text="".join(h_lines))
 
 
 # TODO: CAMPid 079549750417808543178043180
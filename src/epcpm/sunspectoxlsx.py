@@ -13,9 +13,11 @@ import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
 import epcpm.c
+import epcpm.exportcontext
 import epcpm.pm_helper
 import epcpm.sunspecmodel
 import epcpm.sunspectointerface
+import epcpm.writer
 
 from enum import Enum
 
@@ -120,10 +122,16 @@ def export(
     column_filter=None,
     skip_sunspec=False,
     output_dummy_models=True,
+    export_context=None,
 ):
     if column_filter is None:
         column_filter = epcpm.pm_helper.attr_fill(Fields, True)
 
+    if export_context is None:
+        export_context = epcpm.exportcontext.ExportContext.from_models(
+            parameters=parameters_model,
+        )
+
     builder = epcpm.sunspectoxlsx.builders.wrap(
         wrapped=sunspec_model.root,
         parameter_uuid_finder=sunspec_model.node_from_uuid,
@@ -132,12 +140,12 @@ def export(
         skip_sunspec=skip_sunspec,
         column_filter=column_filter,
         output_dummy_models=output_dummy_models,
+        export_context=export_context,
     )
 
     workbook = builder.gen()
 
-    path.parent.mkdir(parents=True, exist_ok=True)
-    workbook.save(path)
+    epcpm.writer.save_workbook(workbook=workbook, path=path)
 
 
 @builders(epcpm.sunspecmodel.Root)
@@ -151,6 +159,9 @@ class Root:
     sunspec_id = attr.ib(default=None)
     sort_models = attr.ib(default=False)
     output_dummy_models = attr.ib(default=True)
+    export_context = attr.ib(
+        default=attr.Factory(epcpm.exportcontext.ExportContext.from_models),
+    )
 
     def gen(self):
         workbook = openpyxl.Workbook()
@@ -192,6 +203,7 @@ class Root:
                     sunspec_id=self.sunspec_id,
                     column_filter=self.column_filter,
                     model_offset=model_offset,
+                    export_context=self.export_context,
                 ).gen()
 
                 if not self.output_dummy_models and DummyModels.within_bounds(model.id):
@@ -211,6 +223,7 @@ class Model:
     model_offset = attr.ib()  # starting Modbus address for the model
     parameter_uuid_finder = attr.ib(default=None)
     sunspec_id = attr.ib(default=None)
+    export_context = attr.ib(default=None)
 
     def gen(self):
         self.worksheet.title = str(self.wrapped.id)
@@ -250,6 +263,7 @@ class Model:
                 address_offset=accumulated_length,
                 is_table=model_type == "Repeating Block",
                 fixed_block_reference=fixed_block_reference,
+                export_context=self.export_context,
             )
 
             built_rows, block_length = builder.gen()
@@ -399,12 +413,13 @@ class Block:
     sunspec_id = attr.ib(default=None)
     is_table = attr.ib(default=False)
     fixed_block_reference = attr.ib(default=None, type=epcpm.sunspecmodel.FixedBlock)
+    export_context = attr.ib(default=None)
 
     def gen(self):
         # TODO: CAMPid 07548795421667967542697543743987
 
-        scale_factor_from_uuid = epcpm.pm_helper.build_uuid_scale_factor_dict(
-            points=self.wrapped.children,
+        scale_factor_from_uuid = self.export_context.scale_factors(
+            block=self.wrapped,
             parameter_uuid_finder=self.parameter_uuid_finder,
         )
 
@@ -468,6 +483,7 @@ class TableBlock:
     sunspec_id = attr.ib(default=None)
     is_table = attr.ib(default=False)
     fixed_block_reference = attr.ib(default=None, type=epcpm.sunspecmodel.FixedBlock)
+    export_context = attr.ib(default=None)
 
     def gen(self) -> typing.List[typing.List[Fields], int]:
         """
@@ -482,8 +498,8 @@ class TableBlock:
 
         summed_increments = 0
 
-        scale_factor_from_uuid = epcpm.pm_helper.build_uuid_scale_factor_dict(
-            points=self.fixed_block_reference.children,
+        scale_factor_from_uuid = self.export_context.scale_factors(
+            block=self.fixed_block_reference,
             parameter_uuid_finder=self.parameter_uuid_finder,
         )
 
@@ -842,6 +858,7 @@ class TableRepeatingBlockReference:
     sunspec_id = attr.ib(default=None)
     is_table = attr.ib(default=False)
     fixed_block_reference = attr.ib(default=None, type=epcpm.sunspecmodel.FixedBlock)
+    export_context = attr.ib(default=None)
 
     def gen(self):
         builder = builders.wrap(
@@ -856,6 +873,7 @@ class TableRepeatingBlockReference:
             repeating_block_reference=self.wrapped,
             address_offset=self.address_offset,
             sunspec_id=self.sunspec_id,
+            export_context=self.export_context,
         )
 
         return builder.gen()
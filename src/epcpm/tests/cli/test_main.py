@@ -0,0 +1,89 @@
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import textwrap
+
+import epcpm.staleness
+
+
+example_directory = pathlib.Path(__file__).parents[1]
+
+# an up to date check used to take more than a second importing these
+# before it looked at any files
+heavy_modules = {
+    "PyQt5",
+    "canmatrix",
+    "epcpm.importexport",
+    "epcpm.project",
+    "graham",
+    "jinja2",
+    "lxml",
+    "natsort",
+    "openpyxl",
+    "tqdm",
+    "xmldiff",
+}
+
+
+def test_if_stale_fast_path_imports(tmp_path):
+    project_directory = tmp_path / "project"
+    project_directory.mkdir()
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(example_directory / name, project_directory / name)
+
+    project = project_directory / "example_project.pmp"
+    target_path = tmp_path / "target"
+    target_path.mkdir()
+
+    epcpm.staleness.write_manifest(
+        target_directory=target_path,
+        manifest=epcpm.staleness.build_manifest(
+            project=project,
+            target_directory=target_path,
+            options=epcpm.staleness.ExportOptions(skip_output=True),
+            entries={},
+        ),
+    )
+
+    code = textwrap.dedent(
+        """\
+        import sys
+
+        import epcpm.cli.main
+
+        epcpm.cli.main.main(args=sys.argv[1:], standalone_mode=False)
+        print(" ".join(sorted(sys.modules)))
+        """
+    )
+
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            code,
+            "export",
+            "build",
+            "--project",
+            os.fspath(project),
+            "--target-path",
+            os.fspath(target_path),
+            "--if-stale",
+            "--skip-sunspec",
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    message, modules = completed.stdout.splitlines()
+    imported = {
+        heavy
+        for module in modules.split()
+        for heavy in heavy_modules
+        if module == heavy or module.startswith(heavy + ".")
+    }
+
+    assert message == "Generated files appear to be up to date, skipping export"
+    assert imported == set()
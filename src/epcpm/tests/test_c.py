@@ -1,3 +1,4 @@
+import os
 import textwrap
 
 import epcpm.c
@@ -33,3 +34,70 @@ def test_format_nested_lists():
     }
     """
     )
+
+
+def test_render_reuses_environment(tmp_path, monkeypatch):
+    monkeypatch.delenv(epcpm.c.bytecode_cache_variable, raising=False)
+
+    source = tmp_path / "example.c_pm"
+    source.write_text("int {{ name }};\n")
+    destination = tmp_path / "example.c"
+
+    epcpm.c.render(source=source, destination=destination, context={"name": "a"})
+    environment = epcpm.c.environment(directory=tmp_path)
+    epcpm.c.render(source=source, destination=destination, context={"name": "b"})
+
+    assert epcpm.c.environment(directory=tmp_path) is environment
+    assert destination.read_text() == "int b;\n"
+
+    source.write_text("long {{ name }};\n")
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    epcpm.c.render(source=source, destination=destination, context={"name": "c"})
+
+    assert destination.read_text() == "long c;\n"
+
+
+def test_bytecode_cache(tmp_path, monkeypatch):
+    cache_path = tmp_path / "cache"
+    monkeypatch.setenv(epcpm.c.bytecode_cache_variable, os.fspath(cache_path))
+
+    source = tmp_path / "templates" / "example.h_pm"
+    source.parent.mkdir()
+    source.write_text("int {{ name }};\n")
+
+    epcpm.c.render(
+        source=source,
+        destination=tmp_path / "example.h",
+        context={"name": "a"},
+    )
+
+    assert len(list(cache_path.iterdir())) == 1
+
+
+def test_strip_end_holds_back_only_whitespace():
+    chunks = ["int a;  ", "\n", "  int b;", "\n\n", "  \n"]
+
+    stripped = list(epcpm.c.strip_end(chunks=chunks, newline="\r\n"))
+
+    assert "".join(stripped) == "int a;  \n  int b;\r\n"
+    assert stripped[0] == "int a;"
+
+
+def test_render_strips_trailing_whitespace(tmp_path):
+    source = tmp_path / "example.c_pm"
+    source.write_text("{{ items }}\n\n\n")
+    destination = tmp_path / "example.c"
+
+    epcpm.c.render(
+        source=source,
+        destination=destination,
+        context={"items": epcpm.c.format_nested_lists(["a;", ["b;"], "  "])},
+        encoding="utf-16",
+    )
+
+    assert destination.read_bytes() == "a;\n    b;\n".encode("utf-16")
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "example.c",
+        "example.c_pm",
+    ]
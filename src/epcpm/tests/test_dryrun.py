@@ -0,0 +1,33 @@
+import epcpm.dryrun
+
+
+def test_text_change(tmp_path):
+    path = tmp_path / "interface" / "generated.c"
+    path.parent.mkdir()
+    path.write_text("int a;\nint b;\nint c;\n")
+
+    change = epcpm.dryrun.change(
+        path=path,
+        data=b"int a;\nint x;\nint y;\nint c;\n",
+        target_directory=tmp_path,
+    )
+
+    assert change.name == "interface/generated.c"
+    assert (change.added, change.removed) == (2, 1)
+    assert change.summary() == "interface/generated.c: +2 -1"
+    assert "-int b;\n" in change.diff
+
+
+def test_new_and_binary_files(tmp_path):
+    changes = epcpm.dryrun.changes(
+        changed={
+            tmp_path / "b.xlsx": b"PK\x03\x04\xff",
+            tmp_path / "a.h": b"int a;\n",
+        },
+        target_directory=tmp_path,
+    )
+
+    assert [change.summary() for change in changes] == [
+        "a.h: new, +1 -0",
+        "b.xlsx: new, binary",
+    ]
@@ -0,0 +1,73 @@
+import pathlib
+
+import epyqlib.pm.parametermodel
+
+import epcpm.exportcontext
+import epcpm.project
+import epcpm.sunspecmodel
+
+
+here = pathlib.Path(__file__).parent
+
+
+def load_context():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+
+    return project, epcpm.exportcontext.ExportContext.from_project(project)
+
+
+def test_parameter_uuid_to_node_reused():
+    project, context = load_context()
+
+    types = (epcpm.sunspecmodel.DataPoint,)
+    mapping = context.parameter_uuid_to_node(name="sunspec1", types=types)
+
+    assert mapping == project.index["sunspec1"].parameter_uuid_to_node(types=types)
+    assert context.parameter_uuid_to_node(name="sunspec1", types=types) is mapping
+
+
+def test_scale_factors_reused_per_block():
+    project, context = load_context()
+
+    block = epcpm.sunspecmodel.FixedBlock()
+    project.models.sunspec1.root.append_child(block)
+    finder = project.models.parameters.node_from_uuid
+
+    scale_factors = context.scale_factors(block=block, parameter_uuid_finder=finder)
+
+    assert context.scale_factors(block=block, parameter_uuid_finder=finder) is (
+        scale_factors
+    )
+
+
+def test_enumerations_in_tree_order():
+    project, context = load_context()
+
+    expected = project.models.parameters.root.nodes_by_filter(
+        filter=lambda node: isinstance(
+            node,
+            (
+                epyqlib.pm.parametermodel.Enumeration,
+                epyqlib.pm.parametermodel.AccessLevels,
+            ),
+        ),
+    )
+
+    enumerations = context.enumerations()
+    assert set(enumerations) == set(expected)
+
+    enumerations.clear()
+    assert len(context.enumerations()) == len(expected)
+
+
+def test_workers_only_given_saved_project():
+    project, context = load_context()
+
+    assert context.project_path == project.filename
+
+    project.models.parameters.root.append_child(epyqlib.pm.parametermodel.Group())
+
+    context = epcpm.exportcontext.ExportContext.from_project(project, jobs=2)
+
+    assert context.jobs == 2
+    assert context.project_path is None
@@ -0,0 +1,69 @@
+import epyqlib.attrsmodel
+import epyqlib.pm.parametermodel
+
+import epcpm.fragmentcache
+
+
+def finder_for(*nodes):
+    by_uuid = {node.uuid: node for node in nodes}
+
+    def finder(uuid_):
+        try:
+            return by_uuid[uuid_]
+        except KeyError:
+            raise epyqlib.attrsmodel.NotFoundError(uuid_)
+
+    return finder
+
+
+def test_node_hash_follows_subtree():
+    group = epyqlib.pm.parametermodel.Group(name="group")
+    parameter = epyqlib.pm.parametermodel.Parameter(name="parameter")
+    group.append_child(parameter)
+
+    original = epcpm.fragmentcache.node_hash(group)
+    assert epcpm.fragmentcache.node_hash(group) == original
+
+    parameter.internal_variable = "variable"
+    assert epcpm.fragmentcache.node_hash(group) != original
+
+
+def test_fragment_reused_while_dependencies_unchanged(tmp_path):
+    path = tmp_path / epcpm.fragmentcache.cache_name
+    access_level = epyqlib.pm.parametermodel.AccessLevel(name="user", value=0)
+    finder = finder_for(access_level)
+
+    tracking = epcpm.fragmentcache.TrackingFinder(finder=finder)
+    tracking(access_level.uuid)
+    dependencies = tracking.dependencies(
+        subtree=epyqlib.pm.parametermodel.Group(),
+    )
+    assert dependencies == {
+        access_level.uuid: epcpm.fragmentcache.node_hash(access_level),
+    }
+
+    built = (["item"], ["declaration"], {1}, set(), {})
+    cache = epcpm.fragmentcache.FragmentCache.read(path=path, shared_key="shared")
+    assert cache.get(subtree_key="group", finder=finder) is None
+    cache.put(subtree_key="group", built=built, dependencies=dependencies)
+    cache.write()
+
+    cache = epcpm.fragmentcache.FragmentCache.read(path=path, shared_key="shared")
+    assert cache.get(subtree_key="group", finder=finder) == built
+
+    access_level.name = "service"
+    cache = epcpm.fragmentcache.FragmentCache.read(path=path, shared_key="shared")
+    assert cache.get(subtree_key="group", finder=finder) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_other_shared_key_discards_fragments(tmp_path):
+    path = tmp_path / epcpm.fragmentcache.cache_name
+    finder = finder_for()
+
+    cache = epcpm.fragmentcache.FragmentCache.read(path=path, shared_key="shared")
+    cache.put(subtree_key="group", built=([], [], set(), set(), {}), dependencies={})
+    cache.write()
+
+    cache = epcpm.fragmentcache.FragmentCache.read(path=path, shared_key="other")
+    assert cache.get(subtree_key="group", finder=finder) is None
@@ -0,0 +1,113 @@
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import epcpm.generationscripts
+
+
+# each waits for the other to have started, so on the first run they must run
+# concurrently, later runs find the markers left behind
+code = textwrap.dedent(
+    """\
+    import pathlib
+    import sys
+    import time
+
+    name, other, source, output = sys.argv[1:]
+
+    pathlib.Path(name + ".started").touch()
+    deadline = time.monotonic() + 10
+    while not pathlib.Path(other + ".started").exists():
+        if time.monotonic() > deadline:
+            sys.exit(1)
+        time.sleep(0.01)
+
+    text = pathlib.Path(source).read_text()
+    if text == "fail\\n":
+        sys.exit(1)
+    pathlib.Path(output).write_text(text.upper())
+    """
+)
+
+
+@pytest.fixture
+def base_path(tmp_path, monkeypatch):
+    def scripts(base_path):
+        return tuple(
+            epcpm.generationscripts.Script(
+                name=name,
+                arguments=[
+                    sys.executable,
+                    "-c",
+                    code,
+                    str(base_path / name),
+                    str(base_path / other),
+                    str(base_path / f"{name}.in"),
+                    str(base_path / f"{name}.out"),
+                ],
+                inputs=[base_path / f"{name}.in"],
+                outputs=lambda name=name: [base_path / f"{name}.out"],
+            )
+            for name, other in (("a", "b"), ("b", "a"))
+        )
+
+    monkeypatch.setattr(epcpm.generationscripts, "scripts", scripts)
+
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.in").write_text(f"{name}\n")
+
+    return tmp_path
+
+
+def run(base_path):
+    results = epcpm.generationscripts.run(base_path=base_path)
+
+    return [result.name for result in results if not result.skipped]
+
+
+def test_run_concurrently_then_skipped(base_path):
+    assert run(base_path) == ["a", "b"]
+    assert (base_path / "a.out").read_text() == "A\n"
+    assert (base_path / "b.out").read_text() == "B\n"
+
+    assert run(base_path) == []
+
+
+def test_changed_input_reruns(base_path):
+    run(base_path)
+
+    (base_path / "a.in").write_text("c\n")
+
+    assert run(base_path) == ["a"]
+    assert (base_path / "a.out").read_text() == "C\n"
+
+
+def test_changed_output_reruns(base_path):
+    run(base_path)
+
+    (base_path / "b.out").write_text("edited\n")
+
+    assert run(base_path) == ["b"]
+
+
+def test_forced(base_path):
+    run(base_path)
+
+    results = epcpm.generationscripts.run(base_path=base_path, force=True)
+
+    assert [result.skipped for result in results] == [False, False]
+
+
+def test_failure_is_not_recorded(base_path):
+    (base_path / "b.in").write_text("fail\n")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        run(base_path)
+
+    assert (base_path / "a.out").read_text() == "A\n"
+
+    (base_path / "b.in").write_text("b\n")
+
+    assert run(base_path) == ["b"]
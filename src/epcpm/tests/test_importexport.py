@@ -0,0 +1,252 @@
+import pathlib
+import shutil
+
+import pytest
+
+import epcpm.importexport
+import epcpm.importexportpaths
+import epcpm.profiling
+import epcpm.project
+import epcpm.staleness
+import epcpm.writer
+
+
+example_directory = pathlib.Path(__file__).parent
+
+
+@pytest.fixture
+def target(tmp_path, monkeypatch):
+    target_path = tmp_path / "target"
+    project_directory = target_path / "interface" / "pm"
+    project_directory.mkdir(parents=True)
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(example_directory / name, project_directory / name)
+
+    runs = []
+
+    def exporter(name, models):
+        def export(project, paths, target_directory, options, context):
+            runs.append(name)
+            for model in models:
+                project.models[model]
+            (target_directory / name).write_text(f"{name} {len(runs)}\n")
+
+        return epcpm.importexport.Exporter(
+            name=name,
+            export=export,
+            models=models,
+            outputs=lambda paths: (target_path / name,),
+        )
+
+    monkeypatch.setattr(
+        epcpm.importexport,
+        "exporters",
+        (
+            exporter(name="parameters", models=("parameters",)),
+            exporter(name="can", models=("parameters", "can")),
+        ),
+    )
+
+    return project_directory / "example_project.pmp", target_path, runs
+
+
+def export(project_path, target_path, only_stale=True):
+    project = epcpm.project.loadp(project_path, lazy=True, headless=True)
+
+    epcpm.importexport.full_export(
+        project=project,
+        paths=epcpm.importexportpaths.paths_from_directory(target_path),
+        target_directory=target_path,
+        only_stale=only_stale,
+    )
+
+    return project
+
+
+def test_unchanged_skips_everything(target):
+    project_path, target_path, runs = target
+
+    export(project_path, target_path)
+    assert runs == ["parameters", "can"]
+    assert not epcpm.staleness.is_stale(
+        project=project_path,
+        target_directory=target_path,
+    )
+
+    runs.clear()
+    project = export(project_path, target_path)
+    assert runs == []
+    assert not any(project.models.loaded(name) for name in project.models)
+
+
+def test_model_change_reruns_readers(target):
+    project_path, target_path, runs = target
+    export(project_path, target_path)
+
+    can_path = project_path.with_name("example_can.json")
+    can_path.write_text(can_path.read_text() + "\n")
+    assert epcpm.staleness.is_stale(project=project_path, target_directory=target_path)
+
+    runs.clear()
+    export(project_path, target_path)
+    assert runs == ["can"]
+    assert not epcpm.staleness.is_stale(
+        project=project_path,
+        target_directory=target_path,
+    )
+
+
+def test_output_change_reruns_writer(target):
+    project_path, target_path, runs = target
+    export(project_path, target_path)
+
+    (target_path / "parameters").write_text("edited\n")
+
+    runs.clear()
+    export(project_path, target_path)
+    assert runs == ["parameters"]
+
+
+def test_all_exporters_without_only_stale(target):
+    project_path, target_path, runs = target
+    export(project_path, target_path)
+
+    runs.clear()
+    export(project_path, target_path, only_stale=False)
+    assert runs == ["parameters", "can"]
+
+
+def test_parallel_matches_serial(target):
+    project_path, target_path, runs = target
+
+    export(project_path, target_path, only_stale=False)
+    serial = epcpm.staleness.read_manifest(target_path)
+
+    project = epcpm.project.loadp(project_path, lazy=True, headless=True)
+    epcpm.importexport.full_export(
+        project=project,
+        paths=epcpm.importexportpaths.paths_from_directory(target_path),
+        target_directory=target_path,
+        jobs=2,
+    )
+    parallel = epcpm.staleness.read_manifest(target_path)
+
+    # the fake exporters run in the workers so they don't show up in runs
+    assert runs == ["parameters", "can"]
+    assert parallel["exporters"].keys() == serial["exporters"].keys()
+    for name, entry in parallel["exporters"].items():
+        assert entry["inputs"] == serial["exporters"][name]["inputs"]
+    assert not epcpm.staleness.is_stale(
+        project=project_path,
+        target_directory=target_path,
+    )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_failure_names_exporter(target, monkeypatch, jobs):
+    project_path, target_path, runs = target
+
+    def fail(project, paths, target_directory, options, context):
+        raise Exception("broken")
+
+    exporters = epcpm.importexport.exporters
+    monkeypatch.setattr(
+        epcpm.importexport,
+        "exporters",
+        (
+            exporters[0],
+            epcpm.importexport.Exporter(
+                name="broken",
+                export=fail,
+                models=(),
+                outputs=lambda paths: (),
+            ),
+            epcpm.importexport.Exporter(
+                name="dependent",
+                export=fail,
+                models=(),
+                outputs=lambda paths: (),
+                requires=("broken",),
+            ),
+            exporters[1],
+        ),
+    )
+
+    project = epcpm.project.loadp(project_path, lazy=True, headless=True)
+
+    with pytest.raises(epcpm.importexport.ExportError, match="'broken' failed$"):
+        epcpm.importexport.full_export(
+            project=project,
+            paths=epcpm.importexportpaths.paths_from_directory(target_path),
+            target_directory=target_path,
+            jobs=jobs,
+        )
+
+    assert (target_path / "can").exists()
+    assert epcpm.staleness.read_manifest(target_path) is None
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_profiles_exporters(target, jobs):
+    project_path, target_path, runs = target
+
+    profiler = epcpm.profiling.Profiler(directory=target_path / "calls")
+    project = epcpm.project.loadp(project_path, lazy=True, headless=True)
+    epcpm.importexport.full_export(
+        project=project,
+        paths=epcpm.importexportpaths.paths_from_directory(target_path),
+        target_directory=target_path,
+        jobs=jobs,
+        profiler=profiler,
+    )
+
+    measurements = {m.name: m for m in profiler.measurements}
+    assert measurements.keys() == {"parameters", "can"}
+    for name, measurement in measurements.items():
+        assert measurement.output_bytes == (target_path / name).stat().st_size
+        assert (target_path / "calls" / f"{name}.prof").is_file()
+
+
+def test_dry_run_writes_nothing(target, monkeypatch):
+    project_path, target_path, runs = target
+
+    def export(project, paths, target_directory, options, context):
+        runs.append("written")
+        epcpm.writer.write_text(path=target_directory / "written", text="new\n")
+
+    def external(project, paths, target_directory, options, context):
+        runs.append("external")
+
+    monkeypatch.setattr(
+        epcpm.importexport,
+        "exporters",
+        (
+            epcpm.importexport.Exporter(
+                name="written",
+                export=export,
+                models=(),
+                outputs=lambda paths: (target_path / "written",),
+            ),
+            epcpm.importexport.Exporter(
+                name="external",
+                export=external,
+                models=(),
+                outputs=lambda paths: (),
+                requires=("written",),
+                dry_run=False,
+            ),
+        ),
+    )
+
+    project = epcpm.project.loadp(project_path, lazy=True, headless=True)
+    changed, counts = epcpm.importexport.dry_run_export(
+        project=project,
+        paths=epcpm.importexportpaths.paths_from_directory(target_path),
+        target_directory=target_path,
+    )
+
+    assert runs == ["written"]
+    assert changed == {target_path / "written": b"new\n"}
+    assert counts == epcpm.writer.Counts(written=1, skipped=0)
+    assert not (target_path / "written").exists()
+    assert epcpm.staleness.read_manifest(target_path) is None
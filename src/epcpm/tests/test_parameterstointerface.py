@@ -0,0 +1,375 @@
+import pathlib
+import uuid
+
+import pytest
+
+import epyqlib.pm.parametermodel
+
+import epcpm.c
+import epcpm.canmodel
+import epcpm.exportcontext
+import epcpm.fragmentcache
+import epcpm.parameterstointerface
+import epcpm.project
+import epcpm.smdxtosunspec
+import epcpm.sunspecmodel
+
+
+here = pathlib.Path(__file__).parent
+
+
+@pytest.fixture
+def interface_project(tmp_path):
+    """A saved project with a table, a SunSpec model and groups of
+    parameters on CAN, some with rejected callbacks, that all build items.
+    """
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+    parameter_model = project.models.parameters
+
+    enumerations = parameter_model.list_selection_roots["enumerations"]
+    (access_levels,) = (
+        child
+        for child in enumerations.children
+        if isinstance(child, epyqlib.pm.parametermodel.AccessLevels)
+    )
+    sunspec_types = epcpm.sunspecmodel.build_sunspec_types_enumeration()
+    enumerations.append_child(sunspec_types)
+    parameter_model.list_selection_roots["sunspec types"] = sunspec_types
+    (int16,) = (child for child in sunspec_types.children if child.name == "int16")
+
+    (model,) = epcpm.smdxtosunspec.import_models(
+        1,
+        parameter_model=parameter_model,
+        paths=[here / "sunspec"],
+    )
+    project.models.sunspec1.root.append_child(model)
+    (block,) = (
+        child
+        for child in model.children
+        if isinstance(child, epcpm.sunspecmodel.FixedBlock)
+    )
+    for point in block.children:
+        parameter = parameter_model.node_from_uuid(point.parameter_uuid)
+        sunspec_type = parameter_model.node_from_uuid(point.type_uuid)
+        parameter.internal_variable = f"sunspecModel1.{parameter.abbreviation}"
+        parameter.internal_type = (
+            "PackedString" if sunspec_type.name == "string" else "uint16_t"
+        )
+        parameter.access_level_uuid = access_levels.children[0].uuid
+
+    # the table's points need a type, and its curves are numbered
+    (table,) = parameter_model.root.descendent("Tables").children
+    (sunspec_table,) = (
+        child
+        for child in project.models.sunspec1.root.children
+        if isinstance(child, epcpm.sunspecmodel.Table)
+    )
+    for point in sunspec_table.nodes_by_filter(
+        filter=lambda node: isinstance(node, epcpm.sunspecmodel.DataPoint),
+    ):
+        point.type_uuid = int16.uuid
+    staticmodbus_root = project.models.staticmodbus.root
+    for child in list(staticmodbus_root.children):
+        staticmodbus_root.remove_child(child=child)
+    (curves,) = (
+        child for child in enumerations.children if child.name == "Enumeration Two"
+    )
+    for number, curve in enumerate(curves.children, start=1):
+        curve.name = str(number)
+    table.update()
+    arrays = (
+        child
+        for child in table.children
+        if isinstance(child, epyqlib.pm.parametermodel.Array)
+    )
+    for axis, array in zip("xy", arrays):
+        parameter = array.children[0]
+        parameter.internal_variable = (
+            f"table.zones[{{curve_type}}].curves[{{curve_index}}].{axis}"
+        )
+        parameter.internal_type = "int16_t"
+        parameter.access_level_uuid = access_levels.children[0].uuid
+
+    for group_index in range(3):
+        group = epyqlib.pm.parametermodel.Group(name=f"Group {group_index}")
+        parameter_model.root.append_child(group)
+        message = epcpm.canmodel.Message(
+            name=f"Group{group_index}",
+            identifier=0x100 + group_index,
+        )
+        project.models.can.root.append_child(message)
+
+        for index in range(3):
+            parameter = epyqlib.pm.parametermodel.Parameter(
+                name=f"Parameter {index}",
+                internal_variable=f"group{group_index}.parameter{index}",
+                internal_type="int16_t",
+                access_level_uuid=access_levels.children[index % 2].uuid,
+                rejected_callback=f"rejected{group_index}" if index == 0 else None,
+            )
+            group.append_child(parameter)
+            message.append_child(
+                epcpm.canmodel.Signal(
+                    name=f"Parameter{index}",
+                    bits=16,
+                    start_bit=16 * index,
+                    parameter_uuid=parameter.uuid,
+                ),
+            )
+
+    project.filename = tmp_path / "project" / "project.pmp"
+    project.filename.parent.mkdir()
+    project.save()
+
+    return project.filename
+
+
+def interface_builder(project):
+    return epcpm.parameterstointerface.root_builder(
+        parameters_model=project.models.parameters,
+        can_model=project.models.can,
+        sunspec1_model=project.models.sunspec1,
+        sunspec2_model=project.models.sunspec2,
+        staticmodbus_model=project.models.staticmodbus,
+        skip_output=False,
+        include_uuid_in_item=True,
+        export_context=epcpm.exportcontext.ExportContext.from_project(project),
+    )
+
+
+def export_interface(project, directory, **kwargs):
+    """Export the interface with minimal templates and return the contents
+    of the rendered files by name.
+    """
+    templates = {
+        directory / "interfaceGen.c": "{{ interface_items }}\n",
+        directory / "interfaceGen.h": "{{ declarations }}\n",
+        directory
+        / "rejectedCallbackHandler.c": ("{{ uuid_keys }}\n{{ intf_func_list }}\n"),
+    }
+    directory.mkdir()
+    for path, template in templates.items():
+        path.with_suffix(f"{path.suffix}_pm").write_text(template)
+
+    epcpm.parameterstointerface.export(
+        c_path=directory / "interfaceGen.c",
+        h_path=directory / "interfaceGen.h",
+        c_path_rejected_callback=directory / "rejectedCallbackHandler.c",
+        parameters_model=project.models.parameters,
+        can_model=project.models.can,
+        sunspec1_model=project.models.sunspec1,
+        sunspec2_model=project.models.sunspec2,
+        staticmodbus_model=project.models.staticmodbus,
+        include_uuid_in_item=True,
+        export_context=epcpm.exportcontext.ExportContext.from_project(project),
+        **kwargs,
+    )
+
+    return {path.name: path.read_text() for path in templates}
+
+
+def test_merge_built_keeps_order():
+    first = uuid.uuid4()
+    second = uuid.uuid4()
+
+    merged = epcpm.parameterstointerface.merge_built(
+        [
+            (["a"], ["a;"], {1}, set(), {first: "first"}),
+            (["b", ["c"]], [], {1, 2}, {3}, {second: "second"}),
+        ]
+    )
+
+    assert merged == (
+        ["a", "b", ["c"]],
+        ["a;"],
+        {1, 2},
+        {3},
+        {first: "first", second: "second"},
+    )
+    assert list(merged[4]) == [first, second]
+
+
+def test_interface_project_builds_items(interface_project):
+    project = epcpm.project.loadp(interface_project)
+
+    children_built = interface_builder(project).gen(merged=False)
+
+    assert len(children_built) == 5
+    for child, (c, h, *_) in children_built:
+        assert c != [] and h != [], child.name
+    (
+        c,
+        h,
+        model1_ids,
+        model2_ids,
+        rejected_callback_dict,
+    ) = epcpm.parameterstointerface.merge_built(built for _, built in children_built)
+    assert model1_ids == {1}
+    assert sorted(rejected_callback_dict.values()) == [
+        "rejected0",
+        "rejected1",
+        "rejected2",
+    ]
+
+
+def test_parallel_matches_serial(interface_project, tmp_path):
+    project = epcpm.project.loadp(interface_project)
+
+    serial = export_interface(project=project, directory=tmp_path / "serial")
+    parallel = export_interface(
+        project=project,
+        directory=tmp_path / "parallel",
+        jobs=2,
+        project_path=interface_project,
+    )
+
+    assert "interfaceItem_" in serial["interfaceGen.c"]
+    assert "rejected0" in serial["rejectedCallbackHandler.c"]
+    assert parallel == serial
+
+
+def test_cached_matches_uncached(interface_project, tmp_path):
+    project = epcpm.project.loadp(interface_project)
+    parameter_model = project.models.parameters
+    builder = interface_builder(project)
+    children = len(builder.children())
+
+    def cached():
+        cache = epcpm.fragmentcache.FragmentCache.read(
+            path=tmp_path / epcpm.fragmentcache.cache_name,
+            shared_key=builder.cache_key(),
+        )
+        built = builder.gen(cache=cache)
+        cache.write()
+
+        return built, (cache.hits, cache.misses)
+
+    assert cached() == (builder.gen(), (0, children))
+    assert cached() == (builder.gen(), (children, 0))
+
+    # only used by the second parameter of each group, outside of them
+    enumerations = parameter_model.list_selection_roots["enumerations"]
+    (access_levels,) = (
+        child
+        for child in enumerations.children
+        if isinstance(child, epyqlib.pm.parametermodel.AccessLevels)
+    )
+    access_levels.children[1].name = "Them"
+    built, (hits, misses) = cached()
+    assert "CAN_Enum_AccessLevel_Them" in epcpm.c.format_nested_lists(built[0])
+    assert built == builder.gen()
+    assert (hits, misses) == (children - 3, 3)
+
+    (variant,) = (
+        child for child in enumerations.children if child.name == "CmmControlsVariant"
+    )
+    variant.children[0].name = "Other"
+    assert cached() == (builder.gen(), (children, 0))
+
+
+def test_group_paths_named_after_groups():
+    c_path = pathlib.Path("interface") / "interfaceGen.c"
+    groups = [
+        epyqlib.pm.parametermodel.Group(name="Grid Limits"),
+        epyqlib.pm.parametermodel.Group(name="grid-limits"),
+        epyqlib.pm.parametermodel.Group(name="!"),
+    ]
+
+    paths = epcpm.parameterstointerface.group_paths(c_path=c_path, groups=groups)
+
+    assert [path.name for path in paths] == [
+        "interfaceGen_Grid_Limits.c",
+        f"interfaceGen_grid_limits_{groups[1].uuid.hex[:8]}.c",
+        f"interfaceGen_{groups[2].uuid.hex[:8]}.c",
+    ]
+
+
+def test_group_list_removes_ungenerated_files(tmp_path):
+    c_path = tmp_path / "interfaceGen.c"
+    first = tmp_path / "interfaceGen_First.c"
+    second = tmp_path / "interfaceGen_Second.c"
+    unlisted = tmp_path / "interfaceGen_Manual.c"
+    for path in (c_path, first, second, unlisted):
+        path.write_text("")
+
+    epcpm.parameterstointerface.update_group_list(c_path=c_path, paths=[first, second])
+    assert epcpm.parameterstointerface.listed_paths(c_path) == [c_path, first, second]
+
+    epcpm.parameterstointerface.update_group_list(c_path=c_path, paths=[second])
+    assert epcpm.parameterstointerface.listed_paths(c_path) == [c_path, second]
+    assert not first.exists()
+
+    epcpm.parameterstointerface.update_group_list(c_path=c_path, paths=None)
+    assert epcpm.parameterstointerface.listed_paths(c_path) == []
+    assert not epcpm.parameterstointerface.group_list_path(c_path).exists()
+    assert not second.exists()
+    assert c_path.exists()
+    assert unlisted.exists()
+
+
+def test_unmerged_children_match_merged(interface_project):
+    project = epcpm.project.loadp(interface_project)
+    builder = interface_builder(project)
+
+    children_built = builder.gen(merged=False)
+
+    assert [child for child, _ in children_built] == builder.children()
+    assert (
+        epcpm.parameterstointerface.merge_built(built for _, built in children_built)
+        == builder.gen()
+    )
+
+
+def test_rejected_callbacks_sorted_by_uuid_words():
+    # ordered by their words, each low byte first, rather than as UUIDs
+    second = uuid.UUID("00ff0000-0000-0000-0000-000000000000")
+    first = uuid.UUID("ff000000-0000-0000-0000-000000000001")
+    third = uuid.UUID("ffff0000-0000-0000-0000-000000000000")
+    callbacks = {
+        third: "lastRejected",
+        second: "firstRejected",
+        first: "lastRejected",
+    }
+
+    context = epcpm.parameterstointerface.rejected_callback_context(callbacks)
+    reversed_context = epcpm.parameterstointerface.rejected_callback_context(
+        dict(reversed(list(callbacks.items()))),
+    )
+
+    assert context == reversed_context
+    assert context["uuid_keys"] == [
+        "{0x00ff, 0x0000, 0x0000, 0x0000, 0x0000, 0x0000, 0x0000, 0x0100}",
+        "{0xff00, 0x0000, 0x0000, 0x0000, 0x0000, 0x0000, 0x0000, 0x0000}",
+        "{0xffff, 0x0000, 0x0000, 0x0000, 0x0000, 0x0000, 0x0000, 0x0000}",
+    ]
+    assert context["rejected_callback_functions"] == ["firstRejected", "lastRejected"]
+    assert context["rejected_callback_function_indexes"] == [1, 0, 1]
+    assert context["intf_func_list"] == [
+        "lastRejected",
+        "firstRejected",
+        "lastRejected",
+    ]
+
+
+def test_split_needs_group_template(tmp_path):
+    project = epcpm.project.loadp(here / "example_project.pmp")
+
+    c_path = tmp_path / "interfaceGen.c"
+    for path in (c_path, c_path.with_suffix(".h")):
+        path.with_suffix(f"{path.suffix}_pm").write_text("{{ interface_items }}\n")
+
+    with pytest.raises(epcpm.parameterstointerface.MissingGroupTemplateError):
+        epcpm.parameterstointerface.export(
+            c_path=c_path,
+            h_path=c_path.with_suffix(".h"),
+            c_path_rejected_callback=tmp_path / "rejectedCallbackHandler.c",
+            parameters_model=project.models.parameters,
+            can_model=project.models.can,
+            sunspec1_model=project.models.sunspec1,
+            sunspec2_model=project.models.sunspec2,
+            staticmodbus_model=project.models.staticmodbus,
+            skip_output=True,
+            split=True,
+        )
+
+    assert not c_path.exists()
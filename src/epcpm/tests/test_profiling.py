@@ -0,0 +1,64 @@
+import pstats
+
+import pytest
+
+import epcpm.profiling
+import epcpm.staleness
+
+
+def test_measures_block(tmp_path):
+    profiler = epcpm.profiling.Profiler()
+    output = tmp_path / "output"
+
+    with profiler.measure(name="exporter", outputs=lambda: [output]):
+        data = bytes(1_000_000)
+        output.write_bytes(data[:123])
+        del data
+
+    (measurement,) = profiler.measurements
+    assert measurement.name == "exporter"
+    assert measurement.wall_seconds >= 0
+    assert measurement.cpu_seconds >= 0
+    assert measurement.peak_memory_bytes >= 1_000_000
+    assert measurement.output_bytes == 123
+    assert measurement.profile_path is None
+    assert not measurement.failed
+
+
+def test_records_failure():
+    profiler = epcpm.profiling.Profiler()
+
+    with pytest.raises(Exception, match="broken"):
+        with profiler.measure(name="exporter", outputs=lambda: []):
+            raise Exception("broken")
+
+    (measurement,) = profiler.measurements
+    assert measurement.failed
+    assert measurement.output_bytes is None
+
+
+def test_dumps_call_profile(tmp_path):
+    profiler = epcpm.profiling.Profiler(directory=tmp_path / "calls")
+
+    with profiler.measure(name="sunspec1 csv"):
+        sorted(range(1000))
+
+    (measurement,) = profiler.measurements
+    assert measurement.profile_path == str(tmp_path / "calls" / "sunspec1_csv.prof")
+    pstats.Stats(measurement.profile_path)
+
+
+def test_report(tmp_path):
+    profiler = epcpm.profiling.Profiler()
+
+    with epcpm.profiling.measuring(profiler=profiler, name="project load"):
+        pass
+
+    with epcpm.profiling.measuring(profiler=None, name="ignored"):
+        pass
+
+    path = tmp_path / "profile.json"
+    profiler.write_report(path)
+
+    report = epcpm.staleness.read_json(path)
+    assert [m["name"] for m in report["measurements"]] == ["project load"]
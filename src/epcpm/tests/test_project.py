@@ -1,11 +1,19 @@
+import shutil
 import textwrap
+import uuid
 
 import graham
+import pytest
 
+import epcpm.canmodel
+import epcpm.headlessmodel
 import epcpm.project
+import epcpm.snapshot
+import epcpm.staleness
 
 import pathlib
 
+import epyqlib
 import epyqlib.pm
 
 reference_string = textwrap.dedent(
@@ -104,3 +112,256 @@ def test_model_proper_selection_roots():
     expected = epyqlib.pm.parametermodel.types.list_selection_roots()
 
     assert set(project.models.parameters.list_selection_roots.keys()) == expected
+
+
+def test_lazy_load_defers_models():
+    project = epcpm.project.loadp(
+        pathlib.Path(__file__).with_name("example_project.pmp"),
+        lazy=True,
+    )
+
+    assert not any(project.models.loaded(name) for name in project.models)
+
+    project.models.parameters
+
+    assert project.models.loaded("parameters")
+    assert not project.models.loaded("can")
+
+    expected = epyqlib.pm.parametermodel.types.list_selection_roots()
+
+    assert set(project.models.parameters.list_selection_roots.keys()) == expected
+
+
+def test_lazy_load_connects_on_access():
+    project = epcpm.project.loadp(
+        pathlib.Path(__file__).with_name("example_project.pmp"),
+        lazy=True,
+    )
+
+    can = project.models.can
+
+    assert project.models.loaded("parameters")
+    assert can.droppable_from == {project.models.parameters, can}
+    assert "enumerations" in can.list_selection_roots
+    assert not project.models.loaded("sunspec1")
+
+
+def test_parallel_load_matches_serial(monkeypatch):
+    path = pathlib.Path(__file__).with_name("example_project.pmp")
+    # so the workers are also used on a single processor
+    monkeypatch.setattr(epcpm.project.os, "cpu_count", lambda: 2)
+
+    serial = epcpm.project.loadp(path)
+    parallel = epcpm.project.loadp(path, parallel=True)
+
+    for name in ("parameters", "can"):
+        assert (
+            graham.dumps(parallel.models[name].root, indent=4).data
+            == graham.dumps(serial.models[name].root, indent=4).data
+        )
+
+
+def test_deserialize_model_file():
+    path = pathlib.Path(__file__).with_name("example_parameters.json")
+    root_type, _ = epcpm.project.model_types["parameters"]
+
+    encoded = epcpm.project.deserialize_model_file(name="parameters", path=path)
+    root = epcpm.snapshot.decode(encoded, root_type=root_type)
+
+    assert (
+        graham.dumps(root, indent=4).data
+        == graham.dumps(
+            graham.schema(root_type).loads(path.read_text()).data, indent=4
+        ).data
+    )
+
+
+def test_headless_load_matches_qt():
+    path = pathlib.Path(__file__).with_name("example_project.pmp")
+
+    qt = epcpm.project.loadp(path)
+    headless = epcpm.project.loadp(path, headless=True)
+
+    for name in ("parameters", "can"):
+        model = headless.models[name]
+
+        assert isinstance(model, epcpm.headlessmodel.Model)
+        assert (
+            graham.dumps(model.root, indent=4).data
+            == graham.dumps(qt.models[name].root, indent=4).data
+        )
+
+    can = headless.models.can
+    parameters = headless.models.parameters
+    parameter = parameters.root.children[0]
+
+    assert can.droppable_from == {parameters, can}
+    assert can.node_from_uuid(parameter.uuid) is parameter
+    missing = uuid.uuid4()
+    assert can.nodes_from_uuid_list([parameter.uuid, missing]) == [
+        parameter,
+        str(missing),
+    ]
+    assert set(parameters.list_selection_roots.keys()) == set(
+        qt.models.parameters.list_selection_roots.keys()
+    )
+    assert headless.trackers.can is None
+
+
+def test_snapshot_load(tmp_path):
+    source = pathlib.Path(__file__).with_name("example_project.pmp")
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(source.with_name(name), tmp_path / name)
+    path = tmp_path / "example_project.pmp"
+
+    reference = epcpm.project.loadp(path)
+
+    epcpm.project.loadp(path, snapshot=True)
+    snapshot_path = epcpm.snapshot.path_for(path)
+    assert snapshot_path.exists()
+
+    project = epcpm.project.loadp(path, snapshot=True)
+
+    for name in ("parameters", "can"):
+        assert (
+            graham.dumps(project.models[name].root, indent=4).data
+            == graham.dumps(reference.models[name].root, indent=4).data
+        )
+
+    expected = epyqlib.pm.parametermodel.types.list_selection_roots()
+
+    assert set(project.models.parameters.list_selection_roots.keys()) == expected
+
+
+def test_snapshot_invalidated_by_source_change(tmp_path):
+    source = pathlib.Path(__file__).with_name("example_project.pmp")
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(source.with_name(name), tmp_path / name)
+    path = tmp_path / "example_project.pmp"
+
+    project = epcpm.project.loadp(path, snapshot=True)
+    key = epcpm.snapshot.key(project_path=path, paths=project.paths)
+
+    can_path = tmp_path / "example_can.json"
+    can_path.write_text(can_path.read_text() + "\n")
+
+    assert epcpm.snapshot.key(project_path=path, paths=project.paths) != key
+    assert (
+        epcpm.snapshot.read(
+            path=epcpm.snapshot.path_for(path),
+            expected_key=epcpm.snapshot.key(project_path=path, paths=project.paths),
+        )
+        is None
+    )
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda monkeypatch: monkeypatch.setattr(
+            epcpm.staleness, "code_hash", lambda: "changed"
+        ),
+        lambda monkeypatch: monkeypatch.setattr(epyqlib, "__version__", "changed"),
+    ],
+    ids=["epcpm", "epyqlib"],
+)
+def test_snapshot_invalidated_by_code_change(tmp_path, monkeypatch, change):
+    source = pathlib.Path(__file__).with_name("example_project.pmp")
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(source.with_name(name), tmp_path / name)
+    path = tmp_path / "example_project.pmp"
+
+    project = epcpm.project.loadp(path, snapshot=True)
+    key = epcpm.snapshot.key(project_path=path, paths=project.paths)
+
+    change(monkeypatch)
+
+    assert epcpm.snapshot.key(project_path=path, paths=project.paths) != key
+
+
+def test_reference_fields():
+    assert epcpm.project.reference_fields(epcpm.canmodel.MultiplexedMessageClone) == (
+        "original",
+    )
+    assert epcpm.project.reference_fields(epcpm.canmodel.Signal) == ()
+
+
+def test_resolve_forward_reference():
+    root = epcpm.canmodel.Root()
+    original = epcpm.canmodel.MultiplexedMessage()
+    clone = epcpm.canmodel.MultiplexedMessageClone(original=original.uuid)
+    root.append_child(clone)
+    root.append_child(original)
+
+    uuid_to_node = epcpm.project.resolve_references(root)
+
+    assert clone.original is original
+    assert uuid_to_node[original.uuid] is original
+
+
+def test_save_only_writes_changed_models(tmp_path):
+    source = pathlib.Path(__file__).with_name("example_project.pmp")
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(source.with_name(name), tmp_path / name)
+    path = tmp_path / "example_project.pmp"
+
+    project = epcpm.project.loadp(path)
+    project.paths.sunspec1 = "sunspec1.json"
+    project.paths.sunspec2 = "sunspec2.json"
+    project.paths.staticmodbus = "staticmodbus.json"
+    project.save()
+
+    def inodes():
+        return {p.name: p.stat().st_ino for p in tmp_path.iterdir()}
+
+    saved = inodes()
+    assert {"sunspec1.json", "sunspec2.json", "staticmodbus.json"} <= set(saved)
+
+    project.save()
+    assert inodes() == saved
+
+    group = next(
+        child
+        for child in project.models.parameters.root.children
+        if isinstance(child, epyqlib.pm.parametermodel.Group)
+    )
+    group.name += " edited"
+    project.save()
+
+    changed = {name for name, inode in inodes().items() if saved[name] != inode}
+    assert changed == {"example_parameters.json"}
+    assert "edited" in (tmp_path / "example_parameters.json").read_text()
+
+
+def test_reload_models(tmp_path):
+    source = pathlib.Path(__file__).with_name("example_project.pmp")
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(source.with_name(name), tmp_path / name)
+    path = tmp_path / "example_project.pmp"
+
+    project = epcpm.project.loadp(path, lazy=True, headless=True)
+    can = project.models.can
+    original_parameters = project.models.parameters
+
+    editor = epcpm.project.loadp(path, headless=True)
+    group = next(
+        child
+        for child in editor.models.parameters.root.children
+        if isinstance(child, epyqlib.pm.parametermodel.Group)
+    )
+    group.name += " edited"
+    epcpm.project.write_if_changed(
+        tmp_path / "example_parameters.json",
+        graham.dumps(editor.models.parameters.root, indent=4).data,
+    )
+
+    epcpm.project.reload_models(project=project, names=["parameters", "sunspec1"])
+
+    parameters = project.models.parameters
+    assert parameters is not original_parameters
+    assert parameters.node_from_uuid(group.uuid).name.endswith(" edited")
+
+    assert project.models.can is can
+    assert can.droppable_from == {parameters, can}
+    assert not project.models.loaded("sunspec1")
+    assert project.index["parameters"].model is parameters
@@ -0,0 +1,31 @@
+import pathlib
+import shutil
+
+import epcpm.projectcache
+
+
+example_directory = pathlib.Path(__file__).parent
+
+
+def test_reuses_and_reloads(tmp_path):
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(example_directory / name, tmp_path / name)
+    path = tmp_path / "example_project.pmp"
+
+    cache = epcpm.projectcache.ProjectCache()
+
+    project = cache.load(path)
+    can = project.models.can
+    parameters = project.models.parameters
+    assert cache.load(tmp_path / "." / path.name) is project
+    assert project.models.can is can
+
+    can_path = tmp_path / "example_can.json"
+    can_path.write_text(can_path.read_text() + "\n")
+    assert cache.load(path) is project
+    assert project.models.can is not can
+    assert project.models.parameters is parameters
+
+    path.write_text(path.read_text() + "\n")
+    assert cache.load(path) is not project
+    assert len(cache) == 1
@@ -0,0 +1,117 @@
+import pathlib
+import uuid
+
+import epcpm.canmodel
+import epcpm.project
+import epcpm.projectindex
+import epcpm.sunspecmodel
+
+
+here = pathlib.Path(__file__).parent
+
+
+def load_project():
+    return epcpm.project.loadp(here / "project" / "project.pmp")
+
+
+def test_matches_nodes_by_filter():
+    project = load_project()
+
+    wanted_types = (
+        epcpm.sunspecmodel.DataPoint,
+        epcpm.sunspecmodel.DataPointBitfieldMember,
+    )
+
+    nodes = project.models.sunspec1.root.nodes_by_filter(
+        filter=lambda node: (
+            isinstance(node, wanted_types)
+            and getattr(node, "parameter_uuid", None) is not None
+        ),
+    )
+    expected = {node.parameter_uuid: node for node in nodes}
+
+    assert len(expected) > 0
+    assert (
+        project.index["sunspec1"].parameter_uuid_to_node(types=wanted_types) == expected
+    )
+
+
+def test_node_from_uuid_across_models():
+    project = load_project()
+
+    signal = next(
+        iter(
+            project.models.can.root.nodes_by_filter(
+                filter=lambda node: isinstance(node, epcpm.canmodel.Signal),
+            )
+        )
+    )
+
+    assert project.index.node_from_uuid(signal.uuid) is signal
+    assert project.index.node_from_uuid(uuid.uuid4()) is None
+
+
+def test_tracks_insert_edit_and_remove():
+    project = load_project()
+    index = project.index["can"]
+
+    message = epcpm.canmodel.Message()
+    project.models.can.root.append_child(message)
+    signal = epcpm.canmodel.Signal(parameter_uuid=uuid.uuid4())
+    message.append_child(signal)
+
+    assert index.node_from_uuid(signal.uuid) is signal
+    assert index.nodes_referencing(signal.parameter_uuid) == (signal,)
+
+    old_parameter_uuid = signal.parameter_uuid
+    signal.parameter_uuid = uuid.uuid4()
+
+    assert index.nodes_referencing(old_parameter_uuid) == ()
+    assert index.nodes_referencing(signal.parameter_uuid) == (signal,)
+
+    project.models.can.root.remove_child(child=message)
+
+    assert index.node_from_uuid(message.uuid) is None
+    assert index.node_from_uuid(signal.uuid) is None
+    assert index.nodes_referencing(signal.parameter_uuid) == ()
+
+
+def test_paths_match_tree_walks():
+    project = load_project()
+    root = project.models.sunspec1.root
+    paths = epcpm.projectindex.PathIndex.build(root=root)
+
+    def check(node, _):
+        ancestors = tuple(node.ancestors())
+        assert paths.ancestors(node) == ancestors
+        assert paths.depth(node) == len(ancestors)
+        assert paths.names(node) == tuple(
+            getattr(n, "name", None) for n in reversed([node, *ancestors][:-1])
+        )
+
+        models = [a for a in ancestors if isinstance(a, epcpm.sunspecmodel.Model)]
+        expected = models[0] if len(models) > 0 else None
+        assert paths.nearest(node, epcpm.sunspecmodel.Model) is expected
+
+    root.traverse(call_this=check, internal_nodes=True)
+
+
+def test_paths_rebuilt_after_edit():
+    project = load_project()
+    index = project.index["can"]
+
+    paths = index.paths()
+    assert index.paths() is paths
+
+    message = epcpm.canmodel.Message(name="message")
+    project.models.can.root.append_child(message)
+    signal = epcpm.canmodel.Signal(name="signal")
+    message.append_child(signal)
+
+    assert index.paths() is not paths
+    assert index.paths().names(signal) == ("message", "signal")
+
+    with epcpm.projectindex.using_paths(index.paths()):
+        assert epcpm.projectindex.paths_for(signal) is index.paths()
+
+    assert epcpm.projectindex.paths_for(signal) is None
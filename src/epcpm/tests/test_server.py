@@ -0,0 +1,149 @@
+import pathlib
+import shutil
+import sys
+import threading
+import time
+
+import pytest
+
+import epcpm.importexport
+import epcpm.server
+import epcpm.watch
+
+
+example_directory = pathlib.Path(__file__).parent
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="served on a named pipe rather than the socket path used here",
+)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(epcpm.server, "runtime_directory", lambda: tmp_path / "run")
+    address = str(tmp_path / "run" / "server.sock")
+
+    messages = []
+    thread = threading.Thread(
+        target=epcpm.server.serve,
+        kwargs={"address": address, "echo": messages.append},
+    )
+    thread.start()
+
+    try:
+        deadline = time.monotonic() + 10
+        while "Serving on " + address not in messages:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        yield address
+    finally:
+        epcpm.server.stop(address=address)
+        thread.join()
+
+    assert messages[-1] == "Stopped"
+
+
+def test_no_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(epcpm.server, "runtime_directory", lambda: tmp_path)
+
+    assert epcpm.server.request(args=["export", "build"], cwd=tmp_path) is None
+    assert not epcpm.server.stop(address=str(tmp_path / "server.sock"))
+
+
+def test_unserved_command(server, tmp_path):
+    stdout, stderr, exit_code = epcpm.server.request(
+        args=["utility", "transition"],
+        cwd=tmp_path,
+        address=server,
+    )
+
+    assert exit_code == 2
+    assert "Not run by the server" in stderr
+
+
+def test_client_dropped_mid_request(server, tmp_path, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def run_command(args, cwd):
+        started.set()
+        release.wait(timeout=10)
+
+        return "ran\n", "", 0
+
+    monkeypatch.setattr(epcpm.server, "run_command", run_command)
+
+    connection = epcpm.server.connect(address=server)
+    connection.send({"args": ["export", "build"], "cwd": str(tmp_path)})
+    assert started.wait(timeout=10)
+    # like Ctrl+C on the client while the build runs
+    connection.close()
+    release.set()
+
+    response = epcpm.server.request(
+        args=["export", "build"],
+        cwd=tmp_path,
+        address=server,
+    )
+
+    assert response == ("ran\n", "", 0)
+
+
+def test_build_reuses_project(server, tmp_path, monkeypatch):
+    target_path = tmp_path / "target"
+    project_directory = target_path / "interface" / "pm"
+    project_directory.mkdir(parents=True)
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(example_directory / name, project_directory / name)
+
+    runs = []
+
+    def export(project, paths, target_directory, options, context):
+        runs.append(project)
+        project.models.can
+
+    monkeypatch.setattr(
+        epcpm.importexport,
+        "exporters",
+        (
+            epcpm.importexport.Exporter(
+                name="can",
+                export=export,
+                models=("can",),
+                outputs=lambda paths: (),
+            ),
+        ),
+    )
+
+    loads = []
+    load = epcpm.watch.load
+    monkeypatch.setattr(
+        epcpm.watch,
+        "load",
+        lambda path: loads.append(path) or load(path),
+    )
+
+    args = [
+        "export",
+        "build",
+        "--project",
+        "interface/pm/example_project.pmp",
+        "--target-path",
+        ".",
+    ]
+
+    for _ in range(2):
+        stdout, stderr, exit_code = epcpm.server.request(
+            args=args,
+            cwd=target_path,
+            address=server,
+        )
+
+        assert (exit_code, stderr) == (0, "")
+        assert stdout.endswith("done\n")
+
+    assert len(runs) == 2
+    assert runs[0] is runs[1]
+    assert len(loads) == 1
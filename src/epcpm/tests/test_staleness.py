@@ -0,0 +1,172 @@
+import pathlib
+import shutil
+
+import pytest
+
+import epcpm.importexportpaths
+import epcpm.staleness
+
+
+example_directory = pathlib.Path(__file__).parent
+
+
+@pytest.fixture
+def exported(tmp_path):
+    target_path = tmp_path / "target"
+    project_directory = target_path / "interface" / "pm"
+    project_directory.mkdir(parents=True)
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(example_directory / name, project_directory / name)
+
+    project = project_directory / "example_project.pmp"
+    paths = epcpm.importexportpaths.paths_from_directory(target_path)
+
+    template = epcpm.staleness.template_path(paths.interface_c)
+    model_paths = epcpm.staleness.model_paths(project)
+    inputs = epcpm.staleness.hashes(
+        paths=[model_paths["parameters"], model_paths["can"], template],
+        target_directory=target_path,
+    )
+
+    for path in (paths.can, paths.interface_c):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"generated {path.name}\n")
+
+    epcpm.staleness.write_manifest(
+        target_directory=target_path,
+        manifest=epcpm.staleness.build_manifest(
+            project=project,
+            target_directory=target_path,
+            options=epcpm.staleness.ExportOptions(),
+            entries={
+                "can": epcpm.staleness.entry(
+                    inputs=inputs,
+                    outputs=[paths.can],
+                    target_directory=target_path,
+                ),
+                "interface": epcpm.staleness.entry(
+                    inputs=inputs,
+                    outputs=[paths.interface_c],
+                    target_directory=target_path,
+                ),
+            },
+        ),
+    )
+
+    return project, paths, target_path
+
+
+def is_stale(exported, **kwargs):
+    project, paths, target_path = exported
+
+    return epcpm.staleness.is_stale(
+        project=project,
+        target_directory=target_path,
+        **kwargs,
+    )
+
+
+def test_fresh(exported):
+    assert not is_stale(exported)
+
+
+def test_missing_manifest(exported):
+    project, paths, target_path = exported
+    epcpm.staleness.remove_manifest(target_path)
+
+    assert is_stale(exported)
+
+
+def test_touched_but_unchanged(exported):
+    project, paths, target_path = exported
+    project.with_name("example_can.json").touch()
+    paths.can.touch()
+
+    assert not is_stale(exported)
+
+
+@pytest.mark.parametrize(
+    "name", ["example_project.pmp", "example_can.json", "example_parameters.json"]
+)
+def test_project_changed(exported, name):
+    project, paths, target_path = exported
+    path = project.with_name(name)
+    path.write_text(path.read_text() + "\n")
+
+    assert is_stale(exported)
+
+
+def test_template_added(exported):
+    project, paths, target_path = exported
+    epcpm.staleness.template_path(paths.interface_c).write_text("{{ x }}\n")
+
+    assert is_stale(exported)
+
+
+@pytest.mark.parametrize("name", ["EPC_DG_ID247_FACTORY.sym", "interfaceGen.c"])
+def test_output_changed(exported, name):
+    project, paths, target_path = exported
+    (path,) = target_path.glob(f"**/{name}")
+    path.write_text("edited\n")
+
+    assert is_stale(exported)
+
+
+def test_output_removed(exported):
+    project, paths, target_path = exported
+    paths.interface_c.unlink()
+
+    assert is_stale(exported)
+
+
+def test_options_changed(exported):
+    assert is_stale(exported, skip_sunspec=True)
+    assert is_stale(exported, include_uuid_in_item=True)
+
+
+def test_code_changed(exported, monkeypatch):
+    monkeypatch.setattr(epcpm.staleness, "code_hash", lambda: "changed")
+
+    assert is_stale(exported)
+
+
+def test_source_hash(tmp_path):
+    module = tmp_path / "exporter.py"
+    module.write_text("x = 1\n")
+    (tmp_path / "notes.txt").write_text("")
+    original = epcpm.staleness.source_hash(tmp_path)
+
+    (tmp_path / "notes.txt").write_text("edited\n")
+    assert epcpm.staleness.source_hash(tmp_path) == original
+
+    module.write_text("x = 2\n")
+    edited = epcpm.staleness.source_hash(tmp_path)
+    assert edited != original
+
+    module.rename(tmp_path / "renamed.py")
+    assert epcpm.staleness.source_hash(tmp_path) not in {original, edited}
+
+
+def test_entry_is_current(exported):
+    project, paths, target_path = exported
+    manifest = epcpm.staleness.read_manifest(target_path)
+    entry = manifest["exporters"]["can"]
+
+    assert epcpm.staleness.entry_is_current(
+        entry=entry,
+        inputs=entry["inputs"],
+        target_directory=target_path,
+    )
+
+    paths.can.write_text("edited\n")
+
+    assert not epcpm.staleness.entry_is_current(
+        entry=entry,
+        inputs=entry["inputs"],
+        target_directory=target_path,
+    )
+    assert epcpm.staleness.entry_is_current(
+        entry=manifest["exporters"]["interface"],
+        inputs=entry["inputs"],
+        target_directory=target_path,
+    )
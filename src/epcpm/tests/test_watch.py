@@ -0,0 +1,90 @@
+import os
+import pathlib
+import shutil
+import time
+
+import pytest
+
+import epcpm.importexport
+import epcpm.importexportpaths
+import epcpm.watch
+
+
+example_directory = pathlib.Path(__file__).parent
+
+
+@pytest.fixture
+def project_path(tmp_path):
+    for name in ("example_project.pmp", "example_parameters.json", "example_can.json"):
+        shutil.copy(example_directory / name, tmp_path / name)
+
+    return tmp_path / "example_project.pmp"
+
+
+def test_poll_ignores_unchanged_contents(project_path):
+    watcher = epcpm.watch.Watcher(project_path=project_path)
+
+    assert watcher.poll() == {epcpm.watch.project_file, "parameters", "can"}
+    assert watcher.poll() == set()
+
+    can_path = project_path.with_name("example_can.json")
+    stat = can_path.stat()
+    os.utime(can_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert watcher.poll() == set()
+
+    can_path.write_text(can_path.read_text() + "\n")
+    assert watcher.poll() == {"can"}
+
+
+def test_reruns_affected_exporters(project_path, monkeypatch):
+    target_path = project_path.parent / "target"
+    target_path.mkdir()
+
+    runs = []
+
+    def exporter(name, models):
+        def export(project, paths, target_directory, options, context):
+            runs.append(name)
+            for model in models:
+                project.models[model]
+            (target_directory / name).write_text(f"{name}\n")
+
+        return epcpm.importexport.Exporter(
+            name=name,
+            export=export,
+            models=models,
+            outputs=lambda paths: (target_path / name,),
+        )
+
+    monkeypatch.setattr(
+        epcpm.importexport,
+        "exporters",
+        (
+            exporter(name="parameters", models=("parameters",)),
+            exporter(name="can", models=("can",)),
+        ),
+    )
+
+    can_path = project_path.with_name("example_can.json")
+
+    def edit_can():
+        can_path.write_text(can_path.read_text() + "\n")
+
+    def stop():
+        raise KeyboardInterrupt()
+
+    # run at each sleep, the first after the initial settling poll
+    steps = iter([lambda: None, lambda: None, edit_can, lambda: None, stop])
+    monkeypatch.setattr(time, "sleep", lambda seconds: next(steps)())
+
+    messages = []
+    with pytest.raises(KeyboardInterrupt):
+        epcpm.watch.watch(
+            project_path=project_path,
+            target_directory=target_path,
+            paths=epcpm.importexportpaths.paths_from_directory(target_path),
+            echo=messages.append,
+        )
+
+    assert runs == ["parameters", "can", "can"]
+    assert "Changed: can" in messages
@@ -0,0 +1,141 @@
+import os
+
+import openpyxl
+import pytest
+
+import epcpm.writer
+
+
+def test_unchanged_text_is_not_rewritten(tmp_path):
+    path = tmp_path / "generated.c"
+
+    with epcpm.writer.counting() as counts:
+        assert epcpm.writer.write_text(path=path, text="int x;\n")
+        os.utime(path, ns=(0, 0))
+        assert not epcpm.writer.write_text(path=path, text="int x;\n")
+
+    assert path.stat().st_mtime_ns == 0
+    assert counts == epcpm.writer.Counts(written=1, skipped=1)
+
+
+def test_same_size_change_is_written(tmp_path):
+    path = tmp_path / "generated.c"
+    path.write_text("int x;\n")
+
+    with epcpm.writer.counting() as counts:
+        assert epcpm.writer.write_text(path=path, text="int y;\n")
+
+    assert path.read_text() == "int y;\n"
+    assert counts == epcpm.writer.Counts(written=1, skipped=0)
+
+
+def test_line_endings_are_kept(tmp_path):
+    path = tmp_path / "generated.csv"
+
+    epcpm.writer.write_text(path=path, text='"a","b"\r\n')
+
+    assert path.read_bytes() == b'"a","b"\r\n'
+
+
+def test_missing_directories_are_created(tmp_path):
+    path = tmp_path / "a" / "b" / "generated.h"
+
+    epcpm.writer.write_bytes(path=path, data=b"")
+
+    assert path.exists()
+
+
+def workbook(value):
+    workbook = openpyxl.Workbook()
+    workbook.active["A1"] = value
+
+    return workbook
+
+
+def test_resaved_workbook_is_not_rewritten(tmp_path):
+    path = tmp_path / "generated.xlsx"
+
+    with epcpm.writer.counting() as counts:
+        epcpm.writer.save_workbook(workbook=workbook("x"), path=path)
+        os.utime(path, ns=(0, 0))
+        assert not epcpm.writer.save_workbook(workbook=workbook("x"), path=path)
+        assert path.stat().st_mtime_ns == 0
+
+        assert epcpm.writer.save_workbook(workbook=workbook("y"), path=path)
+
+    assert openpyxl.load_workbook(path).active["A1"].value == "y"
+    assert counts == epcpm.writer.Counts(written=2, skipped=1)
+
+
+def test_nested_counts_are_added_to_outer(tmp_path):
+    with epcpm.writer.counting() as outer:
+        epcpm.writer.write_text(path=tmp_path / "a", text="a")
+
+        with epcpm.writer.counting() as inner:
+            epcpm.writer.write_text(path=tmp_path / "a", text="a")
+
+        epcpm.writer.add_counts(epcpm.writer.Counts(written=2, skipped=3))
+
+    assert inner == epcpm.writer.Counts(written=0, skipped=1)
+    assert outer == epcpm.writer.Counts(written=3, skipped=4)
+
+
+def test_capturing_writes_nothing(tmp_path):
+    unchanged = tmp_path / "unchanged.c"
+    unchanged.write_text("int x;\n")
+    changed = tmp_path / "changed.c"
+    changed.write_text("int x;\n")
+    new = tmp_path / "new" / "new.h"
+
+    with epcpm.writer.capturing() as captured:
+        with epcpm.writer.counting() as counts:
+            epcpm.writer.write_text(path=unchanged, text="int x;\n")
+            epcpm.writer.write_text(path=changed, text="int y;\n")
+            epcpm.writer.write_text(path=new, text="int z;\n")
+
+    assert captured == {changed: b"int y;\n", new: b"int z;\n"}
+    assert counts == epcpm.writer.Counts(written=2, skipped=1)
+    assert changed.read_text() == "int x;\n"
+    assert not new.parent.exists()
+
+
+def test_chunks_streamed(tmp_path):
+    path = tmp_path / "generated.c"
+
+    with epcpm.writer.counting() as counts:
+        assert epcpm.writer.write_chunks(path=path, chunks=[b"int ", b"x;\n"])
+        os.utime(path, ns=(0, 0))
+        assert not epcpm.writer.write_chunks(path=path, chunks=iter([b"int x;\n"]))
+        assert epcpm.writer.write_chunks(path=path, chunks=[b"int y;\n"])
+
+    assert path.read_bytes() == b"int y;\n"
+    assert counts == epcpm.writer.Counts(written=2, skipped=1)
+    assert [p.name for p in tmp_path.iterdir()] == ["generated.c"]
+
+
+def test_failed_chunks_leave_file(tmp_path):
+    path = tmp_path / "generated.c"
+    path.write_bytes(b"int x;\n")
+
+    def chunks():
+        yield b"int "
+        raise Exception("broken")
+
+    with pytest.raises(Exception, match="broken"):
+        epcpm.writer.write_chunks(path=path, chunks=chunks())
+
+    assert path.read_bytes() == b"int x;\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["generated.c"]
+
+
+def test_remove_leaves_captured_file(tmp_path):
+    path = tmp_path / "generated.c"
+    path.write_text("int x;\n")
+
+    with epcpm.writer.capturing():
+        assert not epcpm.writer.remove(path)
+
+    assert path.exists()
+    assert epcpm.writer.remove(path)
+    assert not path.exists()
+    assert not epcpm.writer.remove(path)
@@ -0,0 +1,166 @@
+"""Continuous incremental export while the project is being edited.
+
+The project is kept loaded between exports.  When its model files change
+only those models are read again and only the exporters reading them, or
+whose outputs changed, are rerun as decided by the manifest, see
+:func:`epcpm.importexport.full_export`.
+
+The files are polled rather than watched through inotify so the same loop
+works on every platform.  Polling only stats the few project files, their
+contents are hashed only when that changes so touching a file or saving it
+unchanged triggers nothing.
+"""
+
+import pathlib
+import time
+import traceback
+
+import attr
+
+import epcpm.importexport
+import epcpm.project
+import epcpm.staleness
+
+
+# the name used for the project file itself among the model files
+project_file = None
+
+
+def stat_key(path):
+    try:
+        stat = pathlib.Path(path).stat()
+    except FileNotFoundError:
+        return None
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def watched_files(project_path):
+    return {
+        project_file: project_path,
+        **epcpm.staleness.model_paths(project_path),
+    }
+
+
+@attr.s
+class Watcher:
+    project_path = attr.ib(converter=pathlib.Path)
+    files = attr.ib(
+        default=attr.Factory(
+            lambda self: watched_files(self.project_path),
+            takes_self=True,
+        ),
+    )
+    _stats = attr.ib(default=attr.Factory(dict), repr=False)
+    _hashes = attr.ib(default=attr.Factory(dict), repr=False)
+
+    def poll(self):
+        """The model names, or :data:`project_file`, of the files whose
+        contents changed since the previous poll.  Everything counts as
+        changed on the first poll.
+        """
+        changed = set()
+
+        for name, path in self.files.items():
+            stat = stat_key(path)
+            if name in self._stats and stat == self._stats[name]:
+                continue
+
+            self._stats[name] = stat
+            digest = epcpm.staleness.hash_file(path)
+            if name in self._hashes and digest == self._hashes[name]:
+                continue
+
+            self._hashes[name] = digest
+            changed.add(name)
+
+        if project_file in changed:
+            # the model files may have been renamed
+            self.files = watched_files(self.project_path)
+
+        return changed
+
+    def settled(self, interval):
+        """Poll until a full interval passes without changes, so a save
+        writing several files is handled at once.
+        """
+        changed = self.poll()
+
+        while True:
+            time.sleep(interval)
+            more = self.poll()
+            if len(more) == 0:
+                return changed
+
+            changed |= more
+
+
+def load(project_path):
+    # lazy so models are only read once an exporter needs them
+    return epcpm.project.loadp(project_path, lazy=True, headless=True)
+
+
+def watch(
+    project_path,
+    target_directory,
+    paths,
+    skip_output=False,
+    include_uuid_in_item=False,
+    split_interface=False,
+    interval=0.5,
+    echo=print,
+):
+    """Export, then again each time the project changes.  Runs until
+    interrupted, failed exports are reported and retried on the next change.
+    """
+    watcher = Watcher(project_path=project_path)
+    changed = watcher.settled(interval=interval)
+    project = None
+
+    while True:
+        start = time.monotonic()
+
+        try:
+            if project is None or project_file in changed:
+                project = load(project_path)
+            else:
+                epcpm.project.reload_models(project=project, names=sorted(changed))
+
+            counts = epcpm.importexport.full_export(
+                project=project,
+                paths=paths,
+                target_directory=target_directory,
+                skip_output=skip_output,
+                include_uuid_in_item=include_uuid_in_item,
+                split_interface=split_interface,
+                only_stale=True,
+            )
+        except Exception:
+            echo(traceback.format_exc())
+            echo("Export failed, waiting for the next change")
+            # the models may be partly reloaded, start over next time
+            project = None
+        else:
+            elapsed = time.monotonic() - start
+            echo(f"Exported in {elapsed:.1f} s, {counts.summary()}")
+
+        changed = watcher.poll()
+        if len(changed) > 0:
+            # changed while exporting, possibly after the export hashed the
+            # model files but before it read them, so the manifest can't be
+            # trusted to tell which exporters that change affects
+            epcpm.staleness.remove_manifest(target_directory)
+
+        while len(changed) == 0:
+            time.sleep(interval)
+            changed = watcher.poll()
+
+        changed |= watcher.settled(interval=interval)
+        echo(
+            "Changed: {}".format(
+                ", ".join(
+                    "project" if name is project_file else name
+                    for name in sorted(changed, key=str)
+                )
+            )
+        )
@@ -0,0 +1,259 @@
+"""Writing of generated files, leaving unchanged files untouched.
+
+Rewriting a file with identical contents still updates its modification time
+and so has the embedded build recompile everything generated.  Writes through
+here compare against the existing file, size first and then hash, and skip it
+when nothing changed.  The files written and skipped are tallied in the
+active :class:`Counts`, see :func:`counting`.  Within :func:`capturing` the
+changed files are kept in memory instead of being written.
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import pathlib
+import zipfile
+
+import attr
+
+
+@attr.s
+class Counts:
+    written = attr.ib(default=0)
+    skipped = attr.ib(default=0)
+
+    def add(self, other):
+        self.written += other.written
+        self.skipped += other.skipped
+
+    def summary(self):
+        return f"{self.written} files written, {self.skipped} unchanged"
+
+
+_counts = Counts()
+
+
+@contextlib.contextmanager
+def counting():
+    """Tally the writes made in the block in a fresh :class:`Counts`, they
+    are also added to any enclosing tally.
+    """
+    global _counts
+
+    outer = _counts
+    _counts = Counts()
+    try:
+        yield _counts
+    finally:
+        outer.add(_counts)
+        _counts = outer
+
+
+_captured = None
+
+
+@contextlib.contextmanager
+def capturing():
+    """Keep the writes made in the block in memory rather than writing them,
+    for a dry run.  The existing files are still compared against so only
+    the changed ones are kept, and they are tallied as written.
+
+    Yields:
+        dict of path to the bytes that would have been written
+    """
+    global _captured
+
+    outer = _captured
+    _captured = {}
+    try:
+        yield _captured
+    finally:
+        _captured = outer
+
+
+def is_capturing():
+    return _captured is not None
+
+
+def add_counts(counts):
+    """Add writes tallied elsewhere, such as in a worker process, to the
+    active tally.
+    """
+    _counts.add(counts)
+
+
+def _hash(data):
+    return hashlib.sha256(data).digest()
+
+
+def _unchanged(path, data):
+    try:
+        if path.stat().st_size != len(data):
+            return False
+
+        existing = path.read_bytes()
+    except FileNotFoundError:
+        return False
+
+    return _hash(existing) == _hash(data)
+
+
+def _record(written):
+    if written:
+        _counts.written += 1
+    else:
+        _counts.skipped += 1
+
+    return written
+
+
+def _store(path, data):
+    if _captured is not None:
+        _captured[path] = data
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+def write_bytes(path, data):
+    """Write the data to the path unless it already holds exactly that.
+
+    Returns:
+        True if the file was written
+    """
+    path = pathlib.Path(path)
+
+    if _unchanged(path=path, data=data):
+        return _record(False)
+
+    _store(path=path, data=data)
+
+    return _record(True)
+
+
+def write_text(path, text, encoding="utf-8"):
+    """Like :func:`write_bytes`, without newline translation so the text's
+    own line endings are written.
+    """
+    return write_bytes(path=path, data=text.encode(encoding))
+
+
+def remove(path):
+    """Remove a file that is no longer generated.  Within :func:`capturing`
+    the file is left in place.
+
+    Returns:
+        True if the file was removed
+    """
+    if _captured is not None:
+        return False
+
+    try:
+        pathlib.Path(path).unlink()
+    except FileNotFoundError:
+        return False
+
+    return True
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+    return digest.digest()
+
+
+def write_chunks(path, chunks):
+    """Like :func:`write_bytes` for data produced in pieces.  They are
+    streamed to a temporary file next to the path, which replaces it only
+    if the contents differ, rather than being joined in memory.
+    """
+    path = pathlib.Path(path)
+
+    if _captured is not None:
+        return write_bytes(path=path, data=b"".join(chunks))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(temporary_path, "wb") as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+
+        try:
+            unchanged = (
+                path.stat().st_size == size and _file_hash(path) == digest.digest()
+            )
+        except FileNotFoundError:
+            unchanged = False
+
+        if unchanged:
+            temporary_path.unlink()
+            return _record(False)
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        if temporary_path.exists():
+            temporary_path.unlink()
+
+        raise
+
+    return _record(True)
+
+
+# holds the save time which differs for every save
+_workbook_core_properties = "docProps/core.xml"
+
+
+def _workbook_members(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return {
+            info.filename: _hash(archive.read(info))
+            for info in archive.infolist()
+            if info.filename != _workbook_core_properties
+        }
+
+
+def _workbook_unchanged(path, data):
+    # the archive also holds the save time for each member, which can
+    # change its size, so the members are compared rather than the file
+    try:
+        existing = path.read_bytes()
+    except FileNotFoundError:
+        return False
+
+    try:
+        return _workbook_members(existing) == _workbook_members(data)
+    except zipfile.BadZipFile:
+        return False
+
+
+def save_workbook(workbook, path):
+    """Save an openpyxl workbook unless the existing file only differs in
+    when it was saved.
+
+    Returns:
+        True if the file was written
+    """
+    path = pathlib.Path(path)
+
+    stream = io.BytesIO()
+    workbook.save(stream)
+    data = stream.getvalue()
+
+    if _workbook_unchanged(path=path, data=data):
+        return _record(False)
+
+    _store(path=path, data=data)
+
+    return _record(True)